@@ -0,0 +1 @@
+""" Benchmarks for the SPMF wrapper. Run from the repository root, e.g. python -m benchmarks.benchmark_topk """
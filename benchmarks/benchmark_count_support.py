@@ -0,0 +1,47 @@
+""" Benchmark of PatternSet.count_support against re-mining new data
+
+The patterns mined on the first part of kosarak25k are counted on the rest of it, and compared to
+re-mining the rest with PrefixSpan at a threshold low enough to return the supports of the known patterns.
+
+Usage:
+    python -m benchmarks.benchmark_count_support --min-support 0.005
+"""
+
+import argparse
+import time
+
+from benchmarks.datasets import load_sequences
+from spmf.patterns import PatternSet
+from spmf.seq_pat import PrefixSpan
+
+
+def main() -> None:
+    """ Run the benchmark """
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--min-support', type=float, default=0.005)
+    parser.add_argument('--baseline', type=int, default=12500, help='Number of sequences mined for the baseline')
+    parser.add_argument('--memory', type=int, default=4096)
+    args = parser.parse_args()
+
+    sequences = load_sequences('kosarak25k.txt')
+    baseline_df = sequences[sequences['ID'] < args.baseline]
+    new_df = sequences[sequences['ID'] >= args.baseline]
+
+    baseline = PrefixSpan(min_support=args.min_support, memory=args.memory).run_pandas(baseline_df)
+    patterns = PatternSet.from_dataframe(baseline)
+    print(f'{len(patterns)} known patterns')
+
+    for chunk_size in [new_df['ID'].nunique(), 2500]:
+        start = time.perf_counter()
+        counted = patterns.count_support(new_df, chunk_size=chunk_size)
+        print(f'count_support, chunks of {chunk_size} sequences: {time.perf_counter() - start:.2f}s')
+
+    # Re-mining needs a threshold at or below the lowest support of a known pattern
+    min_support = max(1, counted['Support'].min()) / new_df['ID'].nunique()
+    start = time.perf_counter()
+    remined = PrefixSpan(min_support=min_support, memory=args.memory).run_pandas(new_df)
+    print(f'PrefixSpan re-mining at {min_support:.5f}: {time.perf_counter() - start:.2f}s, {len(remined)} patterns')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+""" Benchmark of IncrementalSeqPat against re-mining the whole database
+
+The first sequences of kosarak25k are mined, then batches of 1% new sequences are appended, as in a
+nightly update. Each update is compared with PrefixSpan on the whole database.
+
+Usage:
+    python -m benchmarks.benchmark_incremental --min-support 0.005 --updates 5
+"""
+
+import argparse
+import time
+
+import pandas as pd
+
+from benchmarks.datasets import load_sequences
+from spmf.incremental import IncrementalSeqPat
+from spmf.seq_pat import PrefixSpan
+
+
+def main() -> None:
+    """ Run the benchmark """
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--min-support', type=float, default=0.005)
+    parser.add_argument('--baseline', type=int, default=20000, help='Number of sequences of the initial database')
+    parser.add_argument('--updates', type=int, default=5)
+    parser.add_argument('--buffer-ratio', type=float, default=0.8)
+    parser.add_argument('--memory', type=int, default=4096)
+    args = parser.parse_args()
+
+    sequences = load_sequences('kosarak25k.txt')
+    batch_size = args.baseline // 100
+    database = sequences[sequences['ID'] < args.baseline]
+
+    incremental = IncrementalSeqPat(PrefixSpan(args.min_support, memory=args.memory), args.buffer_ratio)
+    start = time.perf_counter()
+    incremental.run_pandas(database)
+    print(f'Initial mining of {args.baseline} sequences: {time.perf_counter() - start:.2f}s, '
+          f'{len(incremental.buffer)} buffered patterns')
+
+    for i in range(args.updates):
+        first = args.baseline + i * batch_size
+        batch = sequences[(sequences['ID'] >= first) & (sequences['ID'] < first + batch_size)]
+        database = pd.concat([database, batch])
+
+        start = time.perf_counter()
+        output = incremental.append(batch)
+        elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        expected = PrefixSpan(args.min_support, memory=args.memory).run_pandas(database)
+        full = time.perf_counter() - start
+
+        same = set(output.itertuples(index=False)) == set(expected.itertuples(index=False))
+        print(f'Update {i + 1}: {elapsed:.2f}s ({"full re-mine" if incremental.remined else "incremental"}), '
+              f'full re-mine {full:.2f}s, {len(output)} patterns, identical: {same}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+""" Throughput benchmark of EpisodeMatcher on a synthetic alarm stream
+
+Usage:
+    python -m benchmarks.benchmark_matcher --episodes 5000 --events 200000
+"""
+
+import argparse
+import random
+import time
+
+from spmf.streaming import EpisodeMatcher
+
+
+def random_episode(rng: random.Random, n_items: int) -> str:
+    """ Random episode of 1 to 4 itemsets of 1 or 2 items """
+    return ' -> '.join(
+        ' '.join(sorted({f'alarm{rng.randrange(n_items)}' for _ in range(rng.choice([1, 1, 1, 2]))}))
+        for _ in range(rng.randint(1, 4))
+    )
+
+
+def main() -> None:
+    """ Run the benchmark """
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--episodes', type=int, default=5000)
+    parser.add_argument('--events', type=int, default=200000)
+    parser.add_argument('--items', type=int, default=500)
+    parser.add_argument('--max-window', type=int, default=10)
+    parser.add_argument('--batch', type=int, default=1000, help='Micro-batch size')
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    episodes = list({random_episode(rng, args.items) for _ in range(args.episodes)})
+    # About two events per time point
+    events = [(i // 2, f'alarm{rng.randrange(args.items)}') for i in range(args.events)]
+
+    start = time.perf_counter()
+    matcher = EpisodeMatcher(episodes, args.max_window)
+    print(f'Compiled {len(episodes)} episodes into {matcher.n_nodes} trie nodes in {time.perf_counter() - start:.2f}s')
+
+    start, n_matches = time.perf_counter(), 0
+    for event in events:
+        n_matches += len(matcher.process(*event))
+    elapsed = time.perf_counter() - start
+    print(f'One at a time: {args.events / elapsed:,.0f} events/s, {n_matches} matches')
+
+    matcher.reset()
+    start, n_matches = time.perf_counter(), 0
+    for i in range(0, len(events), args.batch):
+        n_matches += len(matcher.process_batch(events[i:i + args.batch]))
+    elapsed = time.perf_counter() - start
+    print(f'Micro-batches of {args.batch}: {args.events / elapsed:,.0f} events/s, {n_matches} matches')
+
+
+if __name__ == '__main__':
+    main()
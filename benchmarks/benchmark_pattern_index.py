@@ -0,0 +1,65 @@
+""" Benchmark of PatternIndex queries against scans of the pattern column
+
+The patterns mined on kosarak25k are repeated up to the requested number of patterns, and a few typical
+queries are answered by the index and by pandas string operations on the output dataframe.
+
+Usage:
+    python -m benchmarks.benchmark_pattern_index --min-support 0.002 --n-patterns 10000000
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.datasets import load_sequences
+from spmf.pattern_index import PatternIndex
+from spmf.seq_pat import PrefixSpan
+
+
+def main() -> None:
+    """ Run the benchmark """
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--min-support', type=float, default=0.002)
+    parser.add_argument('--n-patterns', type=int, default=1_000_000)
+    parser.add_argument('--memory', type=int, default=4096)
+    args = parser.parse_args()
+
+    output = PrefixSpan(min_support=args.min_support, memory=args.memory).run_pandas(load_sequences('kosarak25k.txt'))
+    output = output.iloc[np.arange(args.n_patterns) % len(output)].reset_index(drop=True)
+    column = output['Frequent sequential pattern']
+    supports = pd.to_numeric(output['Support'])
+    item = column.iloc[0].split()[0]
+    print(f'{len(output)} patterns')
+
+    start = time.perf_counter()
+    index = PatternIndex.from_dataframe(output)
+    print(f'Index built in {time.perf_counter() - start:.2f}s')
+
+    queries = {
+        f'starts with {item}': (
+            {'starts_with': item},
+            lambda: np.flatnonzero(column.str.match(f'{item}( ->|$)')),
+        ),
+        f'contains {item} and 3': (
+            {'contains': [item, '3']},
+            lambda: np.flatnonzero(column.str.contains(fr'\b{item}\b') & column.str.contains(r'\b3\b')),
+        ),
+        'support > 100 and length >= 3': (
+            {'min_support': 101, 'min_length': 3},
+            lambda: np.flatnonzero((supports > 100) & (column.str.split().str.len() - column.str.count('->') >= 3)),
+        ),
+    }
+    for name, (query, scan) in queries.items():
+        start = time.perf_counter()
+        rows = index.query(**query)
+        indexed = time.perf_counter() - start
+        start = time.perf_counter()
+        scanned = scan()
+        print(f'{name}: {len(rows)} patterns, index {indexed * 1e3:.3f}ms, scan {time.perf_counter() - start:.2f}s, '
+              f'same rows: {np.array_equal(rows, scanned)}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+""" Benchmark of the infrequent item prefilter
+
+kosarak25k is mined with PrefixSpan, and a long-tail synthetic alarm sequence with EMMA, with and without
+the prefilter. The serialized input size and the run time are reported for both.
+
+Usage:
+    python -m benchmarks.benchmark_prefilter --min-support 0.005
+"""
+
+import argparse
+import math
+import random
+import time
+from typing import Type
+
+import pandas as pd
+
+from benchmarks.datasets import load_sequences
+from spmf import prefilter
+from spmf.base import Spmf
+from spmf.episode import EMMA
+from spmf.seq_pat import PrefixSpan
+
+
+def long_tail_events(n_time_points: int, seed: int = 0) -> pd.DataFrame:
+    """ Synthetic event sequence whose item frequencies follow a Pareto distribution """
+    rng = random.Random(seed)
+    events = {
+        (t, f'alarm{int(rng.paretovariate(0.3))}') for t in range(n_time_points) for _ in range(rng.randint(1, 4))
+    }
+    return pd.DataFrame(sorted(events), columns=['Time points', 'Itemset'])
+
+
+def compare(name: str, algorithm: Type[Spmf], kwargs: dict, input_df: pd.DataFrame, filtered_df: pd.DataFrame) -> None:
+    """ Report the serialized size and run time with and without the prefilter """
+    size = len(algorithm(**kwargs, prefilter=False)._parse_input_dataframe(input_df))
+    filtered_size = len(algorithm(**kwargs, prefilter=False)._parse_input_dataframe(filtered_df))
+
+    timings = {}
+    for enabled in [False, True]:
+        start = time.perf_counter()
+        outputs = algorithm(**kwargs, prefilter=enabled).run_pandas(input_df)
+        timings[enabled] = (time.perf_counter() - start, len(outputs))
+
+    print(f'{name}: input {size / 1e6:.2f} MB -> {filtered_size / 1e6:.2f} MB, '
+          f'run {timings[False][0]:.2f}s -> {timings[True][0]:.2f}s, '
+          f'{timings[False][1]} and {timings[True][1]} patterns')
+
+
+def main() -> None:
+    """ Run the benchmark """
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--min-support', type=float, default=0.005)
+    parser.add_argument('--episode-support', type=int, default=200)
+    parser.add_argument('--memory', type=int, default=4096)
+    args = parser.parse_args()
+
+    sequences = load_sequences('kosarak25k.txt')
+    min_count = math.ceil(args.min_support * sequences['ID'].nunique())
+    compare('PrefixSpan on kosarak25k', PrefixSpan, {'min_support': args.min_support, 'memory': args.memory},
+            sequences, prefilter.filter_sequences(sequences, min_count))
+
+    events = long_tail_events(20000)
+    emma_kwargs = {
+        'min_support': args.episode_support, 'max_window': 3, 'timestamp_present': True, 'memory': args.memory,
+    }
+    compare('EMMA on long-tail alarms', EMMA, emma_kwargs, events,
+            prefilter.filter_events(events, args.episode_support, 3, split_itemsets=False))
+
+
+if __name__ == '__main__':
+    main()
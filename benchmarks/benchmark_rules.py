@@ -0,0 +1,54 @@
+""" Benchmark of PatternSet.generate_rules against a dictionary lookup of the antecedents
+
+The patterns mined on kosarak25k are copied with renamed items up to the requested number of patterns, which
+keeps a complete set of frequent patterns. Their sequential rules are generated by the vectorized lookup of the
+antecedent hashes, serially and in parallel chunks, and by a Python loop over the splits of each pattern.
+
+Usage:
+    python -m benchmarks.benchmark_rules --min-support 0.002 --n-patterns 2000000
+"""
+
+import argparse
+import time
+
+import pandas as pd
+
+from benchmarks.datasets import load_sequences
+from spmf.patterns import PatternSet, format_pattern
+from spmf.seq_pat import PrefixSpan
+
+
+def main() -> None:
+    """ Run the benchmark """
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--min-support', type=float, default=0.002)
+    parser.add_argument('--min-confidence', type=float, default=0.3)
+    parser.add_argument('--n-patterns', type=int, default=1_000_000)
+    parser.add_argument('--memory', type=int, default=4096)
+    args = parser.parse_args()
+
+    output = PrefixSpan(min_support=args.min_support, memory=args.memory).run_pandas(load_sequences('kosarak25k.txt'))
+    copies = [output.assign(**{'Frequent sequential pattern': output['Frequent sequential pattern'].str.replace(
+        r'(\d+)', fr'\1_{copy}', regex=True)}) for copy in range(max(1, args.n_patterns // len(output)))]
+    patterns = PatternSet.from_dataframe(pd.concat(copies, ignore_index=True))
+    print(f'{len(patterns)} patterns')
+
+    for chunk_size in [len(patterns) * 10, 1_000_000]:
+        start = time.perf_counter()
+        rules = patterns.generate_rules(args.min_confidence, chunk_size=chunk_size)
+        print(f'generate_rules, chunks of {chunk_size} candidates: {time.perf_counter() - start:.2f}s, '
+              f'{len(rules)} rules')
+
+    start = time.perf_counter()
+    supports = {pattern: int(support) for pattern, support in zip(patterns.patterns, patterns.supports)}
+    looped = [
+        (format_pattern(pattern[:depth]), format_pattern(pattern[depth:]), support, support / supports[pattern[:depth]])
+        for pattern, support in supports.items()
+        for depth in range(1, len(pattern))
+        if pattern[:depth] in supports and support / supports[pattern[:depth]] >= args.min_confidence
+    ]
+    print(f'Python loop: {time.perf_counter() - start:.2f}s, {len(looped)} rules')
+
+
+if __name__ == '__main__':
+    main()
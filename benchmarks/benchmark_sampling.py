@@ -0,0 +1,64 @@
+""" Benchmark of approximate PrefixSpan on a sample of kosarak25k against the exact run
+
+kosarak25k is repeated to make a larger database with the same frequent patterns. For each error bound,
+the patterns found on a sample are compared to the exact frequent patterns: recall is the fraction of the
+frequent patterns found, and precision the fraction of the patterns found which are frequent. Without
+verification, both are also reported for the patterns whose estimated support is above the minimum support.
+Coverage is the fraction of the frequent patterns found whose support is within their confidence interval.
+
+Usage:
+    python -m benchmarks.benchmark_sampling --min-support 0.005 --epsilon 0.002 --repeat 8
+"""
+
+import argparse
+import time
+
+import pandas as pd
+
+from benchmarks.datasets import load_sequences
+from spmf.seq_pat import PrefixSpan
+
+
+def main() -> None:
+    """ Run the benchmark """
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--min-support', type=float, default=0.005)
+    parser.add_argument('--epsilon', type=float, nargs='+', default=[0.002])
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--memory', type=int, default=4096)
+    args = parser.parse_args()
+
+    sequences = load_sequences('kosarak25k.txt')
+    n_sequences = sequences['ID'].max() + 1
+    sequences = pd.concat([sequences.assign(ID=sequences['ID'] + copy * n_sequences) for copy in range(args.repeat)],
+                          ignore_index=True)
+
+    start = time.perf_counter()
+    exact = PrefixSpan(min_support=args.min_support, memory=args.memory).run_pandas(sequences)
+    print(f'Exact PrefixSpan: {time.perf_counter() - start:.2f}s, {len(exact)} patterns')
+    exact = exact.set_index('Frequent sequential pattern')['Support'].astype(int)
+
+    for epsilon in args.epsilon:
+        for verify in [False, True]:
+            algorithm = PrefixSpan(min_support=args.min_support, memory=args.memory, approximate=True,
+                                   epsilon=epsilon, verify=verify, random_state=0)
+            start = time.perf_counter()
+            output = algorithm.run_pandas(sequences).set_index('Frequent sequential pattern')
+            elapsed = time.perf_counter() - start
+
+            found = output.index.intersection(exact.index)
+            supports = pd.DataFrame({'exact': exact[found], 'lower': output.loc[found, 'Support lower'],
+                                     'upper': output.loc[found, 'Support upper']})
+            covered = ((supports['lower'] <= supports['exact']) & (supports['exact'] <= supports['upper'])).mean()
+            print(f'epsilon {epsilon}, verify {verify}: {elapsed:.2f}s, {len(output)} patterns, '
+                  f'recall {len(found) / len(exact):.3f}, precision {len(found) / max(len(output), 1):.3f}, '
+                  f'coverage {covered:.3f}')
+            if not verify:
+                estimated = output.index[output['Support'] >= args.min_support * len(sequences['ID'].unique())]
+                found = estimated.intersection(exact.index)
+                print(f'    estimated support above min_support: {len(estimated)} patterns, '
+                      f'recall {len(found) / len(exact):.3f}, precision {len(found) / max(len(estimated), 1):.3f}')
+
+
+if __name__ == '__main__':
+    main()
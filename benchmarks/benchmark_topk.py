@@ -0,0 +1,52 @@
+""" Scaling benchmark of sharded TKS and TKE against single node TKS and TKE
+
+Usage:
+    python -m benchmarks.benchmark_topk --k 50 --shards 1 2 4 8
+"""
+
+import argparse
+import time
+
+from benchmarks.datasets import load_events, load_sequences
+from spmf.episode import TKE
+from spmf.seq_pat import TKS
+from spmf.topk import ShardedTKE, ShardedTKS
+
+
+def timed(algorithm, input_df) -> tuple:
+    """ Run an algorithm and measure its wall time """
+    start = time.perf_counter()
+    output = algorithm.run_pandas(input_df)
+    return output, time.perf_counter() - start
+
+
+def main() -> None:
+    """ Run the benchmark """
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--k', type=int, default=50)
+    parser.add_argument('--shards', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--sequences', type=int, default=None, help='Number of kosarak25k sequences to load')
+    parser.add_argument('--repeat', type=int, default=2000, help='Number of copies of the EMMA example sequence')
+    parser.add_argument('--memory', type=int, default=4096)
+    args = parser.parse_args()
+
+    sequences = load_sequences('kosarak25k.txt', args.sequences)
+    events = load_events('contextEMMA.txt', args.repeat)
+
+    for name, single, sharded, input_df in [
+        ('TKS', TKS(k=args.k, memory=args.memory),
+         lambda n: ShardedTKS(k=args.k, n_shards=n, memory=args.memory), sequences),
+        ('TKE', TKE(k=args.k, max_window=2, timestamp_present=True, memory=args.memory),
+         lambda n: ShardedTKE(k=args.k, max_window=2, timestamp_present=True, n_shards=n, memory=args.memory), events),
+    ]:
+        expected, elapsed = timed(single, input_df)
+        print(f'{name} single node: {elapsed:.2f}s, k-th support {expected["Support"].min()}')
+
+        for n_shards in args.shards:
+            output, elapsed = timed(sharded(n_shards), input_df)
+            print(f'{name} {n_shards} shards: {elapsed:.2f}s, k-th support {output["Support"].min()}, '
+                  f'{len(output)} patterns')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,216 @@
+""" Calibration of the pre-flight cost estimator
+
+Each algorithm is run on subsets of kosarak (as a sequence database, or as a click stream of events for
+episode mining), on chess and on random data, over a grid of parameters. The statistics of each input, the
+number of patterns, the peak heap printed by SPMF and the wall time of run_pandas are appended to the
+history, and the log-linear models of spmf/estimator.py are fitted to the whole history and saved to
+spmf/estimator_model.json.
+
+Usage:
+    python -m benchmarks.calibrate_estimator
+    python -m benchmarks.calibrate_estimator --datasets chess
+    python -m benchmarks.calibrate_estimator --fit-only
+    python -m benchmarks.calibrate_estimator --fit-only --refresh-features
+"""
+
+import argparse
+import json
+import math
+import os
+import time
+from typing import Dict, Iterator, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.datasets import load_sequences
+from spmf import estimator
+from spmf.base import Spmf
+from spmf.episode import AFEM, EMMA, TKE, MaxFEM
+from spmf.seq_pat import (CMSPADE, SPADE, SPAM, TKS, VGEN, VMSP, ClaSP,
+                          CMClaSP, PrefixSpan)
+
+HISTORY_PATH = os.path.join(os.path.dirname(__file__), 'estimator_history.csv')
+
+SEQUENTIAL_ALGORITHMS = [PrefixSpan, SPADE, CMSPADE, SPAM, ClaSP, CMClaSP, VMSP, VGEN]
+EPISODE_ALGORITHMS = [EMMA, AFEM, MaxFEM]
+UNITS = {'memory': 'mb', 'runtime': 's'}
+
+
+def random_sequences(n_sequences: int, n_items: int, max_length: int, seed: int) -> pd.DataFrame:
+    """ Random sequence database with Zipf distributed items """
+    rng = np.random.default_rng(seed)
+    lengths = rng.integers(1, max_length + 1, n_sequences)
+    sequence = np.repeat(np.arange(n_sequences), lengths)
+    position = np.arange(len(sequence)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    items = np.minimum(rng.zipf(1.3, len(sequence)), n_items)
+    return pd.DataFrame({'ID': sequence, 'Time Points': position // 2, 'Items': items})
+
+
+def dense_sequences(n_sequences: int, n_items: int, length: int, seed: int) -> pd.DataFrame:
+    """ Random sequence database of uniformly distributed items, each itemset holding one item """
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({'ID': np.repeat(np.arange(n_sequences), length),
+                         'Time Points': np.tile(np.arange(length), n_sequences),
+                         'Items': rng.integers(1, n_items + 1, n_sequences * length)})
+
+
+def sequence_databases() -> Iterator[Tuple[str, pd.DataFrame, List[float]]]:
+    """ Sequence databases of the calibration, with their minimum supports """
+    sparse = [0.05, 0.02, 0.01, 0.005]
+    yield 'kosarak10k', load_sequences('kosarak10k.txt'), sparse
+    yield 'kosarak25k', load_sequences('kosarak25k.txt'), sparse
+    yield 'kosarak25k[:5000]', load_sequences('kosarak25k.txt', limit=5000), sparse
+    for n_items, max_length in [(20, 8), (200, 12), (1000, 6)]:
+        yield f'random {n_items} items', random_sequences(5000, n_items, max_length, seed=n_items), sparse
+    yield 'chess', load_sequences('chess.txt'), [0.95, 0.9, 0.85, 0.8]
+    yield 'dense 10 items', dense_sequences(1000, 10, 30, seed=10), [0.7, 0.6, 0.5, 0.3]
+    yield 'dense 40 items', dense_sequences(1000, 40, 20, seed=40), [0.1, 0.07, 0.05]
+
+
+def event_sequences() -> Iterator[Tuple[str, pd.DataFrame]]:
+    """ Event sequences of the calibration: the clicks of kosarak at consecutive time points, and random events """
+    for name, limit in [('kosarak10k', 2000), ('kosarak10k', 5000), ('kosarak25k', 10000)]:
+        sequences = load_sequences(f'{name}.txt', limit=limit)
+        yield f'{name}[:{limit}] events', pd.DataFrame({'Itemset': sequences['Items'].astype(str),
+                                                        'Time points': np.arange(len(sequences))})
+    for n_items in [20, 200]:
+        sequences = random_sequences(2000, n_items, 8, seed=n_items)
+        yield f'random {n_items} items events', pd.DataFrame({'Itemset': sequences['Items'].astype(str),
+                                                              'Time points': np.arange(len(sequences)) // 2})
+
+
+def runs() -> Iterator[Tuple[str, str, Spmf, pd.DataFrame]]:
+    """ Dataset name, family, algorithm and input of each calibration run """
+    for name, df, min_supports in sequence_databases():
+        for min_support in min_supports:
+            for algorithm in SEQUENTIAL_ALGORITHMS:
+                yield name, 'sequential', algorithm(min_support=min_support, memory=4096), df
+        for k in [10, 100, 1000]:
+            yield name, 'sequential', TKS(k=k, memory=4096), df
+
+    for name, df in event_sequences():
+        n_time_points = df['Time points'].nunique()
+        for max_window in [2, 5]:
+            for relative_support in [0.02, 0.01, 0.005]:
+                for algorithm in EPISODE_ALGORITHMS:
+                    yield name, 'episode', algorithm(min_support=math.ceil(relative_support * n_time_points),
+                                                     max_window=max_window, timestamp_present=True, memory=4096), df
+            for k in [10, 100, 1000]:
+                yield name, 'episode', TKE(k=k, max_window=max_window, timestamp_present=True, memory=4096), df
+
+
+def record(name: str, family: str, algorithm: Spmf, df: pd.DataFrame) -> Dict:
+    """ Run an algorithm and record the features of its input, with its cost """
+    k = getattr(algorithm, 'k', None)
+    if family == 'sequential':
+        statistics = estimator.sequence_statistics(df)
+        min_count = 1 if k else math.ceil(algorithm.min_support * statistics.n_sequences)
+    else:
+        statistics = estimator.event_statistics(df)
+        min_count = 1 if k else algorithm.min_support
+
+    start = time.perf_counter()
+    output = algorithm.run_pandas(df)
+    return {
+        'dataset': name,
+        'family': family,
+        'algorithm': type(algorithm).__name__,
+        'min_count': min_count,
+        'max_window': getattr(algorithm, 'max_window', None),
+        'k': k,
+        **estimator.features(statistics, min_count, getattr(algorithm, 'max_window', 1)),
+        'patterns': len(output),
+        'memory_mb': algorithm.run_statistics.get('memory_mb', np.nan),
+        'runtime_s': time.perf_counter() - start,
+    }
+
+
+def refresh_features(history: pd.DataFrame) -> pd.DataFrame:
+    """ Recompute the features of the recorded runs from their datasets, after a change of the features """
+    statistics = {name: estimator.sequence_statistics(df) for name, df, _ in sequence_databases()}
+    statistics.update({name: estimator.event_statistics(df) for name, df in event_sequences()})
+    features = pd.DataFrame([
+        estimator.features(statistics[row['dataset']], row['min_count'],
+                           1 if pd.isna(row['max_window']) else int(row['max_window']))
+        for row in history.to_dict('records')
+    ], index=history.index)
+    runs = history[['dataset', 'family', 'algorithm', 'min_count', 'max_window', 'k']]
+    return pd.concat([runs, features, history[['patterns', 'memory_mb', 'runtime_s']]], axis=1)
+
+
+def fit_models(history: pd.DataFrame) -> Dict[str, Dict]:
+    """ Fit the models of each algorithm, and of each family on all its algorithms """
+    groups: List[Tuple[str, pd.DataFrame]] = list(history.groupby('algorithm')) + list(history.groupby('family'))
+    models = {}
+    for name, runs_df in groups:
+        rows = runs_df.dropna(subset=['memory_mb']).to_dict('records')
+        costs = np.array([estimator.cost_features(row['patterns'], row) for row in rows])
+        model, errors = {}, {}
+        for target in ['memory', 'runtime']:
+            model[target], errors[target] = fit(costs, np.array([row[f'{target}_{UNITS[target]}'] for row in rows]))
+        rows = [row for row in rows if pd.isna(row['k']) and row['n_frequent'] > 0]
+        if rows:
+            features = np.array([estimator.pattern_features(row) for row in rows])
+            model['patterns'], errors['patterns'] = fit(features, np.array([row['patterns'] + 1 for row in rows]))
+        model['errors'] = errors
+        models[name] = model
+    return models
+
+
+def cross_validate(history: pd.DataFrame) -> None:
+    """ Print the median multiplicative error of the predictions on each dataset, with models fitted without it """
+    for name, held_out in history.groupby('dataset'):
+        models = fit_models(history[history['dataset'] != name])
+        errors = {'patterns': [], 'memory': [], 'runtime': []}
+        for row in held_out.dropna(subset=['memory_mb']).to_dict('records'):
+            model = models.get(row['algorithm'], models[row['family']])
+            n_patterns = row['patterns']
+            if pd.isna(row['k']) and row['n_frequent'] > 0:
+                predicted = math.exp(np.dot(model['patterns'], estimator.pattern_features(row)))
+                errors['patterns'].append(abs(math.log(predicted / (n_patterns + 1))))
+            for target in ['memory', 'runtime']:
+                predicted = math.exp(np.dot(model[target], estimator.cost_features(n_patterns, row)))
+                errors[target].append(abs(math.log(predicted / row[f'{target}_{UNITS[target]}'])))
+        print(f'{name} held out:', {target: f'x{math.exp(np.median(values)):.2f}'
+                                    for target, values in errors.items() if values})
+
+
+def fit(features: np.ndarray, targets: np.ndarray) -> Tuple[List[float], float]:
+    """ Fit a log-linear model, rounded for the model file """
+    coefficients, error = estimator.fit(features, targets)
+    return [round(coefficient, 6) for coefficient in coefficients], round(error, 6)
+
+
+def main() -> None:
+    """ Run the calibration """
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--fit-only', action='store_true', help='Fit the models to the history without new runs')
+    parser.add_argument('--refresh-features', action='store_true', help='Recompute the features of the history')
+    parser.add_argument('--datasets', nargs='+', help='Run only on these datasets, to extend the history')
+    args = parser.parse_args()
+
+    history = pd.read_csv(HISTORY_PATH) if os.path.exists(HISTORY_PATH) else pd.DataFrame()
+    if args.refresh_features:
+        history = refresh_features(history)
+        history.to_csv(HISTORY_PATH, index=False)
+    if not args.fit_only:
+        records = []
+        for name, family, algorithm, df in runs():
+            if args.datasets and name not in args.datasets:
+                continue
+            records.append(record(name, family, algorithm, df))
+            print(records[-1])
+        history = pd.concat([history, pd.DataFrame(records)], ignore_index=True)
+        history.to_csv(HISTORY_PATH, index=False)
+
+    models = fit_models(history)
+    with open(estimator.MODEL_PATH, 'w') as fp:
+        json.dump(models, fp, indent=1, sort_keys=True)
+    for name, model in models.items():
+        print(name, {target: f'x{math.exp(error):.2f}' for target, error in model['errors'].items()})
+    cross_validate(history)
+
+
+if __name__ == '__main__':
+    main()
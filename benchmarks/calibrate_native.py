@@ -0,0 +1,112 @@
+""" Calibration of the input size up to which PrefixSpan(engine='auto') runs the native engine
+
+PrefixSpan is run on the JVM and on the native engine, on prefixes of increasing size of kosarak25k repeated
+4 times, at several minimum supports. The size of the SPMF input file and the best wall time of run_file with
+each engine are appended to the history. For each minimum support, the break-even size is interpolated on a log
+scale between the largest input where the native engine is faster and the next one. NATIVE_MAX_INPUT_BYTES of
+spmf/seq_pat.py is the smallest break-even size rounded down to two significant digits, so that 'auto' does not
+pick the slower engine on the calibrated supports.
+
+Usage:
+    python -m benchmarks.calibrate_native
+    python -m benchmarks.calibrate_native --fit-only
+"""
+
+import argparse
+import math
+import os
+import tempfile
+import time
+from typing import Dict, List
+
+import pandas as pd
+
+from benchmarks.datasets import load_sequences
+from spmf.seq_pat import NATIVE_MAX_INPUT_BYTES, PrefixSpan
+
+HISTORY_PATH = os.path.join(os.path.dirname(__file__), 'native_history.csv')
+
+N_SEQUENCES = [500, 1000, 2000, 4000, 8000, 12000, 16000, 25000, 35000, 50000, 75000, 100000]
+MIN_SUPPORTS = [0.02, 0.01, 0.005]
+REPEATS = 3
+
+
+def record(df: pd.DataFrame, n_sequences: int, min_support: float) -> List[Dict]:
+    """ Run both engines on the input file of the first n_sequences, and record their best wall time """
+    with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False) as fp:
+        fp.write(PrefixSpan(min_support=min_support)._parse_input_dataframe(df[df['ID'] < n_sequences]))
+    try:
+        records = []
+        for engine in ['jvm', 'native']:
+            wall_times = []
+            for _ in range(REPEATS):
+                algorithm = PrefixSpan(min_support=min_support, engine=engine)
+                start = time.perf_counter()
+                patterns = algorithm.run_file(fp.name)[0]
+                wall_times.append(time.perf_counter() - start)
+            records.append({
+                'n_sequences': n_sequences,
+                'input_bytes': os.path.getsize(fp.name),
+                'min_support': min_support,
+                'engine': engine,
+                'patterns': len(patterns),
+                'wall_time_s': min(wall_times),
+            })
+        return records
+    finally:
+        os.unlink(fp.name)
+
+
+def break_even(history: pd.DataFrame) -> pd.Series:
+    """ Input size in bytes where both engines take the same time, for each minimum support """
+    sizes = {}
+    for min_support, runs in history.groupby('min_support'):
+        times = runs.pivot_table(index='input_bytes', columns='engine', values='wall_time_s', aggfunc='min')
+        ratio = (times['native'] / times['jvm']).sort_index()
+        # Small prefixes with many patterns may be slower on the native engine, so the break-even size is where
+        # the native engine becomes slower on every larger input
+        faster = ratio.index[ratio.to_numpy() < 1]
+        if not len(faster):
+            sizes[min_support] = 0
+            continue
+        below = faster[-1]
+        above = ratio.index[ratio.index > below]
+        if not len(above):
+            sizes[min_support] = math.inf
+            continue
+        # Interpolate log(ratio) = 0 between the last size where native is faster and the next one
+        above = above[0]
+        weight = -math.log(ratio[below]) / (math.log(ratio[above]) - math.log(ratio[below]))
+        sizes[min_support] = math.exp(math.log(below) + weight * (math.log(above) - math.log(below)))
+    return pd.Series(sizes, name='break_even_bytes')
+
+
+def main() -> None:
+    """ Run the calibration """
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--fit-only', action='store_true', help='Compute the break-even sizes from the history')
+    args = parser.parse_args()
+
+    history = pd.read_csv(HISTORY_PATH) if os.path.exists(HISTORY_PATH) else pd.DataFrame()
+    if not args.fit_only:
+        df = load_sequences('kosarak25k.txt')
+        df = pd.concat([df.assign(ID=df['ID'] + i * (df['ID'].max() + 1)) for i in range(4)], ignore_index=True)
+        records = []
+        for min_support in MIN_SUPPORTS:
+            for n_sequences in N_SEQUENCES:
+                records += record(df, n_sequences, min_support)
+                print(pd.DataFrame(records[-2:]).to_string(header=False, index=False))
+        history = pd.concat([history, pd.DataFrame(records)], ignore_index=True)
+        history.to_csv(HISTORY_PATH, index=False)
+
+    sizes = break_even(history)
+    print(sizes.to_string())
+    threshold = float(sizes.min())
+    if math.isfinite(threshold) and threshold > 0:
+        scale = 10 ** (math.floor(math.log10(threshold)) - 1)
+        print(f'Smallest break-even size: {threshold:,.0f} bytes, NATIVE_MAX_INPUT_BYTES = '
+              f'{math.floor(threshold / scale) * scale:,} (currently {NATIVE_MAX_INPUT_BYTES:,})')
+
+
+if __name__ == '__main__':
+    main()
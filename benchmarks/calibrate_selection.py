@@ -0,0 +1,148 @@
+""" Calibration of the decision table of FrequentSequentialPatterns
+
+PrefixSpan, SPADE, CMSPADE and SPAM are run on sequence databases of various densities, itemset sizes and
+sequence lengths: subsets of kosarak, chess, and random data. The mining time printed by SPMF is appended to
+the history for each run, and the decision table of spmf/selection.py is built from the whole history and
+saved to spmf/selection_table.json. In each cell, the algorithm with the lowest total mining time over the
+runs of the cell is chosen, so that the long runs, where the choice matters, weigh the most.
+
+Usage:
+    python -m benchmarks.calibrate_selection
+    python -m benchmarks.calibrate_selection --fit-only
+"""
+
+import argparse
+import json
+import os
+import time
+from typing import Dict, Iterator, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.datasets import load_sequences
+from spmf import estimator, selection
+from spmf.seq_pat import CMSPADE, SPADE, SPAM, PrefixSpan
+
+HISTORY_PATH = os.path.join(os.path.dirname(__file__), 'selection_history.csv')
+
+ALGORITHMS = [PrefixSpan, SPADE, CMSPADE, SPAM]
+EDGES = {'density': [0.01, 0.2], 'itemset_size': [1.5], 'mean_length': [15]}
+
+
+def random_sequences(n_sequences: int, n_items: int, length: int, itemset_size: int, exponent: float = 0,
+                     seed: int = 0) -> pd.DataFrame:
+    """ Random sequence database of sequences of length itemsets, where the probability of the item of rank r
+        is proportional to r ** -exponent
+    """
+    rng = np.random.default_rng(seed)
+    n_rows = n_sequences * length * itemset_size
+    weights = np.arange(1, n_items + 1) ** -float(exponent)
+    items = rng.choice(n_items, n_rows, p=weights / weights.sum()) + 1
+    return pd.DataFrame({
+        'ID': np.repeat(np.arange(n_sequences), length * itemset_size),
+        'Time Points': np.tile(np.arange(length * itemset_size) // itemset_size, n_sequences),
+        'Items': items,
+    }).drop_duplicates()
+
+
+def databases() -> Iterator[Tuple[str, pd.DataFrame, List[float]]]:
+    """ Name, input and minimum supports of each database of the calibration """
+    yield 'kosarak10k', load_sequences('kosarak10k.txt'), [0.01, 0.005]
+    yield 'kosarak25k[:5000]', load_sequences('kosarak25k.txt', limit=5000), [0.01, 0.004]
+    yield 'chess', load_sequences('chess.txt'), [0.9, 0.8]
+    random_databases = [
+        # n_sequences, n_items, length, itemset_size, exponent, minimum supports
+        (5000, 1000, 6, 1, 0.5, [0.01, 0.005]),
+        (3000, 5000, 40, 1, 1.0, [0.3, 0.2]),
+        (5000, 3000, 8, 3, 1.0, [0.05, 0.02]),
+        (3000, 5000, 20, 3, 1.0, [0.6, 0.5]),
+        (3000, 500, 10, 1, 1.0, [0.01, 0.005]),
+        (2000, 2000, 30, 1, 0.5, [0.02, 0.01]),
+        (2000, 1000, 40, 1, 1.0, [0.3, 0.2]),
+        (3000, 300, 10, 3, 1.0, [0.3, 0.2]),
+        (2000, 3000, 20, 3, 0.5, [0.05, 0.02]),
+        (2000, 600, 20, 3, 0.5, [0.1, 0.05]),
+        (2000, 20, 10, 1, 0, [0.1, 0.05]),
+        (2000, 50, 8, 3, 0, [0.05, 0.03]),
+        (1000, 10, 30, 1, 0, [0.5, 0.3]),
+        (1000, 30, 20, 3, 0, [0.3, 0.2]),
+        (2000, 100, 40, 1, 0, [0.05, 0.03]),
+    ]
+    for n_sequences, n_items, length, itemset_size, exponent, min_supports in random_databases:
+        name = f'random {n_items} items, {length} itemsets of {itemset_size}, exponent {exponent}'
+        yield name, random_sequences(n_sequences, n_items, length, itemset_size, exponent), min_supports
+
+
+def record(name: str, df: pd.DataFrame, min_support: float) -> List[Dict]:
+    """ Run each algorithm and record the features of the input, with the mining time """
+    features = selection.selection_features(estimator.sequence_statistics(df))
+    records = []
+    for algorithm_class in ALGORITHMS:
+        algorithm = algorithm_class(min_support=min_support, memory=4096)
+        start = time.perf_counter()
+        output = algorithm.run_pandas(df)
+        wall_time = time.perf_counter() - start
+        records.append({
+            'dataset': name,
+            'min_support': min_support,
+            **features,
+            'algorithm': algorithm_class.__name__,
+            'patterns': len(output),
+            'runtime_s': algorithm.run_statistics.get('runtime_ms', wall_time * 1e3) / 1e3,
+            'wall_time_s': wall_time,
+        })
+    return records
+
+
+def build_table(history: pd.DataFrame) -> Dict:
+    """ Build the decision table from the history of the calibration runs """
+    history = history.assign(cell=[selection.cell_of(row, EDGES) for row in history.to_dict('records')])
+
+    cells = {}
+    for cell, runs in history.groupby('cell'):
+        runtimes = runs.groupby('algorithm')['runtime_s'].sum().sort_values()
+        ratios = runtimes / runtimes.iloc[0]
+        cells[cell] = {
+            'algorithm': ratios.index[0],
+            'runs': int(runs.groupby(['dataset', 'min_support']).ngroups),
+            'relative_runtime': {algorithm: round(float(ratio), 3) for algorithm, ratio in ratios.items()},
+            'datasets': ', '.join(runs['dataset'].unique()),
+        }
+
+    # Cells without runs take the runtimes of the nearest calibrated cell, the one with most runs on ties
+    shape = [len(bounds) + 1 for bounds in EDGES.values()]
+    for index in np.ndindex(*shape):
+        key = ','.join(map(str, index))
+        if key not in cells:
+            nearest = min((cell for cell in cells if cells[cell]['runs']), key=lambda cell: (
+                sum(abs(int(a) - b) for a, b in zip(cell.split(','), index)), -cells[cell]['runs']))
+            cells[key] = {**cells[nearest], 'runs': 0}
+    return {'edges': EDGES, 'cells': dict(sorted(cells.items()))}
+
+
+def main() -> None:
+    """ Run the calibration """
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--fit-only', action='store_true', help='Build the table from the history without new runs')
+    args = parser.parse_args()
+
+    history = pd.read_csv(HISTORY_PATH) if os.path.exists(HISTORY_PATH) else pd.DataFrame()
+    if not args.fit_only:
+        records = []
+        for name, df, min_supports in databases():
+            for min_support in min_supports:
+                records += record(name, df, min_support)
+                print(pd.DataFrame(records[-len(ALGORITHMS):]).to_string(header=False, index=False))
+        history = pd.concat([history, pd.DataFrame(records)], ignore_index=True)
+        history.to_csv(HISTORY_PATH, index=False)
+
+    table = build_table(history)
+    with open(selection.TABLE_PATH, 'w') as fp:
+        json.dump(table, fp, indent=1)
+    for cell, choice in table['cells'].items():
+        print(cell, choice)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+""" Datasets for the benchmarks, loaded from the SPMF test files """
+
+import os
+from typing import Text
+
+import pandas as pd
+
+TEST_FILES = os.path.join(os.path.dirname(__file__), '..', 'tests', 'test_files')
+
+
+def load_sequences(name: Text, limit: int = None) -> pd.DataFrame:
+    """ Load a sequence database as a Sequential Pattern Mining input dataframe.
+        Lines in SPMF sequence format ('1 2 -1 3 -1 -2') keep their itemsets, other lines
+        (such as kosarak click streams) become sequences of single items.
+
+    :param name: Name of the file in tests/test_files
+    :param limit: Maximum number of sequences to load. Default = all
+    :return: Dataframe with 'ID', 'Time Points' and 'Items' columns
+    """
+    rows = []
+    with open(os.path.join(TEST_FILES, name), 'r') as fp:
+        for sequence_id, line in enumerate(fp):
+            if limit is not None and sequence_id >= limit:
+                break
+            itemsets = line.split('-1')[:-1] if '-1' in line else line.split()
+            for time, itemset in enumerate(itemsets):
+                rows += [(sequence_id, time, int(item)) for item in itemset.split()]
+
+    return pd.DataFrame(rows, columns=['ID', 'Time Points', 'Items'])
+
+
+def load_events(name: Text = 'contextEMMA.txt', repeat: int = 1) -> pd.DataFrame:
+    """ Load an event sequence as an Episode Mining input dataframe
+
+    :param name: Name of the file in tests/test_files, in SPMF episode format ('1 2|3')
+    :param repeat: Number of times the sequence is repeated, shifted in time, to make it longer
+    :return: Dataframe with 'Itemset' and 'Time points' columns, one item per row
+    """
+    with open(os.path.join(TEST_FILES, name), 'r') as fp:
+        events = [line.strip().split('|') for line in fp if line.strip()]
+
+    span = max(int(time) for _, time in events) + 1
+    rows = [
+        (item, int(time) + span * i) for i in range(repeat) for itemset, time in events for item in itemset.split()
+    ]
+    return pd.DataFrame(rows, columns=['Itemset', 'Time points'])
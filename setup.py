@@ -13,8 +13,10 @@ setup(
     long_description=LONG_DESC,
     url='https://github.com/AakashVasudevan/Py-SPMF',
     include_package_data=True,
-    packages=find_packages() + ['spmf/binaries'],
-    install_requires=['pandas>=1.4.3', 'install-jdk<=1.1.0'],
+    packages=find_packages(exclude=['benchmarks']) + ['spmf/binaries'],
+    install_requires=['numpy', 'pandas>=1.4.3', 'install-jdk<=1.1.0'],
+    extras_require={'arrow': ['pyarrow'], 'parquet': ['pyarrow'], 'polars': ['polars', 'pyarrow'],
+                    'zstd': ['zstandard']},
     classifiers=[
         'Programming Language :: Python :: 3',
         'License :: OSI Approved :: GNU General Public License v3 (GPLv3)',
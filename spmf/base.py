@@ -4,38 +4,73 @@ http://www.philippe-fournier-viger.com/spmf
 
 """
 
+import contextlib
+import copy
+import functools
 import os
+import re
 import shutil
 import subprocess
 import tempfile
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Any, List, Text
+from typing import IO, Any, Callable, Dict, Iterable, List, Text
 
 import jdk
 import pandas as pd
 
+from spmf import compression, ingest
+
+# Number of lines of an input dataframe encoded and written to the SPMF input file at once
+CHUNK_LINES = 65536
+
+# Number of characters of an input text encoded and written to the SPMF input file at once
+CHUNK_SIZE = 1 << 20
+
 
 class Spmf(ABC):
     """ Abstract Base Class for SPMF Wrapper """
 
-    def __init__(self, transform: bool = True, memory: int = 1024, executable_path: Text = 'binaries/spmf.jar') -> None:
+    # Whether items less frequent than the minimum support can be dropped from the input
+    PREFILTER = False
+
+    # Names of the columns of the output, in the order of the results parsed from the output file
+    OUTPUT_COLUMNS = ('Pattern', 'Support')
+
+    # Parameters changing the encoding of an input dataframe by _parse_input_dataframe, for Pipeline caching
+    ENCODING_ATTRIBUTES = ('transform',)
+
+    def __init__(self, transform: bool = True, memory: int = 1024, executable_path: Text = 'binaries/spmf.jar',
+                 prefilter: bool = True) -> None:
         """ Initialize Object
 
         :param transform: Set to true if the input dataframe is not transformed to the format required by SPMF. Default = True.
         :param memory: Maximum memory allocated to the SPMF process. Increase for larger datasets. Default = 1 GB
         :param executable_path: Complete or relative path to spmf.jar file. Default = './binaries/spmf.jar'
+        :param prefilter: Drop the items which cannot be in a frequent pattern from input dataframes, for the algorithms
+            with a minimum support. Results are unchanged. Default = True
         """
         self.executable_path = Path(__file__).parent / executable_path
         self.transform = transform
         self.output_file_name = 'output.txt'
         self.memory = memory
+        self.prefilter = prefilter
 
     @abstractmethod
     def _parse_input_dataframe(self, input_df: pd.DataFrame) -> Text:
         """ Convert Pandas Dataframe to input string """
         pass
 
+    def _write_input_dataframe(self, input_df: pd.DataFrame, fp: IO) -> None:
+        """ Write Pandas Dataframe to the SPMF input file, in the format of _parse_input_dataframe.
+            Families of algorithms override it to write the input by chunks instead of one string
+
+        :param input_df: Input Dataframe
+        :param fp: Text file object of the SPMF input
+        """
+        fp.write(self._parse_input_dataframe(input_df))
+
     @abstractmethod
     def _parse_output_file(self, **kwargs) -> Any:
         """ Parse output txt file created by SPMF algorithm """
@@ -62,15 +97,121 @@ class Spmf(ABC):
         self._delete_temp_file(input_file)
         return self._create_output_dataframe(*self._parse_output_file(delete=True))
 
-    def run_file(self, input_file_name: Text) -> Any:
-        """ Run SPMF algorithm on an input txt file
+    def _run_encoded(self, input: Text, mapping: Dict[Text, Text]) -> pd.DataFrame:
+        """ Run SPMF algorithm on an input already encoded in the SPMF format
 
-        :param input_file_name: Input txt file name
+        :param input: Input text in the SPMF format of the algorithm
+        :param mapping: Original value of each item code in the input
+        :return: Output Dataframe
+        """
+        # The mapping is set before the run, since the arguments of some algorithms are encoded with it
+        self.mapping = mapping
+        input_file = self._create_temp_file(input=input)
+        self.run(input_file.name)
+        self._delete_temp_file(input_file)
+        return self._filter_output(self._create_output_dataframe(*self._parse_output_file(delete=True)))
+
+    def _filter_output(self, output: pd.DataFrame) -> pd.DataFrame:
+        """ Filter the output dataframe of a run on an encoded input, as run_pandas does
+
+        :param output: Output Dataframe
+        :return: Filtered output Dataframe
+        """
+        return output
+
+    def _run_batches(self, batches: Callable[[], Iterable[Any]], n_rows: int = None) -> Any:
+        """ Run SPMF algorithm on an input read by batches, written to the SPMF input file as they are encoded
+
+        :param batches: Function returning an iterable of the ingest.Batch of the input, read again on each call
+        :param n_rows (optional): Number of input rows. Default = None
         :return: Results of the SPMF algorithm parsed from output file
         """
-        self.run(input_file_name)
+        self._check_batches()
+        if n_rows == 0:
+            self.mapping = dict()
+            return tuple([] for _ in self.OUTPUT_COLUMNS)
+
+        fp = tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False)
+        try:
+            with fp:
+                self._write_batches(batches, fp, n_rows)
+            self.run(fp.name)
+        finally:
+            os.unlink(fp.name)
         return self._parse_output_file(delete=True)
 
+    def _check_batches(self) -> None:
+        """ Check that the parameters of the algorithm are supported for inputs read by batches """
+
+    def _write_batches(self, batches: Callable[[], Iterable[Any]], fp: IO, n_rows: int = None) -> None:
+        """ Write an input read by batches to the SPMF input file """
+        raise NotImplementedError(f'{type(self).__name__} does not support inputs read by batches')
+
+    def _input_columns(self) -> List[Text]:
+        """ Default names of the columns of inputs read by batches """
+        raise NotImplementedError(f'{type(self).__name__} does not support inputs read by batches')
+
+    def run_arrow(self, table: Any, columns: List[Text] = None, batch_size: int = 65536) -> Any:
+        """ Run SPMF algorithm on an Arrow table, without creating any Pandas object. Requires pyarrow.
+            Items are dictionary encoded by Arrow, and rows are encoded and written by batches as in run_parquet
+
+        :param table: Arrow table, with the columns of run_pandas
+        :param columns (optional): Names of the input columns, as in run_parquet. Default = names of run_pandas
+        :param batch_size (optional): Maximum number of rows encoded at once. Default = 65536
+        :return: Output Arrow table, with the columns of run_pandas
+        """
+        batches, n_rows = ingest.read_arrow(table, columns or self._input_columns(), batch_size)
+        return self._create_output_table(*self._run_batches(batches, n_rows))
+
+    def run_polars(self, input_df: Any, columns: List[Text] = None, batch_size: int = 65536) -> Any:
+        """ Run SPMF algorithm on a Polars DataFrame, through its Arrow buffers. Requires polars and pyarrow.
+            Categorical columns are read as Arrow dictionary arrays, so their items are not encoded again
+
+        :param input_df: Polars DataFrame, with the columns of run_pandas
+        :param columns (optional): Names of the input columns, as in run_parquet. Default = names of run_pandas
+        :param batch_size (optional): Maximum number of rows encoded at once. Default = 65536
+        :return: Output Polars DataFrame, with the columns of run_pandas
+        """
+        try:
+            import polars as pl
+        except ImportError:
+            raise ImportError('polars is required to run on Polars DataFrames: pip install spmf-wrapper[polars]')
+        return pl.from_arrow(self.run_arrow(input_df.to_arrow(), columns, batch_size))
+
+    def _create_output_table(self, *results: List) -> Any:
+        """ Create Output Arrow Table
+
+        :param results: Patterns, and the corresponding columns of results parsed from the output file
+        :return: Arrow table with the columns of the output dataframe
+        """
+        import pyarrow as pa
+
+        patterns_mapped = [self.map_pattern(pattern, self.mapping) for pattern in results[0]]
+        return pa.table(dict(zip(self.OUTPUT_COLUMNS, [patterns_mapped, *results[1:]])))
+
+    def run_many(self, input_dfs: List[pd.DataFrame], max_workers: int = None) -> List[pd.DataFrame]:
+        """ Run SPMF algorithm on several Pandas Dataframes in parallel
+
+        :param input_dfs: List of input Dataframes
+        :param max_workers: Maximum number of SPMF processes running at the same time. Default = number of CPUs
+        :return: List of output Dataframes, in the same order as the inputs
+        """
+        with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+            return list(executor.map(lambda input_df: self._copy().run_pandas(input_df), input_dfs))
+
+    def run_file(self, input_file_name: Text, archive: Text = None) -> Any:
+        """ Run SPMF algorithm on an input txt file
+
+        :param input_file_name: Input txt file name. Files ending with '.gz' or '.zst' are decompressed to a
+            temporary file for the run
+        :param archive (optional): File name where the SPMF output is copied as it is parsed, compressed if it ends
+            with '.gz' or '.zst'. Default = None
+        :return: Results of the SPMF algorithm parsed from output file
+        """
+        with compression.decompressed(input_file_name) as plain_file_name:
+            self.run(plain_file_name)
+        return self._parse_output_file(delete=True, archive=archive)
+
     def run(self, input_file_name: Text) -> None:
         """ Create subprocess to run SPMF Algorithm on Java VE
 
@@ -86,6 +227,23 @@ class Spmf(ABC):
 
         if 'java.lang.IllegalArgumentException' in process.decode():
             raise TypeError('java.lang.IllegalArgumentException')
+        self.run_statistics = self._parse_statistics(process.decode())
+
+    @staticmethod
+    def _parse_statistics(output: Text) -> Dict[Text, float]:
+        """ Parse the statistics printed by SPMF at the end of a run
+
+        :param output: Standard output of SPMF
+        :return: Dictionary with the peak heap in 'memory_mb' and the mining time in 'runtime_ms', when printed
+        """
+        statistics = {}
+        memory = re.search(r'(?:max memory \(mb\)|maximum memory usage)\s*:\s*([\d.]+)', output, re.IGNORECASE)
+        runtime = re.search(r'total time\D*([\d.]+)\s*ms', output, re.IGNORECASE)
+        if memory:
+            statistics['memory_mb'] = float(memory.group(1))
+        if runtime:
+            statistics['runtime_ms'] = float(runtime.group(1))
+        return statistics
 
     def _convert_dataframe_to_file_object(self, input_df: pd.DataFrame) -> tempfile:
         """ Convert input dataframe to text file object
@@ -93,19 +251,54 @@ class Spmf(ABC):
         :param input_df: Input dataframe
         :return: Text file object of temporary file
         """
-        return self._create_temp_file(
-            input=self._parse_input_dataframe(input_df)
-        )
+        temp_file = tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False, encoding='UTF-8')
+        try:
+            self._write_input_dataframe(input_df, temp_file)
+            temp_file.flush()
+        except BaseException:
+            self._delete_temp_file(temp_file)
+            raise
+        return temp_file
+
+    @staticmethod
+    def map_pattern(pattern: Text, mapping: Dict[Text, Text]) -> Text:
+        """ Re-map each word in pattern to the corresponding value in the mapping dictionary
+
+        :param pattern: Pattern to map
+        :param mapping: Dictionary with words in input pattern as key and corresponding substitution string as values
+        :return: All words in pattern replaced by the corresponding value in mapping
+            NOTE: Original word in pattern is retained if a matching key is not found in mapping
+        """
+        return (' ').join(mapping.get(n, n) for n in re.split(r'\s', pattern))
+
+    def _copy(self) -> 'Spmf':
+        """ Copy the object with its own output file, so that several runs do not overwrite each other
+
+        :return: Copy of the object
+        """
+        algorithm = copy.deepcopy(self)
+        output_file = tempfile.NamedTemporaryFile(suffix='.txt', delete=False)
+        output_file.close()
+        algorithm.output_file_name = output_file.name
+        return algorithm
 
-    def _read_file(self, delete: bool = False) -> List[Text]:
+    def _read_file(self, delete: bool = False, archive: Text = None) -> List[Text]:
         """ Read file into a list
 
         :param delete: Set to True to delete the file after reading. Default = False.
+        :param archive: File name where the lines are copied, compressed if it ends with '.gz' or '.zst'.
+            Default = None
         :return: List containing each line in the file as Text
         """
 
-        with open(self.output_file_name, 'r') as fp:
-            lines = fp.readlines()
+        lines = []
+        with open(self.output_file_name, 'r') as fp, \
+                (compression.open_file(archive, 'wt') if archive else contextlib.nullcontext()) as archive_fp:
+            # The lines are copied to the archive by blocks, as they are read
+            for block in iter(lambda: fp.readlines(compression.BLOCK_SIZE), []):
+                lines += block
+                if archive:
+                    archive_fp.writelines(block)
 
         if delete:
             os.remove(self.output_file_name)
@@ -121,7 +314,8 @@ class Spmf(ABC):
         :return: Temp file object
         """
         temp_file = tempfile.NamedTemporaryFile(suffix=file_extension, delete=False)
-        temp_file.write(bytes(input, 'UTF-8'))
+        for start in range(0, len(input), CHUNK_SIZE):
+            temp_file.write(input[start:start + CHUNK_SIZE].encode('UTF-8'))
         temp_file.flush()
         return temp_file
 
@@ -135,9 +329,11 @@ class Spmf(ABC):
         os.unlink(temp_file.name)
 
     @staticmethod
+    @functools.lru_cache(maxsize=None)
     def _install_java_runtime() -> Text:
         """ Install Jave Runtime Environment and add to path.
-            No action is performed if an existing Java Runtime is detected.
+            No action is performed if an existing Java Runtime is detected. The check runs once per process,
+            as "java -version" starts a Java VM
 
         :return: Output of shell command "java -version"
         """
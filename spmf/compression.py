@@ -0,0 +1,68 @@
+""" Compressed Inputs and Outputs
+
+SPMF inputs and outputs are repetitive text, which gzip and zstd shrink several times. The JVM only reads plain
+files, and the SPMF command line opens its input more than once (a named pipe written once blocks every algorithm),
+so a compressed input is decompressed block by block to a temporary file, removed after the run.
+Outputs are compressed through open_file(path, 'wt'), by blocks of lines as they are read, before they are
+parsed.
+"""
+
+import contextlib
+import gzip
+import os
+import shutil
+import tempfile
+from typing import IO, Iterator, Text
+
+# Extensions of the supported compression formats
+EXTENSIONS = ('.gz', '.zst')
+
+# Size of the blocks copied from a decompressed stream
+BLOCK_SIZE = 1 << 20
+
+
+def is_compressed(path: Text) -> bool:
+    """ Whether a file name has the extension of a supported compression format """
+    return str(path).endswith(EXTENSIONS)
+
+
+def open_file(path: Text, mode: Text = 'rb') -> IO:
+    """ Open a file, compressed or not according to its extension. zstd requires the zstandard package
+
+    :param path: File name, ending with '.gz' or '.zst' for a compressed file
+    :param mode: Mode of open, as in the built-in open. Default = 'rb'
+    :return: File object
+    """
+    path = str(path)
+    if path.endswith('.gz'):
+        return gzip.open(path, mode)
+    if path.endswith('.zst'):
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError('zstandard is required to read and write .zst files: pip install spmf-wrapper[zstd]')
+        return zstandard.open(path, mode)
+    return open(path, mode)
+
+
+@contextlib.contextmanager
+def decompressed(path: Text, directory: Text = None) -> Iterator[Text]:
+    """ Context of a plain file name with the contents of a file, which may be compressed
+
+    :param path: File name
+    :param directory (optional): Directory of the decompressed file, such as a local or in-memory file system
+        rather than shared storage. Default = None, the temporary directory of the system
+    :return: Path of the file if it is not compressed, otherwise of a temporary file which holds its
+        decompressed contents until the end of the context
+    """
+    if not is_compressed(path):
+        yield path
+        return
+
+    with open_file(path, 'rb') as source, \
+            tempfile.NamedTemporaryFile(suffix='.txt', dir=directory, delete=False) as fp:
+        shutil.copyfileobj(source, fp, BLOCK_SIZE)
+    try:
+        yield fp.name
+    finally:
+        os.remove(fp.name)
@@ -0,0 +1,282 @@
+""" Distributed Mining over TCP
+
+Workers run the SPMF algorithms on inputs already encoded by the coordinator and stream the parsed
+results back. Each message is a single line of UTF-8 JSON.
+
+Start a worker with:
+    python -m spmf.distributed --host 0.0.0.0 --port 8765
+"""
+
+import argparse
+import copy
+import json
+import os
+import queue
+import socket
+import socketserver
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Text, Tuple
+
+import pandas as pd
+
+import spmf
+from spmf.base import Spmf
+
+Address = Tuple[Text, int]
+
+# Attributes that only make sense on the machine where they were set, or that are results of a run
+LOCAL_ATTRIBUTES = {'executable_path', 'output_file_name', 'mapping', 'sequence_labels', 'sequence_index',
+                    'run_statistics'}
+
+
+def get_algorithm_state(algorithm: Spmf) -> Dict[Text, Any]:
+    """ Get the parameters of an algorithm object that need to be sent to a worker
+
+    :param algorithm: SPMF algorithm object
+    :return: Dictionary of JSON serializable attributes
+    """
+    return {key: value for key, value in vars(algorithm).items() if key not in LOCAL_ATTRIBUTES}
+
+
+def get_algorithm_class(name: Text) -> type:
+    """ Get an algorithm class from its name
+
+    :param name: Name of an algorithm class exported by the spmf module
+    :return: SPMF algorithm class
+    """
+    cls = getattr(spmf, name, None)
+    if not (isinstance(cls, type) and issubclass(cls, Spmf)):
+        raise ValueError(f'Unknown algorithm {name}')
+    return cls
+
+
+def create_algorithm(name: Text, state: Dict[Text, Any]) -> Spmf:
+    """ Create an algorithm object from its class name and parameters
+
+    :param name: Name of an algorithm class exported by the spmf module
+    :param state: Attributes of the algorithm object, as returned by get_algorithm_state
+    :return: SPMF algorithm object
+    """
+    cls = get_algorithm_class(name)
+    algorithm = cls.__new__(cls)
+    Spmf.__init__(algorithm)
+    algorithm.__dict__.update({key: value for key, value in state.items() if key not in LOCAL_ATTRIBUTES})
+    return algorithm._copy()
+
+
+class _WorkerHandler(socketserver.StreamRequestHandler):
+    """ Handle requests from a coordinator on one connection """
+
+    def handle(self) -> None:
+        """ Answer each request line with a response line """
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                result = self.server.process(request['algorithm'], request['state'], request['input'])
+                response = {'status': 'ok', 'result': list(result)}
+            except Exception as e:
+                response = {'status': 'error', 'message': f'{type(e).__name__}: {e}'}
+
+            self.wfile.write((json.dumps(response) + '\n').encode('UTF-8'))
+            self.wfile.flush()
+
+
+class Worker(socketserver.ThreadingTCPServer):
+    """ Worker process running SPMF algorithms for a Coordinator """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host: Text = '127.0.0.1', port: int = 0) -> None:
+        """ Initialize Object
+
+        :param host: Interface to listen on. Default = '127.0.0.1'
+        :param port: Port to listen on. Default = 0 (any free port)
+        """
+        super().__init__((host, port), _WorkerHandler)
+
+    @property
+    def address(self) -> Address:
+        """ Address the worker is listening on """
+        return self.server_address[:2]
+
+    @staticmethod
+    def process(name: Text, state: Dict[Text, Any], input: Text) -> Tuple:
+        """ Run an algorithm on an encoded input
+
+        :param name: Name of the algorithm class
+        :param state: Attributes of the algorithm object
+        :param input: Input in the text format required by SPMF
+        :return: Results of the SPMF algorithm parsed from output file
+        """
+        algorithm = create_algorithm(name, state)
+        input_file = algorithm._create_temp_file(input=input)
+
+        try:
+            # Patterns and supports only, as run_many does not return the sequence index of show_seq_ids
+            return algorithm.run_file(input_file.name)[:2]
+        finally:
+            algorithm._delete_temp_file(input_file)
+            if os.path.exists(algorithm.output_file_name):
+                os.remove(algorithm.output_file_name)
+
+
+class Coordinator:
+    """ Schedule SPMF jobs on a set of remote Workers """
+
+    def __init__(self, addresses: List[Address], retries: int = 2, timeout: float = None) -> None:
+        """ Initialize Object
+
+        :param addresses: List of (host, port) of the workers
+        :param retries: Number of times a failed job is resubmitted to another worker. Default = 2
+        :param timeout: Timeout in seconds for a single job, doubled on each retry of a job which timed out.
+            A worker is not sent other jobs until it finishes the job which timed out. Default = None (no timeout)
+        """
+        self.addresses = [tuple(address) for address in addresses]
+        self.retries = retries
+        self.timeout = timeout
+
+    def run_many(self, algorithm: Spmf, input_dfs: List[pd.DataFrame]) -> List[pd.DataFrame]:
+        """ Run SPMF algorithm on several Pandas Dataframes on the workers.
+            Equivalent to algorithm.run_many(input_dfs)
+
+        :param algorithm: SPMF algorithm object
+        :param input_dfs: List of input Dataframes
+        :return: List of output Dataframes, in the same order as the inputs
+        """
+        if getattr(algorithm, 'approximate', False):
+            raise ValueError('approximate mining is not supported by distributed mining')
+
+        idle_workers, alive_workers = queue.Queue(), set(self.addresses)
+        lock = threading.Lock()
+        for address in self.addresses:
+            idle_workers.put(address)
+
+        def run_job(input_df: pd.DataFrame) -> pd.DataFrame:
+            job = copy.deepcopy(algorithm)
+            request = {
+                'algorithm': type(job).__name__,
+                'input': job._parse_input_dataframe(input_df),
+                'state': get_algorithm_state(job),
+            }
+            # Workers do not have the mapping of the items, so required items are sent as their codes
+            if getattr(job, 'required_items', None):
+                request['state']['required_items'] = job._encode_required_items()
+            errors, timeout = [], self.timeout
+
+            for _ in range(self.retries + 1):
+                address = self._acquire_worker(idle_workers, alive_workers)
+                try:
+                    connection = socket.create_connection(address, timeout=timeout)
+                except OSError as e:
+                    # Worker is unreachable, stop scheduling jobs on it
+                    errors.append(f'{address}: {e}')
+                    with lock:
+                        alive_workers.discard(address)
+                    continue
+
+                try:
+                    result = self._send(connection, request)
+                except socket.timeout as e:
+                    # Worker is still running the job: it is idle again once it answers or closes the
+                    # connection, and the job is retried with a longer timeout
+                    errors.append(f'{address}: {e}')
+                    threading.Thread(target=self._release_worker, args=(connection, address, idle_workers),
+                                     daemon=True).start()
+                    timeout *= 2
+                    continue
+                except OSError as e:
+                    connection.close()
+                    errors.append(f'{address}: {e}')
+                    with lock:
+                        alive_workers.discard(address)
+                    continue
+                except RuntimeError as e:
+                    connection.close()
+                    errors.append(f'{address}: {e}')
+                    idle_workers.put(address)
+                    continue
+
+                connection.close()
+                idle_workers.put(address)
+                return job._filter_output(job._create_output_dataframe(*result))
+
+            raise RuntimeError(f'Job failed after {self.retries + 1} attempts: {errors}')
+
+        with ThreadPoolExecutor(max_workers=len(self.addresses)) as executor:
+            return list(executor.map(run_job, input_dfs))
+
+    @staticmethod
+    def _acquire_worker(idle_workers: queue.Queue, alive_workers: set) -> Address:
+        """ Wait for an idle worker
+
+        :param idle_workers: Queue of idle worker addresses
+        :param alive_workers: Set of worker addresses that are still reachable
+        :return: Address of an idle worker
+        """
+        while alive_workers:
+            try:
+                address = idle_workers.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if address in alive_workers:
+                return address
+
+        raise RuntimeError('No reachable workers left')
+
+    @staticmethod
+    def _send(connection: socket.socket, request: Dict[Text, Any]) -> List:
+        """ Send a job to a worker and wait for the result
+
+        :param connection: Connection to the worker, with the timeout of the job
+        :param request: Job request
+        :return: Results of the SPMF algorithm parsed from output file
+        """
+        connection.sendall((json.dumps(request) + '\n').encode('UTF-8'))
+        with connection.makefile('rb') as fp:
+            line = fp.readline()
+
+        if not line:
+            raise ConnectionError('Worker closed the connection')
+
+        response = json.loads(line)
+        if response['status'] != 'ok':
+            raise RuntimeError(response['message'])
+
+        return response['result']
+
+    @staticmethod
+    def _release_worker(connection: socket.socket, address: Address, idle_workers: queue.Queue) -> None:
+        """ Wait for the response of a job which timed out, then put its worker back in the idle workers
+
+        :param connection: Connection to the worker, on which the job was sent
+        :param address: Worker address
+        :param idle_workers: Queue of idle worker addresses
+        """
+        with connection:
+            connection.settimeout(None)
+            try:
+                while True:
+                    data = connection.recv(1 << 16)
+                    if not data or data.endswith(b'\n'):
+                        break
+            except OSError:
+                pass
+        idle_workers.put(address)
+
+
+def main() -> None:
+    """ Start a worker from the command line """
+    parser = argparse.ArgumentParser(description='SPMF distributed mining worker')
+    parser.add_argument('--host', default='127.0.0.1', help='Interface to listen on')
+    parser.add_argument('--port', type=int, default=0, help='Port to listen on (0 for any free port)')
+    args = parser.parse_args()
+
+    with Worker(args.host, args.port) as worker:
+        print('{}:{}'.format(*worker.address), flush=True)
+        worker.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,16 +1,23 @@
 """ Episode Mining """
 
+import io
 import re
-from typing import Dict, List, Text, Tuple
+from typing import IO, Any, Callable, Dict, Iterable, List, Text, Tuple
 
 import pandas as pd
 
-from spmf.base import Spmf
+from spmf import estimator, ingest, prefilter
+from spmf.base import CHUNK_LINES, Spmf
 
 
 class Episode(Spmf):
     """ Base class for Episode Mining """
 
+    # The input is prefiltered while it is encoded, so the encoding depends on the minimum support and window
+    ENCODING_ATTRIBUTES = ('transform', 'timestamp_present', 'prefilter', 'min_support', 'max_window')
+
+    OUTPUT_COLUMNS = ('Frequent episode', 'Support')
+
     def _create_subprocess_arguments(self, input_file_name: Text) -> List:
         """ Create arguments list to pass to subprocess """
         raise NotImplementedError('This is abstract class. Please call a concrete implementation.')
@@ -29,11 +36,14 @@ class Episode(Spmf):
             df = df.reset_index(names='Time points')
             self.timestamp_present = True       # override timestamp parameter
 
+        if self.PREFILTER and self.prefilter and self.min_support > 1:
+            df = prefilter.filter_events(df, self.min_support, self.max_window, split_itemsets=not self.transform)
+
         if not self.transform:
             self.mapping = dict()
             return df
 
-        df['Items'] = (input_df.groupby('Itemset').ngroup()+1).astype(str)
+        df['Items'] = (df.groupby('Itemset').ngroup()+1).astype(str)
         self.mapping = df.set_index('Items', drop=True).to_dict()['Itemset']
 
         df = df.groupby('Time points').agg((' ').join).reset_index()
@@ -46,9 +56,21 @@ class Episode(Spmf):
             NOTE: If Timestamp present, dataframe should contain it in 'Time points' column
         :return: Parsed String representation
         """
+        fp = io.StringIO()
+        self._write_input_dataframe(input_df, fp)
+        return fp.getvalue()
+
+    def _write_input_dataframe(self, input_df: pd.DataFrame, fp: IO) -> None:
+        """ Write Input Dataframe to the SPMF input file, CHUNK_LINES itemsets at a time
+
+        :param input_df: Input Dataframe, as in _parse_input_dataframe
+        :param fp: Text file object of the SPMF input
+        """
         df = self._transform_input_dataframe(input_df)
-        df['input'] = df.apply(lambda x: '|'.join([x['Itemset'], str(x['Time points'])]), axis=1)
-        return ('\n').join(df['input'].to_list())
+        for start in range(0, len(df), CHUNK_LINES):
+            chunk = df.iloc[start:start + CHUNK_LINES]
+            lines = chunk['Itemset'] + '|' + chunk['Time points'].astype(str)
+            fp.write(('\n' if start else '') + ('\n').join(lines.to_list()))
 
     def _parse_output_file(self, **kwargs) -> Tuple[List[Text], List[int]]:
         """ Parse output txt file created by the Episode Mining algorithm
@@ -66,17 +88,6 @@ class Episode(Spmf):
 
         return patterns, list(map(int, supports))
 
-    @staticmethod
-    def map_pattern(pattern: Text, mapping: Dict[Text, Text]) -> Text:
-        """ Re-map each word in pattern to the corresponding value in the mapping dictionary
-
-        :param pattern: Pattern to map
-        :param mapping: Dictionary with words in input pattern as key and corresponding substitution string as values
-        :return: All words in pattern replaced by the corresponding value in mapping
-            NOTE: Original word in pattern is retained if a matching key is not found in mapping
-        """
-        return (' ').join(mapping.get(n, n) for n in re.split(r'\s', pattern))
-
     def _create_output_dataframe(self, patterns: List[Text], supports: List[int]) -> pd.DataFrame:
         """ Create Output Dataframe
 
@@ -85,7 +96,7 @@ class Episode(Spmf):
         :return: Dataframe containing patterns and corresponding support
         """
         patterns_mapped = [self.map_pattern(pattern, self.mapping) for pattern in patterns]
-        return pd.DataFrame((patterns_mapped, supports), index=['Frequent episode', 'Support']).T
+        return pd.DataFrame((patterns_mapped, supports), index=list(self.OUTPUT_COLUMNS)).T
 
     def run_pandas(self, input_df: pd.DataFrame) -> pd.DataFrame:
         """ Run Episode Mining algorithm on Pandas Dataframe
@@ -96,18 +107,86 @@ class Episode(Spmf):
         """
         return super().run_pandas(input_df)
 
-    def run_file(self, input_file_name: Text) -> Tuple[List[Text], List[int]]:
+    def run_file(self, input_file_name: Text, archive: Text = None) -> Tuple[List[Text], List[int]]:
         """ Run Episode Mining algorithm on an input txt file
 
-        :param input_file_name: Input txt file name
+        :param input_file_name: Input txt file name, which may be compressed ('.gz' or '.zst')
+        :param archive (optional): File name where the SPMF output is copied, compressed if it ends with '.gz' or
+            '.zst'. Default = None
         :return: Tuple of frequent episode patterns and corresponding support
         """
-        return super().run_file(input_file_name)
+        return super().run_file(input_file_name, archive)
+
+    def run_parquet(self, path: Text, columns: List[Text] = None, batch_size: int = 65536) -> pd.DataFrame:
+        """ Run Episode Mining algorithm on a Parquet file or dataset, read by batches without creating a Pandas
+            Dataframe of the input. Requires pyarrow. Rows should be ordered by time; otherwise they are sorted
+            externally. The input is not prefiltered, which does not change the output
+
+        :param path: Path of a Parquet file, or of a directory of Parquet files with hive partitioning
+        :param columns (optional): Names of the time column, if timestamp_present, and of the item column.
+            Default = ['Time points', 'Itemset']
+        :param batch_size (optional): Maximum number of rows read at once. Default = 65536
+        :return: Dataframe containing the frequent episodes and support.
+        """
+        batches, n_rows = ingest.read_parquet(path, columns or self._input_columns(), batch_size)
+        return self._create_output_dataframe(*self._run_batches(batches, n_rows))
+
+    def run_sql(self, connection: Any, query: Text, time_col: Text = 'Time points', item_col: Text = 'Itemset',
+                params: Any = None, batch_size: int = 65536, order_col: Text = None,
+                quote_char: Text = '"') -> pd.DataFrame:
+        """ Run Episode Mining algorithm on the result of an SQL query, fetched by batches from a cursor ordered by
+            time, without holding the result in memory. The input is not prefiltered
+
+        :param connection: DB-API connection, or function returning a new cursor, such as a named (server-side)
+            cursor of psycopg2
+        :param query: SQL query returning the time column, if timestamp_present, and the item column
+        :param time_col (optional): Name of the time column, ignored if timestamp_present is False.
+            Default = 'Time points'
+        :param item_col (optional): Name of the item column. Default = 'Itemset'
+        :param params (optional): Parameters of the query, in the paramstyle of the connection. Default = None
+        :param batch_size (optional): Number of rows fetched at once. Default = 65536
+        :param order_col (optional): Name of a column of the query ordering the events, such as an event ID.
+            Required if timestamp_present is False, since the time of an event is its row number, and SQL
+            databases return rows in any order. Ignored if timestamp_present. Default = None
+        :param quote_char (optional): Character quoting the column names in the SQL wrapping the query, such as
+            '`' for MySQL and MariaDB. Default = '"'
+        :return: Dataframe containing the frequent episodes and support.
+        """
+        if self.timestamp_present:
+            columns, order_by = [time_col, item_col], [time_col]
+        elif order_col is None:
+            raise ValueError('order_col is required by run_sql if timestamp_present is False')
+        else:
+            columns, order_by = [item_col], [order_col]
+        batches, n_rows = ingest.read_sql(connection, query, columns, batch_size, params, order_by, quote_char)
+        return self._create_output_dataframe(*self._run_batches(batches, n_rows))
+
+    def _input_columns(self) -> List[Text]:
+        """ Default names of the time (if timestamp_present) and item columns of inputs read by batches """
+        return ['Time points', 'Itemset'] if self.timestamp_present else ['Itemset']
+
+    def _write_batches(self, batches: Callable[[], Iterable[ingest.Batch]], fp: IO, n_rows: int = None) -> None:
+        """ Write an input read by batches to the SPMF input file, with the mapping of the items """
+        self.mapping = ingest.write_events(batches, fp, self.transform, n_rows).mapping
+        self.timestamp_present = True       # row numbers are written as timestamps, as in run_pandas
+
+    def estimate(self, input_df: pd.DataFrame) -> estimator.Estimate:
+        """ Predict the number of episodes, peak heap and runtime of run_pandas, without running SPMF
+
+        :param input_df: Input Dataframe containing Itemsets in 'Itemset' column
+            NOTE: If Timestamp present, dataframe should contain it in 'Time points' column
+        :return: Estimate, with the statistics of the input dataframe
+        """
+        statistics = estimator.event_statistics(input_df, self.timestamp_present, split_itemsets=not self.transform)
+        return estimator.predict(type(self).__name__, statistics, getattr(self, 'min_support', 1),
+                                 getattr(self, 'max_window', 1), k=getattr(self, 'k', None))
 
 
 class EpisodeRules(Episode):
     """ Base class for Episode Rule Mining """
 
+    OUTPUT_COLUMNS = ('Frequent episode', 'Support', 'Confidence')
+
     @staticmethod
     def map_pattern(pattern: Text, mapping: Dict[Text, Text]) -> Text:
         """ Re-map each word in pattern to the corresponding value in the mapping dictionary
@@ -145,7 +224,7 @@ class EpisodeRules(Episode):
         :return: Dataframe containing patterns and corresponding support and confidence
         """
         patterns_mapped = [self.map_pattern(pattern, self.mapping) for pattern in patterns]
-        return pd.DataFrame((patterns_mapped, supports, confidence), index=['Frequent episode', 'Support', 'Confidence']).T
+        return pd.DataFrame((patterns_mapped, supports, confidence), index=list(self.OUTPUT_COLUMNS)).T
 
     def run_pandas(self, input_df: pd.DataFrame) -> pd.DataFrame:
         """ Run Episode Mining algorithm on Pandas Dataframe
@@ -156,13 +235,15 @@ class EpisodeRules(Episode):
         """
         return super().run_pandas(input_df)
 
-    def run_file(self, input_file_name: Text) -> Tuple[List[Text], List[int], List[float]]:
+    def run_file(self, input_file_name: Text, archive: Text = None) -> Tuple[List[Text], List[int], List[float]]:
         """ Run Episode Mining algorithm on an input txt file
 
-        :param input_file_name: Input txt file name
+        :param input_file_name: Input txt file name, which may be compressed ('.gz' or '.zst')
+        :param archive (optional): File name where the SPMF output is copied, compressed if it ends with '.gz' or
+            '.zst'. Default = None
         :return: Tuple of frequent episode patterns and corresponding support and confidence
         """
-        return super().run_file(input_file_name)
+        return super().run_file(input_file_name, archive)
 
 
 class TKE(Episode):
@@ -251,6 +332,8 @@ class TKERules(EpisodeRules):
 class EMMA(Episode):
     """ Mining Frequent Episodes In A Complex Event Sequence Using The EMMA Algorithm """
 
+    PREFILTER = True
+
     def __init__(self, min_support: int, max_window: int, timestamp_present: bool = False, **kwargs) -> None:
         """ Initialize Object. Refer to https://www.philippe-fournier-viger.com/spmf/EMMA.php
 
@@ -329,6 +412,8 @@ class EMMARules(EpisodeRules):
 class AFEM(Episode):
     """ Mining Frequent Episodes In A Complex Event Sequence Using The AFEM Algorithm """
 
+    PREFILTER = True
+
     def __init__(self, min_support: int, max_window: int, timestamp_present: bool = False, **kwargs) -> None:
         """ Initialize Object. Refer to https://www.philippe-fournier-viger.com/spmf/AFEM_temporal.php
 
@@ -366,6 +451,8 @@ class AFEM(Episode):
 class MaxFEM(Episode):
     """ Mining Maximal Frequent Episodes In A Complex Event Sequence Using The MaxFEM Algorithm """
 
+    PREFILTER = True
+
     def __init__(self, min_support: int, max_window: int, timestamp_present: bool = False, **kwargs) -> None:
         """ Initialize Object. Refer to https://www.philippe-fournier-viger.com/spmf/MAXFEM_MAXIMAL_EPISODE_MINING.php
 
@@ -0,0 +1,315 @@
+""" Pre-flight Cost Estimation of Mining Runs
+
+Statistics of an input dataframe are computed in one vectorized pass, and the number of patterns, peak heap
+and runtime of a run are predicted before starting SPMF. The predictions are log-linear models fitted to the
+runs of benchmarks/calibrate_estimator.py, one per calibrated algorithm, stored in estimator_model.json:
+    log(1 + patterns) ~ log(1 + frequent items) + log(1 + frequent patterns if each item only depended on
+                        the previous one) + log(1 + frequent item occurrences per sequence or window)
+    log(runtime), log(memory) ~ log(1 + patterns) + log(1 + frequent item occurrences)
+The number of frequent items is exact, since it is read from the item support histogram. The supports of
+longer patterns are chained from the exact supports of the ordered pairs of the most frequent items in
+sequence databases, or from the item supports in event sequences, and counted on a histogram of their
+log-supports.
+"""
+
+import json
+import math
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Text, Tuple
+
+import numpy as np
+import pandas as pd
+
+MODEL_PATH = Path(__file__).parent / 'estimator_model.json'
+
+# Algorithms returning every frequent pattern, so at least every frequent item
+FREQUENT_ALGORITHMS = {'PrefixSpan', 'SPADE', 'CMSPADE', 'SPAM', 'EMMA', 'AFEM'}
+
+# Number of most frequent items whose ordered pairs are counted exactly, to chain the supports of longer patterns
+MAX_CHAIN_ITEMS = 64
+
+# Number of pairs of items of the sequences enumerated at once to count the pair supports
+MAX_PAIRS = 1 << 22
+
+
+class SequenceStatistics(NamedTuple):
+    """ Statistics of a sequence database """
+
+    n_sequences: int
+    n_itemsets: int
+    n_occurrences: int              # item occurrences, an item being counted once per itemset
+    alphabet_size: int
+    mean_length: float              # mean number of itemsets per sequence
+    length_quantiles: np.ndarray    # 50%, 90%, 99% and 100% quantiles of the number of itemsets per sequence
+    density: float                  # mean fraction of the alphabet in a sequence
+    item_supports: np.ndarray       # number of sequences containing each item, sorted in descending order
+    item_occurrences: np.ndarray    # number of occurrences of each item, in the same order
+    pair_supports: np.ndarray       # number of sequences where an item is followed by another, for the first items
+
+    def frequent_items(self, min_count: int) -> Tuple[int, int]:
+        """ Number of items with a support of at least min_count, and their number of occurrences """
+        n_frequent = int(np.count_nonzero(self.item_supports >= min_count))
+        return n_frequent, int(self.item_occurrences[:n_frequent].sum())
+
+
+class EventStatistics(NamedTuple):
+    """ Statistics of an event sequence """
+
+    n_time_points: int
+    span: float                     # time between the first and last time points, plus one
+    n_events: int
+    alphabet_size: int
+    event_rate: float               # events per time unit
+    item_supports: np.ndarray       # number of time points containing each item, sorted in descending order
+    item_occurrences: np.ndarray    # number of occurrences of each item, in the same order
+
+    def frequent_items(self, min_count: int) -> Tuple[int, int]:
+        """ Number of items with a support of at least min_count, and their number of occurrences """
+        n_frequent = int(np.count_nonzero(self.item_supports >= min_count))
+        return n_frequent, int(self.item_occurrences[:n_frequent].sum())
+
+
+class Estimate(NamedTuple):
+    """ Predicted cost of a run """
+
+    n_patterns: int
+    memory_mb: float
+    runtime_s: float
+    statistics: Any
+    error_factors: Dict[Text, float]    # typical multiplicative error of each prediction on the calibration runs
+
+
+def _item_histogram(items: pd.Series, units: pd.Series) -> Tuple[pd.Series, np.ndarray]:
+    """ Number of units (sequences or time points) containing each item, in descending order, and number of
+        occurrences of each item in the same order
+    """
+    occurrences = items.value_counts()
+    supports = pd.Series(units.to_numpy(), index=items.to_numpy()).groupby(level=0).nunique()
+    supports = supports.sort_values(ascending=False, kind='stable')
+    return supports, occurrences[supports.index].to_numpy(dtype=np.int64)
+
+
+def _pair_supports(sequences: np.ndarray, items: np.ndarray, first: np.ndarray, last: np.ndarray,
+                   n_items: int) -> np.ndarray:
+    """ Number of sequences where the first occurrence of an item is before the last occurrence of another, from
+        the first and last positions of the items of each sequence, sorted by sequence. The pairs of items of a
+        sequence are enumerated by blocks of sequences of at most MAX_PAIRS pairs
+
+    :return: Matrix of the pair supports, indexed by the first and second items of the pairs
+    """
+    counts = np.zeros(n_items * n_items, dtype=np.int64)
+    starts = np.flatnonzero(np.diff(sequences, prepend=-1)) if len(sequences) else np.zeros(0, dtype=np.int64)
+    sizes = np.diff(starts, append=len(sequences))
+    n_pairs = np.cumsum(sizes ** 2)
+
+    begin = 0
+    while begin < len(starts):
+        end = max(int(np.searchsorted(n_pairs, (n_pairs[begin - 1] if begin else 0) + MAX_PAIRS, 'right')),
+                  begin + 1)
+        row_sizes = np.repeat(sizes[begin:end], sizes[begin:end])
+        row_starts = np.repeat(starts[begin:end], sizes[begin:end])
+        left = np.repeat(np.arange(starts[begin], starts[begin] + len(row_sizes)), row_sizes)
+        right = np.repeat(row_starts - np.cumsum(row_sizes) + row_sizes, row_sizes) + np.arange(len(left))
+        supported = first[left] < last[right]
+        counts += np.bincount(items[left[supported]] * n_items + items[right[supported]], minlength=len(counts))
+        begin = end
+
+    return counts.reshape(n_items, n_items)
+
+
+def sequence_statistics(input_df: pd.DataFrame) -> SequenceStatistics:
+    """ Compute the statistics of a sequence database
+
+    :param input_df: Input Dataframe containing Sequence IDs in 'ID' column, time in
+        'Time Points' column and items in 'Items' column.
+    :return: Sequence statistics
+    """
+    df = input_df.drop_duplicates(['ID', 'Time Points', 'Items'])
+    items = df['Items'].astype(str)
+    item_supports, item_occurrences = _item_histogram(items, df['ID'])
+    lengths = df.drop_duplicates(['ID', 'Time Points'])['ID'].value_counts()
+    n_sequences = len(lengths)
+    alphabet_size = len(item_supports)
+
+    lengths = lengths.to_numpy()
+
+    # First and last itemsets of the most frequent items in each sequence. A pair a -> b is supported by
+    # a sequence if its first a is before its last b
+    chained = pd.Index(item_supports.index[:MAX_CHAIN_ITEMS]).get_indexer(items)
+    rows = chained >= 0
+    n_chained = min(alphabet_size, MAX_CHAIN_ITEMS)
+    positions = pd.DataFrame({
+        'sequence': pd.factorize(df['ID'])[0][rows],
+        'item': chained[rows],
+        'position': df['Time Points'].groupby(df['ID']).rank(method='dense').to_numpy()[rows].astype(np.int32),
+    }).groupby(['sequence', 'item'])['position'].agg(['min', 'max']).reset_index()
+    pair_supports = _pair_supports(positions['sequence'].to_numpy(), positions['item'].to_numpy(),
+                                   positions['min'].to_numpy(), positions['max'].to_numpy(), n_chained)
+
+    return SequenceStatistics(
+        n_sequences=n_sequences,
+        n_itemsets=int(lengths.sum()),
+        n_occurrences=len(df),
+        alphabet_size=alphabet_size,
+        mean_length=float(lengths.mean()) if n_sequences else 0.0,
+        length_quantiles=np.quantile(lengths, [0.5, 0.9, 0.99, 1]) if n_sequences else np.zeros(4),
+        density=float(item_supports.to_numpy().sum() / (n_sequences * alphabet_size)) if n_sequences else 0.0,
+        item_supports=item_supports.to_numpy(dtype=np.int64),
+        item_occurrences=item_occurrences,
+        pair_supports=pair_supports,
+    )
+
+
+def event_statistics(input_df: pd.DataFrame, timestamp_present: bool = True,
+                     split_itemsets: bool = False) -> EventStatistics:
+    """ Compute the statistics of an event sequence
+
+    :param input_df: Input Dataframe containing Itemsets in 'Itemset' column, and time in 'Time points' column
+        if timestamp_present
+    :param timestamp_present: Whether the time is in 'Time points' column, else the row number. Default = True
+    :param split_itemsets: Whether 'Itemset' holds space separated items. Default = False
+    :return: Event statistics
+    """
+    time = input_df['Time points'] if timestamp_present else pd.Series(np.arange(len(input_df)), index=input_df.index)
+    items = input_df['Itemset'].astype(str)
+    if split_itemsets:
+        items = items.str.split().explode()
+    time = pd.to_numeric(time).reindex(items.index)
+    item_supports, item_occurrences = _item_histogram(items, time)
+    span = float(time.max() - time.min() + 1) if len(time) else 0.0
+
+    return EventStatistics(
+        n_time_points=int(time.nunique()),
+        span=span,
+        n_events=len(items),
+        alphabet_size=len(item_supports),
+        event_rate=len(items) / span if span else 0.0,
+        item_supports=item_supports.to_numpy(dtype=np.int64),
+        item_occurrences=item_occurrences,
+    )
+
+
+@lru_cache(maxsize=1)
+def load_model() -> Dict[Text, Dict]:
+    """ Load the fitted coefficients of the cost models """
+    with open(MODEL_PATH, 'r') as fp:
+        return json.load(fp)
+
+
+def chained_patterns(first: np.ndarray, transitions: np.ndarray, threshold: float, bins: int = 256) -> float:
+    """ Number of patterns of any length, made of sequence extensions, whose support would be frequent if each item
+        only depended on the previous one. The log-probabilities are rounded up to bins of the log-threshold, and
+        the patterns are counted by total bin and last item with a recurrence over the last item.
+
+    :param first: Probability that a sequence, or a time point, contains each item
+    :param transitions: Probability that an occurrence of each item is followed by each item, a square matrix
+    :param threshold: minimum support, as a probability
+    :param bins: Number of bins of the log-threshold
+    :return: Number of patterns
+    """
+    budget = -math.log(threshold)
+    if budget <= 0 or not len(first):
+        return float(np.count_nonzero(first >= threshold))
+
+    def weights(probabilities: np.ndarray) -> np.ndarray:
+        return np.ceil(-np.log(np.clip(probabilities, 1e-12, 1 - 1e-3)) / (budget / bins)).astype(np.int64)
+
+    items = np.arange(len(first))
+    counts = np.zeros((bins + 1, len(first)))
+    start = weights(first)
+    counts[start[start <= bins], items[start <= bins]] = 1
+    steps = weights(transitions)
+    for total in range(1, bins + 1):
+        previous = total - steps
+        counts[total] += np.where(previous >= 0, counts[np.maximum(previous, 0), items[:, None]], 0).sum(axis=0)
+        counts[total] = np.minimum(counts[total], 1e300)
+    return float(min(counts.sum(), 1e300))
+
+
+def features(statistics: Any, min_count: int, max_window: float = 1) -> Dict[Text, float]:
+    """ Features of the models computed from the statistics of an input
+
+    :param statistics: Statistics of a sequence database or event sequence
+    :param min_count: minimum support, as a number of sequences or time points
+    :param max_window: maximum window length, for event sequences
+    :return: Dictionary of features
+    """
+    min_count = max(min_count, 1)
+    n_frequent, occurrences = statistics.frequent_items(min_count)
+    if isinstance(statistics, SequenceStatistics):
+        n_units = max(statistics.n_sequences, 1)
+        n_chained = min(n_frequent, MAX_CHAIN_ITEMS)
+        first = statistics.item_supports[:n_chained] / n_units
+        transitions = statistics.pair_supports[:n_chained, :n_chained] / statistics.item_supports[:n_chained, None]
+        per_unit = occurrences / n_units
+    else:
+        n_units = max(statistics.n_time_points, 1)
+        n_chained = min(n_frequent, MAX_CHAIN_ITEMS)
+        first = statistics.item_supports[:n_chained] / n_units
+        # An item follows an occurrence if it occurs in the window after it, at most max_window time points
+        transitions = np.broadcast_to(np.minimum(first * max_window, 1), (n_chained, n_chained))
+        per_unit = occurrences / max(statistics.span, 1) * max_window
+
+    return {
+        'n_frequent': n_frequent,
+        'n_chained': chained_patterns(first, transitions, min_count / n_units),
+        'occurrences': occurrences,
+        'occurrences_per_unit': per_unit,
+        'relative_support': min_count / n_units,
+    }
+
+
+def pattern_features(row: Dict[Text, float]) -> List[float]:
+    """ Features of the model of the number of patterns """
+    return [1.0, math.log1p(row['n_frequent']), math.log1p(row['n_chained']), math.log1p(row['occurrences_per_unit'])]
+
+
+def cost_features(n_patterns: float, row: Dict[Text, float]) -> List[float]:
+    """ Features of the models of the runtime and memory """
+    return [1.0, math.log1p(n_patterns), math.log1p(row['occurrences'])]
+
+
+def predict(algorithm: Text, statistics: Any, min_count: int, max_window: float = 1, k: int = None) -> Estimate:
+    """ Predict the number of patterns, peak heap and runtime of a run
+
+    :param algorithm: Name of the algorithm class. The model of its family is used if it is not calibrated
+    :param statistics: Statistics of the input, a SequenceStatistics or EventStatistics
+    :param min_count: minimum support, as a number of sequences or time points
+    :param max_window (optional): maximum window length, for event sequences
+    :param k (optional): Number of patterns of top-k algorithms, whose threshold is not known
+    :return: Estimate
+    """
+    models = load_model()
+    family = 'sequential' if isinstance(statistics, SequenceStatistics) else 'episode'
+    model = models.get(algorithm, models[family])
+    row = features(statistics, 1 if k is not None else min_count, max_window)
+
+    if k is not None:
+        n_patterns = k
+    elif not row['n_frequent']:
+        n_patterns = 0
+    else:
+        n_patterns = max(row['n_frequent'] if algorithm in FREQUENT_ALGORITHMS else 1,
+                         round(math.exp(np.dot(model['patterns'], pattern_features(row)))) - 1)
+
+    costs = cost_features(n_patterns, row)
+    return Estimate(
+        n_patterns=int(n_patterns),
+        memory_mb=float(math.exp(np.dot(model['memory'], costs))),
+        runtime_s=float(math.exp(np.dot(model['runtime'], costs))),
+        statistics=statistics,
+        error_factors={target: float(math.exp(error)) for target, error in model['errors'].items()},
+    )
+
+
+def fit(features: np.ndarray, targets: np.ndarray) -> Tuple[List[float], float]:
+    """ Fit a log-linear model by least squares
+
+    :param features: Feature matrix, one row per run
+    :param targets: Positive target values, such as 1 + number of patterns
+    :return: Tuple of coefficients and standard deviation of the log residuals
+    """
+    coefficients = np.linalg.lstsq(features, np.log(targets), rcond=None)[0]
+    residuals = np.log(targets) - features @ coefficients
+    return coefficients.tolist(), float(np.sqrt(np.mean(residuals ** 2)))
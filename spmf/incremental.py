@@ -0,0 +1,127 @@
+""" Incremental Sequential Pattern Mining on Growing Sequence Databases
+
+The patterns with a support above a lower buffer threshold are kept with their exact support. When new
+sequences are appended, only the new sequences are mined and scanned:
+    1. The supports of the buffered patterns are updated with their support in the new sequences.
+    2. A pattern missing from the buffer had a support below the buffer bound. Mining the new sequences
+       at the buffer threshold bounds its new support, so the update is exact as long as that bound stays
+       below the minimum support. Otherwise the whole database is mined again.
+"""
+
+import math
+from typing import Dict
+
+import pandas as pd
+
+from spmf.patterns import (SEQUENTIAL_COLUMN, Pattern, PatternSet,
+                           format_pattern, parse_pattern)
+from spmf.prefilter import THRESHOLD_MARGIN
+from spmf.seq_pat import CMSPADE, SPADE, SPAM, PrefixSpan, SeqPat
+
+
+class IncrementalSeqPat:
+    """ Maintain the frequent sequential patterns of a sequence database to which sequences are appended """
+
+    ALGORITHMS = (PrefixSpan, SPADE, CMSPADE, SPAM)
+
+    def __init__(self, algorithm: SeqPat, buffer_ratio: float = 0.8) -> None:
+        """ Initialize Object
+
+        :param algorithm: Frequent sequential pattern mining algorithm (PrefixSpan, SPADE, CMSPADE or SPAM)
+        :param buffer_ratio: Patterns with a support above buffer_ratio * min_support are kept between updates.
+            A lower ratio keeps more patterns, but makes re-mining the whole database less frequent. Default = 0.8
+        """
+        if not isinstance(algorithm, self.ALGORITHMS):
+            raise TypeError(f'Incremental mining requires a frequent sequential pattern mining algorithm '
+                            f'(PrefixSpan, SPADE, CMSPADE or SPAM), got {type(algorithm).__name__}')
+        if not 0 < buffer_ratio <= 1:
+            raise ValueError(f'buffer_ratio must be in (0, 1], got {buffer_ratio}')
+
+        self.algorithm = algorithm
+        self.buffer_ratio = buffer_ratio
+
+        self.database = None                    # sequences mined so far
+        self.n_sequences = 0
+        self.bound = 0                          # every pattern missing from the buffer has a lower support
+        self.buffer: Dict[Pattern, int] = {}    # patterns and their exact support
+        self.remined = False                    # whether the last update mined the whole database
+
+    def _mine(self, input_df: pd.DataFrame, min_count: int) -> Dict[Pattern, int]:
+        """ Mine the patterns with a support of at least min_count sequences
+
+        :param input_df: Input Dataframe
+        :param min_count: minimum support, as a number of sequences
+        :return: Dictionary of patterns and their support
+        """
+        algorithm = self.algorithm._copy()
+        algorithm.min_support = min_count / input_df['ID'].nunique() * THRESHOLD_MARGIN
+        output = algorithm.run_pandas(input_df)
+        return {parse_pattern(pattern): support for pattern, support in output.itertuples(index=False)}
+
+    def _output(self) -> pd.DataFrame:
+        """ Create the output dataframe with the frequent patterns of the buffer """
+        min_count = math.ceil(self.algorithm.min_support * self.n_sequences)
+        frequent = sorted((pattern, support) for pattern, support in self.buffer.items() if support >= min_count)
+        return pd.DataFrame(
+            ([format_pattern(pattern) for pattern, _ in frequent], [support for _, support in frequent]),
+            index=[SEQUENTIAL_COLUMN, 'Support'],
+        ).T
+
+    def run_pandas(self, input_df: pd.DataFrame) -> pd.DataFrame:
+        """ Mine the initial sequence database
+
+        :param input_df: Input Dataframe containing Sequence IDs in 'ID' column, time in
+            'Time Points' column and items in 'Items' column.
+        :return: Dataframe containing the frequent sequential patterns and support.
+        """
+        self.database = input_df
+        self.n_sequences = input_df['ID'].nunique()
+        self.bound = max(1, math.ceil(self.algorithm.min_support * self.buffer_ratio * self.n_sequences))
+        self.buffer = self._mine(input_df, self.bound)
+        self.remined = True
+        return self._output()
+
+    def append(self, input_df: pd.DataFrame) -> pd.DataFrame:
+        """ Append new sequences to the database and update the frequent patterns
+
+        :param input_df: Input Dataframe of the new sequences, whose IDs must not be in the database already
+        :return: Dataframe containing the frequent sequential patterns of the whole database and support.
+        """
+        if self.database is None:
+            return self.run_pandas(input_df)
+        if input_df['ID'].isin(self.database['ID']).any():
+            raise ValueError('Appended sequences must have new IDs')
+
+        n_new = input_df['ID'].nunique()
+        database = pd.concat([self.database, input_df], ignore_index=True)
+        min_count = math.ceil(self.algorithm.min_support * (self.n_sequences + n_new))
+        # Half of the margin between the buffer bound and the minimum support is spent on the new sequences,
+        # so that mining them is not much slower than mining at the minimum support, and half is left for the
+        # next updates
+        new_bound = max(1, math.ceil(self.algorithm.min_support * self.buffer_ratio * n_new),
+                        (min_count - self.bound + 1) // 2)
+
+        # A missing pattern has a new support below bound + new support, and it was mined in the new sequences
+        # if its new support is at least new_bound
+        mined = self._mine(input_df, new_bound)
+        missing = [support for pattern, support in mined.items() if pattern not in self.buffer]
+        bound = self.bound + max([new_bound - 1] + missing)
+
+        if bound > min_count:
+            return self.run_pandas(database)
+
+        # The support of the other buffered patterns in the new sequences is below new_bound, but may not be zero
+        patterns = [pattern for pattern in self.buffer if pattern not in mined]
+        pattern_set = PatternSet([format_pattern(pattern) for pattern in patterns],
+                                 max_gap=getattr(self.algorithm, 'max_gap', None) or None)
+        counted = dict(zip(patterns, pattern_set.count_support(input_df)['Support']))
+
+        buffer = {}
+        for pattern, support in self.buffer.items():
+            support += mined.get(pattern, counted.get(pattern, 0))
+            if support >= bound:
+                buffer[pattern] = support
+
+        self.database, self.n_sequences, self.bound, self.buffer = database, self.n_sequences + n_new, bound, buffer
+        self.remined = False
+        return self._output()
@@ -0,0 +1,446 @@
+""" Streaming Ingestion of Large Inputs
+
+run_pandas needs the whole input as a DataFrame, copies it to transform it, and joins the SPMF input in one string.
+The writers of this module encode batches of rows instead, and write the SPMF input file as they go:
+- Items are encoded by a growing ItemDictionary. Dictionary encoded batches, such as Parquet dictionary pages read
+  as Arrow dictionary arrays, are encoded by looking up their dictionary only.
+- The rows of the last sequence (or time point) of a batch are held back until the next batch, so memory is bounded
+  by the size of a batch and of the longest sequence.
+- Sequences must come by ascending ID, and time points of episodes by ascending time. Otherwise, the input is read
+  again and sorted externally: rows are partitioned on ranges of the hashed ID (or of the time) into temporary
+  files, and each partition is sorted in memory.
+
+SPMF algorithms may read their input more than once, so it is written to a temporary file rather than to a pipe.
+"""
+
+import math
+import os
+import tempfile
+from typing import (IO, Any, Callable, Dict, Iterable, Iterator, List,
+                    NamedTuple, Optional, Text, Tuple)
+
+import numpy as np
+import pandas as pd
+
+# Number of rows of the partitions of an external sort
+PARTITION_ROWS = 1_000_000
+
+
+class Batch(NamedTuple):
+    """ Columns of a batch of input rows """
+
+    ids: Optional[np.ndarray]           # Sequence IDs, None for episodes
+    times: Optional[np.ndarray]         # Time points, None for episodes without timestamps
+    items: np.ndarray                   # Items, or positions in dictionary if it is set
+    dictionary: Optional[np.ndarray] = None
+
+
+class UnorderedInputError(ValueError):
+    """ Input rows are not ordered by sequence ID or by time """
+
+
+class ItemDictionary:
+    """ Growing dictionary of the item codes, numbered from 1 in order of first appearance """
+
+    def __init__(self) -> None:
+        """ Initialize Object """
+        self.codes: Dict[Any, int] = {}
+        self.labels: List[Any] = []
+
+    def lookup(self, values: np.ndarray) -> np.ndarray:
+        """ Codes of distinct values, adding the new ones to the dictionary
+
+        :param values: Distinct item values
+        :return: Item codes
+        """
+        codes = np.empty(len(values), dtype=np.int64)
+        for position, value in enumerate(values.tolist()):
+            code = self.codes.get(value)
+            if code is None:
+                self.labels.append(value)
+                code = self.codes[value] = len(self.labels)
+            codes[position] = code
+        return codes
+
+    def encode(self, batch: Batch) -> np.ndarray:
+        """ Codes of the items of a batch
+
+        :param batch: Batch of input rows
+        :return: Item codes
+        """
+        if batch.dictionary is not None:
+            return self.lookup(batch.dictionary)[batch.items]
+        positions, uniques = pd.factorize(batch.items)
+        return self.lookup(np.asarray(uniques))[positions]
+
+    @property
+    def mapping(self) -> Dict[Text, Text]:
+        """ Original value of each item code, as used by Spmf.map_pattern """
+        return {str(code): str(label) for code, label in enumerate(self.labels, 1)}
+
+
+def _runs(values: np.ndarray) -> np.ndarray:
+    """ Number of the run of equal consecutive values of each element """
+    return np.r_[0, np.cumsum(values[1:] != values[:-1])] if len(values) else np.empty(0, dtype=np.int64)
+
+
+def _is_sorted(values: np.ndarray) -> bool:
+    """ Whether values are in ascending order """
+    return bool(np.all(values[1:] >= values[:-1]))
+
+
+def _last_run(values: np.ndarray) -> int:
+    """ Position of the first element of the last run of equal values """
+    changes = np.flatnonzero(values[1:] != values[:-1])
+    return int(changes[-1]) + 1 if len(changes) else 0
+
+
+class SequenceWriter:
+    """ Writer of the SPMF input of sequential pattern mining, from batches of complete or split sequences """
+
+    def __init__(self, fp: IO, check_order: bool = True) -> None:
+        """ Initialize Object
+
+        :param fp: Text file object of the SPMF input
+        :param check_order: Raise UnorderedInputError if the sequence IDs are not in ascending order. Otherwise,
+            they only need to be contiguous
+        """
+        self.fp = fp
+        self.check_order = check_order
+        self.labels: List[np.ndarray] = []      # Sequence IDs, by position in the SPMF input
+        self.pending: Optional[Tuple[np.ndarray, ...]] = None
+
+    def write(self, ids: np.ndarray, times: np.ndarray, codes: np.ndarray) -> None:
+        """ Encode a batch of rows. The rows of its last sequence are held back, since the next batch may continue it
+
+        :param ids: Sequence IDs
+        :param times: Time points
+        :param codes: Item codes
+        """
+        if self.pending is not None:
+            ids, times, codes = (np.concatenate([held, new]) for held, new in zip(self.pending, (ids, times, codes)))
+        if self.check_order and not _is_sorted(ids):
+            raise UnorderedInputError('Sequence IDs are not in ascending order')
+        split = _last_run(ids)
+        self.pending = ids[split:], times[split:], codes[split:]
+        self._encode(ids[:split], times[:split], codes[:split])
+
+    def close(self) -> None:
+        """ Encode the last sequence """
+        if self.pending is not None:
+            self._encode(*self.pending)
+            self.pending = None
+
+    def _encode(self, ids: np.ndarray, times: np.ndarray, codes: np.ndarray) -> None:
+        """ Write complete and contiguous sequences, with their itemsets by time and their items by code """
+        if not len(ids):
+            return
+        sequences = _runs(ids)
+        self.labels.append(ids[np.r_[0, np.flatnonzero(np.diff(sequences)) + 1]])
+
+        order = np.lexsort((codes, pd.factorize(times, sort=True)[0], sequences))
+        sequences, times, codes = sequences[order], times[order], codes[order]
+        itemsets = _runs(times) + sequences     # Distinct within a sequence, and between consecutive sequences
+        keep = np.r_[True, (itemsets[1:] != itemsets[:-1]) | (codes[1:] != codes[:-1])]
+        sequences, itemsets, codes = sequences[keep], itemsets[keep], codes[keep]
+
+        separators = np.where(np.r_[sequences[1:] != sequences[:-1], True], ' -1 -2\n',
+                              np.where(np.r_[itemsets[1:] != itemsets[:-1], True], ' -1 ', ' '))
+        self.fp.write(''.join(np.char.add(codes.astype(str), separators).tolist()))
+
+    @property
+    def sequence_labels(self) -> np.ndarray:
+        """ Sequence IDs, by position in the SPMF input """
+        return np.concatenate(self.labels) if self.labels else np.empty(0)
+
+
+class EventWriter:
+    """ Writer of the SPMF input of episode mining, from batches of events """
+
+    def __init__(self, fp: IO, check_order: bool = True, transform: bool = True) -> None:
+        """ Initialize Object
+
+        :param fp: Text file object of the SPMF input
+        :param check_order: Raise UnorderedInputError if the time points are not in ascending order
+        :param transform: Whether the items are encoded item codes, grouped by time point. Otherwise, they are
+            itemsets already in the SPMF format, written one per row as in Episode.run_pandas
+        """
+        self.fp = fp
+        self.check_order = check_order
+        self.transform = transform
+        self.n_rows = 0
+        self.pending: Optional[Tuple[np.ndarray, ...]] = None
+
+    def write(self, times: Optional[np.ndarray], items: np.ndarray) -> None:
+        """ Encode a batch of events. The events of its last time point are held back, since the next batch may
+            continue it
+
+        :param times: Time points, or None to number the rows
+        :param items: Item codes, or itemsets in the SPMF format if transform is False
+        """
+        if times is None:
+            times = np.arange(self.n_rows, self.n_rows + len(items))
+        self.n_rows += len(items)
+
+        if not self.transform:
+            self.fp.write(''.join(np.char.add(np.char.add(items.astype(str), '|'),
+                                              np.char.add(times.astype(str), '\n')).tolist()))
+            return
+
+        if self.pending is not None:
+            times, items = (np.concatenate([held, new]) for held, new in zip(self.pending, (times, items)))
+        if self.check_order and not _is_sorted(times):
+            raise UnorderedInputError('Time points are not in ascending order')
+        split = _last_run(times)
+        self.pending = times[split:], items[split:]
+        self._encode(times[:split], items[:split])
+
+    def close(self) -> None:
+        """ Encode the last time point """
+        if self.pending is not None:
+            self._encode(*self.pending)
+            self.pending = None
+
+    def _encode(self, times: np.ndarray, codes: np.ndarray) -> None:
+        """ Write complete and contiguous time points, with their items by code """
+        if not len(times):
+            return
+        points = _runs(times)
+        order = np.lexsort((codes, points))
+        points, times, codes = points[order], times[order], codes[order]
+        keep = np.r_[True, (points[1:] != points[:-1]) | (codes[1:] != codes[:-1])]
+        points, times, codes = points[keep], times[keep], codes[keep]
+
+        last = np.r_[points[1:] != points[:-1], True]
+        separators = np.full(len(codes), ' ', dtype=object)
+        separators[last] = np.char.add(np.char.add('|', times[last].astype(str)), '\n')
+        self.fp.write(''.join(np.char.add(codes.astype(str), separators.astype(str)).tolist()))
+
+
+def _external_sort(batches: Iterable[Tuple[np.ndarray, ...]], key: Callable[[Tuple[np.ndarray, ...]], np.ndarray],
+                   bounds: np.ndarray, order: Callable[[Tuple[np.ndarray, ...]], np.ndarray]
+                   ) -> Iterator[Tuple[np.ndarray, ...]]:
+    """ Partition rows on ranges of a key into temporary files, then yield each partition sorted in memory
+
+    :param batches: Columns of batches of rows
+    :param key: Partitioning key of the rows of a batch
+    :param bounds: Ascending bounds of the ranges of the partitions
+    :param order: Sort order of the rows of a partition
+    :return: Columns of the sorted partitions, in the order of their ranges
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        files = [open(os.path.join(directory, f'{number}.npy'), 'w+b') for number in range(len(bounds) + 1)]
+        try:
+            n_columns = 0
+            for columns in batches:
+                n_columns = len(columns)
+                partitions = np.searchsorted(bounds, key(columns), side='right')
+                rows = np.argsort(partitions, kind='stable')
+                ends = np.cumsum(np.bincount(partitions, minlength=len(files)))
+                for number in np.flatnonzero(np.bincount(partitions, minlength=len(files))):
+                    selected = rows[(ends[number - 1] if number else 0):ends[number]]
+                    for column in columns:
+                        np.save(files[number], column[selected], allow_pickle=True)
+
+            for fp in files:
+                size = fp.tell()
+                fp.seek(0)
+                chunks = []
+                while fp.tell() < size:
+                    chunks.append([np.load(fp, allow_pickle=True) for _ in range(n_columns)])
+                fp.close()
+                if chunks:
+                    columns = tuple(np.concatenate(parts) for parts in zip(*chunks))
+                    rows = order(columns)
+                    yield tuple(column[rows] for column in columns)
+        finally:
+            for fp in files:
+                fp.close()
+
+
+def _n_partitions(batches: Callable[[], Iterable[Batch]], n_rows: Optional[int]) -> int:
+    """ Number of partitions of an external sort, counting the rows if their number is unknown """
+    if n_rows is None:
+        n_rows = sum(len(batch.items) for batch in batches())
+    return max(1, math.ceil(n_rows / PARTITION_ROWS))
+
+
+def write_sequences(batches: Callable[[], Iterable[Batch]], fp: IO, n_rows: int = None
+                    ) -> Tuple[ItemDictionary, np.ndarray]:
+    """ Write the SPMF input of sequential pattern mining. Unordered sequences are read again and sorted externally
+
+    :param batches: Function returning an iterable of the batches of the input, read again on each call
+    :param fp: Text file object of the SPMF input
+    :param n_rows (optional): Number of input rows, to size the partitions of an external sort. Default = None,
+        counted from the batches if needed
+    :return: Tuple of the item dictionary, and the sequence IDs by position in the SPMF input
+    """
+    try:
+        dictionary, writer = ItemDictionary(), SequenceWriter(fp)
+        for batch in batches():
+            writer.write(batch.ids, batch.times, dictionary.encode(batch))
+    except UnorderedInputError:
+        # Sequences are partitioned on ranges of their hashed ID, so that each one is in a single partition
+        fp.seek(0)
+        fp.truncate()
+        n_partitions = _n_partitions(batches, n_rows)
+        bounds = np.array([number * (2 ** 64 // n_partitions) for number in range(1, n_partitions)], dtype=np.uint64)
+        dictionary, writer = ItemDictionary(), SequenceWriter(fp, check_order=False)
+        encoded = ((batch.ids, batch.times, dictionary.encode(batch)) for batch in batches())
+        for columns in _external_sort(encoded, lambda columns: pd.util.hash_array(columns[0]), bounds,
+                                      lambda columns: np.argsort(pd.factorize(columns[0], sort=True)[0],
+                                                                 kind='stable')):
+            writer.write(*columns)
+    writer.close()
+    return dictionary, writer.sequence_labels
+
+
+def write_events(batches: Callable[[], Iterable[Batch]], fp: IO, transform: bool = True, n_rows: int = None
+                 ) -> ItemDictionary:
+    """ Write the SPMF input of episode mining. Unordered time points are read again and sorted externally
+
+    :param batches: Function returning an iterable of the batches of the input, read again on each call
+    :param fp: Text file object of the SPMF input
+    :param transform: Whether the items are encoded. Otherwise, they are itemsets already in the SPMF format.
+        Default = True
+    :param n_rows (optional): Number of input rows, to size the partitions of an external sort. Default = None,
+        counted from the batches if needed
+    :return: Item dictionary, empty if transform is False
+    """
+    dictionary = ItemDictionary()
+    encode = dictionary.encode if transform else (
+        lambda batch: batch.items if batch.dictionary is None else batch.dictionary[batch.items])
+    try:
+        writer = EventWriter(fp, transform=transform)
+        for batch in batches():
+            writer.write(batch.times, encode(batch))
+    except UnorderedInputError:
+        # Time points are partitioned on ranges of time, between the first and last time point
+        fp.seek(0)
+        fp.truncate()
+        n_partitions = _n_partitions(batches, n_rows)
+        times = [(batch.times.min(), batch.times.max()) for batch in batches() if len(batch.times)]
+        bounds = np.linspace(min(times)[0], max(time for _, time in times), n_partitions + 1)[1:-1]
+        dictionary = ItemDictionary()
+        writer = EventWriter(fp, check_order=False)
+        encoded = ((batch.times, dictionary.encode(batch)) for batch in batches())
+        for columns in _external_sort(encoded, lambda columns: columns[0].astype(np.float64), bounds,
+                                      lambda columns: np.argsort(columns[0], kind='stable')):
+            writer.write(*columns)
+    writer.close()
+    return dictionary
+
+
+def _import_pyarrow() -> Any:
+    """ Import pyarrow.compute, an optional dependency """
+    try:
+        import pyarrow.compute as pc
+    except ImportError:
+        raise ImportError('pyarrow is required to read Parquet files and Arrow tables: pip install spmf-wrapper[arrow]')
+    return pc
+
+
+def read_parquet(path: Text, columns: List[Text], batch_size: int) -> Tuple[Callable[[], Iterator[Batch]], int]:
+    """ Read a Parquet file or a partitioned Parquet dataset by batches. Requires pyarrow
+
+    :param path: Path of a Parquet file, or of a directory of Parquet files with hive partitioning
+    :param columns: Names of the ID (for sequences), time (if present) and item columns, in this order.
+        The last one is read as dictionary arrays, from the Parquet dictionary pages when the column has them
+    :param batch_size: Maximum number of rows of a batch
+    :return: Tuple of a function returning an iterator of the batches, and the number of rows
+    """
+    _import_pyarrow()
+    import pyarrow.dataset as ds
+
+    file_format = ds.ParquetFileFormat(read_options={'dictionary_columns': [columns[-1]]})
+    dataset = ds.dataset(path, format=file_format, partitioning='hive')
+
+    def batches() -> Iterator[Batch]:
+        for record_batch in dataset.to_batches(columns=columns, batch_size=batch_size, use_threads=False):
+            yield arrow_batch(record_batch, columns)
+
+    return batches, dataset.count_rows()
+
+
+def read_arrow(table: Any, columns: List[Text], batch_size: int) -> Tuple[Callable[[], Iterator[Batch]], int]:
+    """ Read an Arrow table by batches, without copying its buffers. Requires pyarrow
+
+    :param table: Arrow table
+    :param columns: Names of the ID (for sequences), time (if present) and item columns, in this order
+    :param batch_size: Maximum number of rows of a batch
+    :return: Tuple of a function returning an iterator of the batches, and the number of rows
+    """
+    _import_pyarrow()
+    table = table.select(columns)
+
+    def batches() -> Iterator[Batch]:
+        for record_batch in table.to_batches(max_chunksize=batch_size):
+            yield arrow_batch(record_batch, columns)
+
+    return batches, table.num_rows
+
+
+def read_sql(connection: Any, query: Text, columns: List[Text], batch_size: int, params: Any = None,
+             order_by: List[Text] = None, quote_char: Text = '"') -> Tuple[Callable[[], Iterator[Batch]], None]:
+    """ Read the result of an SQL query by batches, ordered by the database
+
+    :param connection: DB-API connection, or function returning a new cursor, such as a named (server-side)
+        cursor of psycopg2
+    :param query: SQL query, wrapped as a subquery to select and order the columns
+    :param columns: Names of the ID (for sequences), time (if present) and item columns, in this order
+    :param batch_size: Number of rows fetched at once
+    :param params (optional): Parameters of the query, in the paramstyle of the connection. Default = None
+    :param order_by (optional): Names of the columns ordering the rows, which need not be selected.
+        Default = the ID and time columns
+    :param quote_char (optional): Character quoting the column names, doubled inside them. MySQL and MariaDB
+        read double quoted names as strings, unless sql_mode has ANSI_QUOTES, and need '`'. Default = '"'
+    :return: Tuple of a function returning an iterator of the batches, and None since the number of rows is unknown
+    """
+    order_by = columns[:-1] if order_by is None else order_by
+    if not order_by:
+        raise ValueError('SQL inputs need a column ordering the rows, since the database may return them in any order')
+
+    quoted, quoted_order = ([quote_char + name.replace(quote_char, quote_char * 2) + quote_char for name in names]
+                            for names in [columns, order_by])
+    ordered_query = f'SELECT {", ".join(quoted)} FROM ({query}) AS spmf_input ORDER BY {", ".join(quoted_order)}'
+
+    def batches() -> Iterator[Batch]:
+        cursor = connection.cursor() if hasattr(connection, 'cursor') else connection()
+        try:
+            cursor.arraysize = batch_size
+            cursor.execute(ordered_query, *([params] if params is not None else []))
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                *keys, items = (np.asarray(column) for column in zip(*rows))
+                valid = ~pd.isna(items)
+                keys, items = [key[valid] for key in keys], items[valid]
+                yield Batch(keys.pop(0) if len(keys) == 2 else None, keys[0] if keys else None, items)
+        finally:
+            cursor.close()
+
+    return batches, None
+
+
+def arrow_batch(record_batch: Any, columns: List[Text]) -> Batch:
+    """ Batch of the columns of an Arrow record batch, without its rows of missing items. Items are dictionary
+        encoded by Arrow, unless they are already
+
+    :param record_batch: Arrow record batch
+    :param columns: Names of the ID (for sequences), time (if present) and item columns, in this order
+    :return: Batch
+    """
+    pc = _import_pyarrow()
+    items = record_batch.column(columns[-1])
+    if items.null_count:
+        record_batch = record_batch.filter(pc.is_valid(items))
+        items = record_batch.column(columns[-1])
+    if not hasattr(items, 'dictionary'):
+        items = pc.dictionary_encode(items)
+
+    keys = [record_batch.column(name).to_numpy(zero_copy_only=False) for name in columns[:-1]]
+    ids = keys.pop(0) if len(keys) == 2 else None
+    times = keys[0] if keys else None
+    return Batch(ids, times, items.indices.to_numpy(zero_copy_only=False),
+                 items.dictionary.to_numpy(zero_copy_only=False))
@@ -0,0 +1,161 @@
+""" Native NumPy implementations of SPMF algorithms
+
+Small inputs are mined faster in process than by starting a Java VM. The algorithms here read the input
+file and write the output file in the same formats as SPMF, so they can replace the Java subprocess.
+"""
+
+import math
+from typing import List, NamedTuple, Text, Tuple
+
+import numpy as np
+
+ITEMSET_END = -1
+SEQUENCE_END = -2
+
+
+class SequenceDatabase(NamedTuple):
+    """ Sequence database stored as flat arrays, one entry per item occurrence """
+
+    items: np.ndarray               # item of each element
+    element_itemset: np.ndarray     # global index of the itemset of each element
+    element_sequence: np.ndarray    # index of the sequence of each element
+    itemset_start: np.ndarray       # index of the first element of each itemset, plus the number of elements
+    itemset_sequence: np.ndarray    # index of the sequence of each itemset
+    sequence_end: np.ndarray        # index after the last element of each sequence
+    n_sequences: int
+
+
+def read_sequence_database(input_file_name: Text) -> SequenceDatabase:
+    """ Read a sequence database in SPMF format ('1 2 -1 3 -1 -2' per line)
+
+    :param input_file_name: Input txt file name
+    :return: Sequence database
+    """
+    with open(input_file_name, 'r') as fp:
+        text = ' '.join(line for line in fp if line.strip() and line[0] not in '#%@')
+
+    tokens = np.array(text.split(), dtype=np.int64)
+    is_element = tokens >= 0
+    itemset = np.cumsum(tokens == ITEMSET_END)
+    sequence = np.cumsum(tokens == SEQUENCE_END)
+
+    items, element_itemset, element_sequence = tokens[is_element], itemset[is_element], sequence[is_element]
+
+    # Items of an itemset sorted and unique, as in SPMF
+    order = np.lexsort((items, element_itemset))
+    items, element_itemset, element_sequence = items[order], element_itemset[order], element_sequence[order]
+    unique = np.ones(len(items), dtype=bool)
+    unique[1:] = (items[1:] != items[:-1]) | (element_itemset[1:] != element_itemset[:-1])
+    items, element_itemset, element_sequence = items[unique], element_itemset[unique], element_sequence[unique]
+
+    n_itemsets = int(itemset[-1]) + 1 if len(tokens) else 0
+    n_sequences = int(np.count_nonzero(tokens == SEQUENCE_END))
+    itemset_start = np.searchsorted(element_itemset, np.arange(n_itemsets + 1))
+    itemset_sequence = np.zeros(n_itemsets, dtype=np.int64)
+    itemset_sequence[element_itemset] = element_sequence
+
+    return SequenceDatabase(
+        items=items,
+        element_itemset=element_itemset,
+        element_sequence=element_sequence,
+        itemset_start=itemset_start,
+        itemset_sequence=itemset_sequence,
+        sequence_end=np.searchsorted(element_sequence, np.arange(n_sequences), side='right'),
+        n_sequences=n_sequences,
+    )
+
+
+def _ranges(starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """ Concatenate the ranges [start, end) without a Python loop """
+    lengths = np.maximum(ends - starts, 0)
+    offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+    return offsets + np.arange(lengths.sum())
+
+
+def _frequent_extensions(database: SequenceDatabase, elements: np.ndarray, min_support: int) -> List[Tuple]:
+    """ Group candidate elements by item and keep the frequent items
+
+    :param database: Sequence database
+    :param elements: Indexes of the elements that can extend the prefix, ordered by position
+    :param min_support: Minimum number of sequences
+    :return: List of (item, support, itemsets containing the item)
+    """
+    if not len(elements):
+        return []
+
+    items = database.items[elements]
+    order = np.argsort(items, kind='stable')
+    items, elements = items[order], elements[order]
+    sequences = database.element_sequence[elements]
+
+    new_pair = np.r_[True, (items[1:] != items[:-1]) | (sequences[1:] != sequences[:-1])]
+    candidates, supports = np.unique(items[new_pair], return_counts=True)
+    frequent = supports >= min_support
+    candidates, supports = candidates[frequent], supports[frequent]
+    starts, ends = np.searchsorted(items, candidates, 'left'), np.searchsorted(items, candidates, 'right')
+
+    return [
+        (int(item), int(support), database.element_itemset[elements[start:end]])
+        for item, support, start, end in zip(candidates, supports, starts, ends)
+    ]
+
+
+def prefixspan(database: SequenceDatabase, min_support: float, max_pattern_length: int = None,
+               show_seq_ids: bool = False) -> Tuple[List, List, List]:
+    """ Mine frequent sequential patterns with PrefixSpan, using pseudo-projections stored as index arrays.
+        A projection is the sorted array of itemsets where the last itemset of the prefix can be matched,
+        given the earliest match of the rest of the prefix.
+
+    :param database: Sequence database
+    :param min_support: minimum occurence frequency, as a fraction of the number of sequences
+    :param max_pattern_length: maximum number of items that patterns found should contain
+    :param show_seq_ids: Set to True to return the sequences supporting each pattern. Default = False
+    :return: Tuple of patterns, as tuples of itemsets, corresponding support, and sorted sequence indexes
+        of each pattern if show_seq_ids is True (empty list otherwise)
+    """
+    min_support = max(1, math.ceil(min_support * database.n_sequences))
+    max_pattern_length = max_pattern_length or math.inf
+    patterns, supports, sequence_ids = [], [], []
+
+    stack = [(((item,),), support, itemsets)
+             for item, support, itemsets in _frequent_extensions(database, np.arange(len(database.items)), min_support)]
+
+    while stack:
+        pattern, support, itemsets = stack.pop()
+        patterns.append(pattern)
+        supports.append(support)
+        if show_seq_ids:
+            sequence_ids.append(np.unique(database.itemset_sequence[itemsets]))
+
+        if sum(len(itemset) for itemset in pattern) >= max_pattern_length:
+            continue
+
+        # Itemset extensions: larger items in the itemsets matching the last itemset of the prefix
+        elements = _ranges(database.itemset_start[itemsets], database.itemset_start[itemsets + 1])
+        elements = elements[database.items[elements] > pattern[-1][-1]]
+        for item, item_support, item_itemsets in _frequent_extensions(database, elements, min_support):
+            stack.append((pattern[:-1] + (pattern[-1] + (item,),), item_support, item_itemsets))
+
+        # Sequence extensions: any item after the first match of the prefix in each sequence
+        sequences = database.itemset_sequence[itemsets]
+        first = itemsets[np.r_[True, sequences[1:] != sequences[:-1]]]
+        elements = _ranges(database.itemset_start[first + 1], database.sequence_end[database.itemset_sequence[first]])
+        for item, item_support, item_itemsets in _frequent_extensions(database, elements, min_support):
+            stack.append((pattern + ((item,),), item_support, item_itemsets))
+
+    return patterns, supports, sequence_ids
+
+
+def write_patterns(output_file_name: Text, patterns: List, supports: List[int], sequence_ids: List = None) -> None:
+    """ Write sequential patterns to a txt file in SPMF format ('1 2 -1 3 -1 #SUP: 2' per line)
+
+    :param output_file_name: Output txt file name
+    :param patterns: Patterns, as tuples of itemsets
+    :param supports: Corresponding supports
+    :param sequence_ids (optional): Sequence indexes of each pattern, written after '#SID:'
+    """
+    with open(output_file_name, 'w') as fp:
+        for i, (pattern, support) in enumerate(zip(patterns, supports)):
+            itemsets = ' '.join(' '.join(map(str, itemset)) + ' -1' for itemset in pattern)
+            sids = f" #SID: {' '.join(map(str, sequence_ids[i]))}" if sequence_ids else ''
+            fp.write(f'{itemsets} #SUP: {support}{sids}\n')
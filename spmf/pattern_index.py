@@ -0,0 +1,255 @@
+""" Query Index over Mined Patterns
+
+Ad-hoc queries on large result sets, such as the patterns starting with an itemset, containing some items,
+or above a support, are answered without scanning the pattern strings.
+
+Each distinct itemset gets a code, and the patterns are stored as rows of itemset codes sorted
+lexicographically. This is a flattened prefix trie: the patterns below a node are a contiguous range of rows,
+found with one binary search per itemset of the prefix. Posting lists hold the patterns containing each item,
+and the supports and lengths are sorted for range queries.
+"""
+
+import math
+from functools import partial
+from typing import Dict, List, Text, Tuple
+
+import numpy as np
+import pandas as pd
+
+from spmf.native import _ranges
+from spmf.patterns import (EPISODE_COLUMN, SEQUENTIAL_COLUMN, Pattern,
+                           format_pattern, parse_pattern)
+
+PADDING = -1
+
+
+def _csr(groups: np.ndarray, values: np.ndarray, n_groups: int) -> Tuple[np.ndarray, np.ndarray]:
+    """ Compressed rows of the values of each group, sorted by group then value
+
+    :return: Tuple of indptr and values
+    """
+    order = np.lexsort((values, groups))
+    indptr = np.r_[0, np.cumsum(np.bincount(groups, minlength=n_groups))]
+    return indptr, values[order]
+
+
+class PatternIndex:
+    """ Index of mined sequential patterns or episodes for fast queries """
+
+    def __init__(self, column: Text, items: np.ndarray, itemset_indptr: np.ndarray, itemset_items: np.ndarray,
+                 trie: np.ndarray, order: np.ndarray, supports: np.ndarray, lengths: np.ndarray,
+                 item_indptr: np.ndarray, item_patterns: np.ndarray) -> None:
+        """ Initialize Object. Use from_dataframe or load to create an index
+
+        :param column: Name of the pattern column of the output dataframe
+        :param items: Sorted item labels, the code of an item being its position
+        :param itemset_indptr: Start of the items of each itemset code in itemset_items
+        :param itemset_items: Sorted item codes of each itemset
+        :param trie: Itemset codes of the patterns, one row per pattern sorted lexicographically, padded with -1
+        :param order: Row of the output dataframe of each row of the trie
+        :param supports: Support of each pattern, by row of the output dataframe
+        :param lengths: Number of items of each pattern, by row of the output dataframe
+        :param item_indptr: Start of the patterns containing each item code in item_patterns
+        :param item_patterns: Sorted rows of the patterns containing each item
+        """
+        self.column = column
+        self.items = items
+        self.itemset_indptr = itemset_indptr
+        self.itemset_items = itemset_items
+        self.trie = np.asfortranarray(trie)     # columns are contiguous for the binary searches
+        self.order = order
+        self.supports = supports
+        self.lengths = lengths
+        self.item_indptr = item_indptr
+        self.item_patterns = item_patterns
+
+        self.rank = np.empty(len(order), dtype=np.int64)
+        self.rank[order] = np.arange(len(order))
+        self.support_order = np.argsort(supports, kind='stable')
+        self.sorted_supports = supports[self.support_order]
+        self.length_order = np.argsort(lengths, kind='stable')
+        self.sorted_lengths = lengths[self.length_order]
+        self.item_codes = {item: code for code, item in enumerate(items.tolist())}
+        self.itemset_codes = {
+            tuple(items[itemset_items[start:end]].tolist()): code
+            for code, (start, end) in enumerate(zip(itemset_indptr[:-1], itemset_indptr[1:]))
+        }
+
+    @classmethod
+    def from_dataframe(cls, output_df: pd.DataFrame) -> 'PatternIndex':
+        """ Build the index of the output dataframe of a mining algorithm
+
+        :param output_df: Output dataframe of a Sequential Pattern Mining or Episode Mining algorithm
+        :return: Pattern index, whose rows are the rows of the output dataframe
+        """
+        column = SEQUENTIAL_COLUMN if SEQUENTIAL_COLUMN in output_df else EPISODE_COLUMN
+        patterns = output_df[column].astype(str).reset_index(drop=True)
+
+        # Itemsets of each pattern, in canonical form with sorted items
+        itemsets = patterns.str.split('->', regex=False).explode()
+        pattern_of_itemset = itemsets.index.to_numpy()
+        position = itemsets.groupby(level=0).cumcount().to_numpy()
+        raw_codes, raw_itemsets = pd.factorize(itemsets.to_numpy())
+        canonical = [tuple(sorted(itemset.split())) for itemset in raw_itemsets]
+        canonical_codes, uniques = pd.factorize(pd.Series(canonical, dtype=object))
+        itemset_codes = canonical_codes[raw_codes]
+
+        # Items of each distinct itemset
+        itemset_of_item = np.repeat(np.arange(len(uniques)), [len(itemset) for itemset in uniques])
+        item_labels = [item for itemset in uniques for item in itemset]
+        items = np.array(sorted(set(item_labels)), dtype=str)
+        item_codes = np.searchsorted(items, np.array(item_labels, dtype=str))
+        itemset_indptr, itemset_items = _csr(itemset_of_item, item_codes, len(uniques))
+
+        # Patterns as padded rows of itemset codes, sorted lexicographically
+        n_patterns = len(patterns)
+        depth = int(position.max()) + 1 if len(position) else 0
+        trie = np.full((n_patterns, depth), PADDING, dtype=np.int32)
+        trie[pattern_of_itemset, position] = itemset_codes
+        order = np.lexsort(trie.T[::-1]) if depth else np.arange(n_patterns)
+
+        # Patterns containing each item, an item being counted once per pattern
+        sizes = np.diff(itemset_indptr)
+        pattern_of_item = np.repeat(pattern_of_itemset, sizes[itemset_codes])
+        code_of_item = itemset_items[_ranges(itemset_indptr[itemset_codes], itemset_indptr[itemset_codes + 1])]
+        pairs = np.unique(code_of_item.astype(np.int64) * max(n_patterns, 1) + pattern_of_item)
+        item_indptr, item_patterns = _csr(pairs // max(n_patterns, 1), pairs % max(n_patterns, 1), len(items))
+
+        return cls(
+            column=column,
+            items=items,
+            itemset_indptr=itemset_indptr,
+            itemset_items=itemset_items,
+            trie=trie[order],
+            order=order,
+            supports=pd.to_numeric(output_df['Support']).to_numpy(dtype=np.int64),
+            lengths=np.bincount(pattern_of_itemset, sizes[itemset_codes], minlength=n_patterns).astype(np.int64),
+            item_indptr=item_indptr,
+            item_patterns=item_patterns,
+        )
+
+    def __len__(self) -> int:
+        """ Number of indexed patterns """
+        return len(self.order)
+
+    def _prefix_range(self, prefix: Pattern) -> Tuple[int, int]:
+        """ Range of the trie rows starting with the itemsets of the prefix """
+        low, high = 0, len(self)
+        if len(prefix) > self.trie.shape[1]:
+            return 0, 0
+
+        for depth, itemset in enumerate(prefix):
+            code = self.itemset_codes.get(itemset)
+            if code is None:
+                return 0, 0
+            # Searching a value of another type would cast the whole column
+            code = self.trie.dtype.type(code)
+            column = self.trie[low:high, depth]
+            low, high = low + np.searchsorted(column, code, 'left'), low + np.searchsorted(column, code, 'right')
+
+        return int(low), int(high)
+
+    def _item_rows(self, item: Text) -> np.ndarray:
+        """ Sorted rows of the patterns containing an item """
+        code = self.item_codes.get(str(item))
+        if code is None:
+            return np.empty(0, dtype=np.int64)
+        return self.item_patterns[self.item_indptr[code]:self.item_indptr[code + 1]]
+
+    @staticmethod
+    def _sorted_range(sorted_values: np.ndarray, low: float = None, high: float = None) -> Tuple[int, int]:
+        """ Range of the sorted integer values within [low, high] """
+        start = 0 if low is None else np.searchsorted(sorted_values, sorted_values.dtype.type(math.ceil(low)), 'left')
+        end = len(sorted_values) if high is None else \
+            np.searchsorted(sorted_values, sorted_values.dtype.type(math.floor(high)), 'right')
+        return int(start), int(end)
+
+    @staticmethod
+    def _between(values: np.ndarray, low: float, high: float, rows: np.ndarray) -> np.ndarray:
+        """ Mask of the rows whose value is within [low, high] """
+        selected = values[rows]
+        return ((selected >= low) if low is not None else True) & ((selected <= high) if high is not None else True)
+
+    @staticmethod
+    def _member(sorted_rows: np.ndarray, rows: np.ndarray) -> np.ndarray:
+        """ Mask of the rows which are in sorted_rows """
+        found = np.searchsorted(sorted_rows, rows)
+        return sorted_rows[np.minimum(found, len(sorted_rows) - 1)] == rows if len(sorted_rows) else rows < 0
+
+    def query(self, starts_with: Text = None, contains: List = None, min_support: int = None,
+              max_support: int = None, min_length: int = None, max_length: int = None) -> np.ndarray:
+        """ Find the patterns satisfying every given condition
+
+        :param starts_with (optional): Pattern such as 'a -> b c', whose itemsets are the first itemsets of the
+            patterns found
+        :param contains (optional): Items that the patterns found contain, in any itemset
+        :param min_support (optional): Minimum support of the patterns found
+        :param max_support (optional): Maximum support of the patterns found
+        :param min_length (optional): Minimum number of items of the patterns found
+        :param max_length (optional): Maximum number of items of the patterns found
+        :return: Sorted rows of the patterns found in the output dataframe
+        """
+        # Rows selected by each condition, which are views, and mask of the rows satisfying the condition
+        selections = []
+        if starts_with is not None:
+            low, high = self._prefix_range(parse_pattern(starts_with))
+            selections.append((self.order[low:high], partial(self._between, self.rank, low, high - 1)))
+        for item in contains or []:
+            rows = self._item_rows(item)
+            selections.append((rows, partial(self._member, rows)))
+        for values, order, sorted_values, low, high in [
+            (self.supports, self.support_order, self.sorted_supports, min_support, max_support),
+            (self.lengths, self.length_order, self.sorted_lengths, min_length, max_length),
+        ]:
+            if low is not None or high is not None:
+                start, end = self._sorted_range(sorted_values, low, high)
+                selections.append((order[start:end], partial(self._between, values, low, high)))
+
+        if not selections:
+            return np.arange(len(self))
+
+        # The smallest selection is filtered by the other conditions
+        selections.sort(key=lambda selection: len(selection[0]))
+        rows = selections[0][0]
+        for _, mask in selections[1:]:
+            rows = rows[mask(rows)]
+        return np.sort(rows)
+
+    def pattern(self, row: int) -> Text:
+        """ Pattern of a row of the output dataframe, such as 'a b -> c' """
+        codes = self.trie[self.rank[row]]
+        return format_pattern(tuple(
+            tuple(self.items[self.itemset_items[self.itemset_indptr[code]:self.itemset_indptr[code + 1]]].tolist())
+            for code in codes[codes != PADDING]
+        ))
+
+    def to_dataframe(self, rows: np.ndarray = None) -> pd.DataFrame:
+        """ Create a dataframe in the format of the mining algorithms output
+
+        :param rows (optional): Rows of the patterns, such as the result of a query. Default = all the patterns
+        :return: Dataframe containing patterns and corresponding support, indexed by row
+        """
+        rows = np.arange(len(self)) if rows is None else np.asarray(rows)
+        return pd.DataFrame({self.column: [self.pattern(row) for row in rows], 'Support': self.supports[rows]},
+                            index=rows)
+
+    def save(self, path: Text) -> None:
+        """ Save the index to a .npz file
+
+        :param path: File path
+        """
+        np.savez(path, column=np.array(self.column), items=self.items, itemset_indptr=self.itemset_indptr,
+                 itemset_items=self.itemset_items, trie=self.trie, order=self.order, supports=self.supports,
+                 lengths=self.lengths, item_indptr=self.item_indptr, item_patterns=self.item_patterns)
+
+    @classmethod
+    def load(cls, path: Text) -> 'PatternIndex':
+        """ Load an index saved with save
+
+        :param path: File path
+        :return: Pattern index
+        """
+        with np.load(path, allow_pickle=False) as arrays:
+            arguments: Dict = {name: arrays[name] for name in arrays.files}
+        arguments['column'] = str(arguments['column'])
+        return cls(**arguments)
@@ -0,0 +1,572 @@
+""" Mined Pattern Sets
+
+Post-processing of the patterns returned by the mining algorithms, without running SPMF again.
+"""
+
+import copy
+import math
+from concurrent.futures import ProcessPoolExecutor
+from functools import reduce
+from itertools import chain
+from typing import Any, Dict, Iterator, List, NamedTuple, Text, Tuple
+
+import numpy as np
+import pandas as pd
+
+from spmf.native import _ranges
+
+Pattern = Tuple[Tuple[Text, ...], ...]
+
+SEQUENTIAL_COLUMN = 'Frequent sequential pattern'
+EPISODE_COLUMN = 'Frequent episode'
+
+
+def parse_pattern(pattern: Text) -> Pattern:
+    """ Parse a pattern from the output dataframe
+
+    :param pattern: Pattern such as 'a b -> c'
+    :return: Tuple of itemsets, each itemset being a sorted tuple of items
+    """
+    return tuple(tuple(sorted(itemset.split())) for itemset in pattern.split('->'))
+
+
+def format_pattern(pattern: Pattern) -> Text:
+    """ Format a pattern like the output dataframe
+
+    :param pattern: Tuple of itemsets
+    :return: Pattern such as 'a b -> c'
+    """
+    return (' -> ').join((' ').join(itemset) for itemset in pattern)
+
+
+def pattern_length(pattern: Pattern) -> int:
+    """ Number of items in a pattern """
+    return sum(len(itemset) for itemset in pattern)
+
+
+def sub_patterns(pattern: Pattern) -> Iterator[Pattern]:
+    """ Patterns obtained by removing one item, which are all the sub-patterns with one item less
+
+    :param pattern: Tuple of itemsets
+    :return: Iterator of patterns, an itemset left empty being removed
+    """
+    for i, itemset in enumerate(pattern):
+        for j in range(len(itemset)):
+            smaller = itemset[:j] + itemset[j + 1:]
+            yield pattern[:i] + ((smaller,) if smaller else ()) + pattern[i + 1:]
+
+
+class InvertedIndex(NamedTuple):
+    """ Item to position index of a sequence database or event sequence.
+        A position is an itemset of a sequence, or a time point of an event sequence.
+    """
+
+    items: np.ndarray           # item codes, sorted
+    positions: np.ndarray       # position of each item occurrence, sorted for each item
+    position_group: np.ndarray  # sequence of each position, or time of each time point
+
+    def containing(self, itemset: np.ndarray) -> np.ndarray:
+        """ Sorted positions containing every item of an itemset """
+        if np.any(itemset < 0):
+            return np.empty(0, dtype=np.int64)
+
+        starts = np.searchsorted(self.items, itemset, 'left')
+        ends = np.searchsorted(self.items, itemset, 'right')
+        return reduce(lambda x, y: np.intersect1d(x, y, assume_unique=True),
+                      [self.positions[start:end] for start, end in zip(starts, ends)])
+
+
+def _build_index(codes: np.ndarray, positions: np.ndarray, position_group: np.ndarray) -> InvertedIndex:
+    """ Build an inverted index from item occurrences
+
+    :param codes: Item code of each occurrence, -1 for items absent from the patterns
+    :param positions: Position of each occurrence
+    :param position_group: Sequence or time of each position
+    :return: Inverted index
+    """
+    known = codes >= 0
+    codes, positions = codes[known], positions[known]
+    order = np.lexsort((positions, codes))
+    codes, positions = codes[order], positions[order]
+    unique = np.ones(len(codes), dtype=bool)
+    unique[1:] = (codes[1:] != codes[:-1]) | (positions[1:] != positions[:-1])
+    return InvertedIndex(codes[unique], positions[unique], position_group)
+
+
+def _count_sequential(index: InvertedIndex, patterns: List[List[np.ndarray]], max_gap: int = None) -> np.ndarray:
+    """ Count the sequences containing each sequential pattern
+
+    :param index: Inverted index of the sequence database, with the sequence of each itemset as position group
+    :param patterns: Patterns as lists of item code arrays
+    :param max_gap: maximum gap between consecutive itemsets of an occurrence. 1 means consecutive itemsets
+    :return: Support of each pattern
+    """
+    sequence = index.position_group
+    supports = np.zeros(len(patterns), dtype=np.int64)
+
+    for i, pattern in enumerate(patterns):
+        ends = index.containing(pattern[0])
+        if max_gap is None:
+            # The earliest occurrence of a prefix in each sequence is enough to find an extension
+            ends = ends[np.r_[True, sequence[ends[1:]] != sequence[ends[:-1]]]] if len(ends) else ends
+
+        for itemset in pattern[1:]:
+            if not len(ends):
+                break
+            candidates = index.containing(itemset)
+            if max_gap is None:
+                following = np.searchsorted(candidates, ends, 'right')
+                found = following < len(candidates)
+                ends, following = ends[found], candidates[following[found]]
+                ends = following[sequence[following] == sequence[ends]]
+            else:
+                # Every end of the prefix has to be kept, as a later one may satisfy the gap constraint
+                low = np.searchsorted(candidates, ends, 'right')
+                high = np.searchsorted(candidates, ends + max_gap, 'right')
+                following = candidates[_ranges(low, high)]
+                ends = np.unique(following[sequence[following] == sequence[np.repeat(ends, high - low)]])
+
+        supports[i] = len(np.unique(sequence[ends]))
+
+    return supports
+
+
+def _count_episodes(index: InvertedIndex, patterns: List[List[np.ndarray]], max_window: float,
+                    start: float = -math.inf, end: float = math.inf) -> np.ndarray:
+    """ Count the head support of each episode, as defined by EMMA and TKE.
+        That is the number of time points t at which an occurrence of the episode starts and ends before t + max_window
+
+    :param index: Inverted index of the event sequence, with the time of each time point as position group
+    :param patterns: Episodes as lists of item code arrays
+    :param max_window: maximum window length
+    :param start: Only count occurrences starting at or after start
+    :param end: Only count occurrences starting before end
+    :return: Support of each episode
+    """
+    time = index.position_group
+    supports = np.zeros(len(patterns), dtype=np.int64)
+
+    for i, pattern in enumerate(patterns):
+        heads = index.containing(pattern[0])
+        heads = heads[(time[heads] >= start) & (time[heads] < end)]
+        ends = heads
+
+        # The earliest occurrence of each itemset after the previous one is enough, as the window starts at the head
+        for itemset in pattern[1:]:
+            candidates = index.containing(itemset)
+            following = np.searchsorted(candidates, ends, 'right')
+            found = following < len(candidates)
+            heads, ends = heads[found], candidates[following[found]]
+            within = time[ends] - time[heads] < max_window
+            heads, ends = heads[within], ends[within]
+
+        supports[i] = len(heads)
+
+    return supports
+
+
+def _count_chunk(kind: Text, chunk: Dict, patterns: List[List[np.ndarray]], max_gap: int,
+                 max_window: float) -> np.ndarray:
+    """ Count the support of every pattern in one chunk of the input """
+    index = _build_index(**chunk['index'])
+    if kind == 'sequential':
+        return _count_sequential(index, patterns, max_gap)
+    return _count_episodes(index, patterns, max_window, chunk['start'], chunk['end'])
+
+
+HASH_BASE = np.uint64(0x9E3779B97F4A7C15)
+HASH_MIX = np.uint64(0xBF58476D1CE4E5B9)
+
+# Pattern tables of the rule generation, set once in each worker process
+_rule_tables: Dict[Text, np.ndarray] = {}
+
+
+def _hash_prefixes(codes: np.ndarray, positions: np.ndarray, indptr: np.ndarray) -> np.ndarray:
+    """ Hash of each prefix of the patterns, as integer tuples of itemset codes
+
+    :param codes: Itemset codes of the patterns, concatenated
+    :param positions: Position of each itemset in its pattern
+    :param indptr: Start of the itemsets of each pattern in codes, plus the number of itemsets
+    :return: Hash of the prefix ending at each itemset, the sum of the mixed codes weighted by powers of a base
+    """
+    mixed = (codes.astype(np.uint64) + np.uint64(1)) * HASH_MIX
+    mixed ^= mixed >> np.uint64(31)
+    powers = np.cumprod(np.full(int(positions.max()) + 1 if len(positions) else 0, HASH_BASE, dtype=np.uint64))
+    cumulative = np.cumsum(mixed * powers[positions], dtype=np.uint64)
+    before = np.r_[np.uint64(0), cumulative][indptr[:-1]]
+    return cumulative - np.repeat(before, np.diff(indptr))
+
+
+def _init_rule_tables(tables: Dict[Text, np.ndarray]) -> None:
+    """ Share the pattern tables with a worker process """
+    _rule_tables.update(tables)
+
+
+def _rule_chunk(tables: Dict[Text, np.ndarray], rows: np.ndarray, depths: np.ndarray,
+                min_confidence: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """ Find the antecedent of candidate rules and keep the confident rules
+
+    :param tables: Pattern tables built by PatternSet.generate_rules
+    :param rows: Pattern of each candidate rule
+    :param depths: Number of itemsets of the antecedent of each candidate rule
+    :param min_confidence: Minimum confidence of the rules
+    :return: Tuple of the pattern, antecedent depth and confidence of the rules found
+    """
+    codes, indptr, supports = tables['codes'], tables['indptr'], tables['supports']
+    ends = indptr[rows] + depths
+
+    # Patterns whose hash is the hash of the antecedent, verified on their itemset codes
+    sorted_hashes, hashes = tables['sorted_hashes'], tables['hashes'][ends - 1]
+    found = np.minimum(np.searchsorted(sorted_hashes, hashes), len(sorted_hashes) - 1)
+    antecedents = tables['hash_order'][found]
+    matched = (sorted_hashes[found] == hashes) & (np.diff(indptr)[antecedents] == depths)
+    rows, depths, ends, antecedents = rows[matched], depths[matched], ends[matched], antecedents[matched]
+    different = codes[_ranges(indptr[rows], ends)] != codes[_ranges(indptr[antecedents], indptr[antecedents] + depths)]
+    matched = np.bincount(np.repeat(np.arange(len(rows)), depths), different, minlength=len(rows)) == 0
+    rows, depths, antecedents = rows[matched], depths[matched], antecedents[matched]
+
+    confidence = supports[rows] / supports[antecedents]
+    confident = confidence >= min_confidence
+    return rows[confident], depths[confident], confidence[confident]
+
+
+def _rule_chunk_worker(rows: np.ndarray, depths: np.ndarray,
+                       min_confidence: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """ Process a chunk of candidate rules with the tables of the worker process """
+    return _rule_chunk(_rule_tables, rows, depths, min_confidence)
+
+
+class PatternSet:
+    """ Set of mined sequential patterns or episodes """
+
+    def __init__(self, patterns: List[Text], supports: List[int] = None, kind: Text = 'sequential',
+                 max_gap: int = None, max_window: float = None) -> None:
+        """ Initialize Object
+
+        :param patterns: Patterns in the format of the output dataframes, such as 'a b -> c'
+        :param supports (optional): Corresponding supports
+        :param kind: 'sequential' for sequential patterns or 'episode' for episodes. Default = 'sequential'
+        :param max_gap (optional): maximum gap between consecutive itemsets of sequential patterns, as in SPAM.
+            1 means consecutive itemsets. Default = +inf
+        :param max_window: maximum window length of episodes, as in EMMA and TKE. Required for episodes
+        """
+        if kind not in ('sequential', 'episode'):
+            raise ValueError(f"kind must be 'sequential' or 'episode', got {kind}")
+        if kind == 'episode' and max_window is None:
+            raise ValueError('max_window is required for episodes')
+
+        self.patterns = [parse_pattern(pattern) for pattern in patterns]
+        self.supports = list(supports) if supports is not None else None
+        self.kind = kind
+        self.max_gap = max_gap
+        self.max_window = max_window
+
+    @classmethod
+    def from_dataframe(cls, output_df: pd.DataFrame, **kwargs) -> 'PatternSet':
+        """ Create a pattern set from the output dataframe of a mining algorithm
+
+        :param output_df: Output dataframe of a Sequential Pattern Mining or Episode Mining algorithm
+        :param kwargs: Keyword arguments to PatternSet (max_gap, max_window)
+        :return: Pattern set
+        """
+        kind = 'sequential' if SEQUENTIAL_COLUMN in output_df else 'episode'
+        column = SEQUENTIAL_COLUMN if kind == 'sequential' else EPISODE_COLUMN
+        return cls(output_df[column].to_list(), output_df['Support'].to_list(), kind=kind, **kwargs)
+
+    @property
+    def column(self) -> Text:
+        """ Name of the pattern column of the output dataframes """
+        return SEQUENTIAL_COLUMN if self.kind == 'sequential' else EPISODE_COLUMN
+
+    def __len__(self) -> int:
+        """ Number of patterns """
+        return len(self.patterns)
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """ Create a dataframe in the format of the mining algorithms output
+
+        :return: Dataframe containing patterns and corresponding support
+        """
+        patterns = [format_pattern(pattern) for pattern in self.patterns]
+        return pd.DataFrame((patterns, self.supports), index=[self.column, 'Support']).T
+
+    def _subset(self, keep: List[bool]) -> 'PatternSet':
+        """ Copy of the pattern set with the selected patterns """
+        subset = copy.copy(self)
+        subset.patterns = [pattern for pattern, selected in zip(self.patterns, keep) if selected]
+        if self.supports is not None:
+            subset.supports = [support for support, selected in zip(self.supports, keep) if selected]
+        return subset
+
+    def _check_closure(self) -> None:
+        """ Closed and maximal patterns are found among sequential patterns without gap constraint """
+        if self.kind != 'sequential' or self.max_gap is not None:
+            raise ValueError('Closed and maximal patterns require sequential patterns without max_gap')
+
+    def to_closed(self) -> 'PatternSet':
+        """ Keep the closed patterns, which have no super-pattern with the same support, as ClaSP.
+            The pattern set must contain every frequent pattern, as the output of PrefixSpan, SPADE or SPAM.
+            A super-pattern with the same support then implies one with a single item more, so each pattern
+            is only looked up among the sub-patterns of the patterns with one item more and the same support.
+
+        :return: Pattern set of the closed patterns
+        """
+        self._check_closure()
+        if self.supports is None:
+            raise ValueError('Closed patterns require the supports of the patterns')
+
+        supports = [int(support) for support in self.supports]
+        covered = {(sub, support) for pattern, support in zip(self.patterns, supports) for sub in sub_patterns(pattern)}
+        return self._subset([(pattern, support) not in covered for pattern, support in zip(self.patterns, supports)])
+
+    def to_maximal(self) -> 'PatternSet':
+        """ Keep the maximal patterns, which have no frequent super-pattern, as VMSP.
+            The pattern set must contain every frequent pattern, as the output of PrefixSpan, SPADE or SPAM.
+            A frequent super-pattern then implies one with a single item more.
+
+        :return: Pattern set of the maximal patterns
+        """
+        self._check_closure()
+        covered = {sub for pattern in self.patterns for sub in sub_patterns(pattern)}
+        return self._subset([pattern not in covered for pattern in self.patterns])
+
+    def generate_rules(self, min_confidence: float, max_consequent: int = None, chunk_size: int = 10_000_000,
+                       max_workers: int = None) -> pd.DataFrame:
+        """ Generate the sequential rules prefix ==> suffix of the patterns, without mining the data again.
+            The antecedent is the first itemsets of a pattern and the consequent the other itemsets, and the
+            confidence of a rule is the support of the pattern divided by the support of its antecedent.
+            The support of every antecedent is in the pattern set when it contains every frequent pattern,
+            as the output of PrefixSpan, SPADE or SPAM. Rules whose antecedent is absent are skipped.
+
+        :param min_confidence: Minimum confidence of the rules, between 0 and 1
+        :param max_consequent (optional): Maximum number of items in the consequent of the rules. Default = +inf
+        :param chunk_size: Number of candidate rules processed by each parallel process. Default = 10000000
+        :param max_workers: Maximum number of parallel processes. Default = number of CPUs
+        :return: Dataframe containing the antecedent, consequent, support and confidence of each rule
+        """
+        if self.kind != 'sequential':
+            raise ValueError('Sequential rules require sequential patterns')
+        if self.supports is None:
+            raise ValueError('Sequential rules require the supports of the patterns')
+
+        # Patterns as integer tuples of itemset codes
+        codes, itemsets = pd.factorize(pd.Series(list(chain.from_iterable(self.patterns)), dtype=object))
+        codes = codes.astype(np.int64)
+        counts = np.fromiter(map(len, self.patterns), dtype=np.int64, count=len(self))
+        indptr = np.r_[0, np.cumsum(counts)]
+        positions = np.arange(len(codes)) - np.repeat(indptr[:-1], counts)
+        hashes = _hash_prefixes(codes, positions, indptr)
+        hash_order = np.argsort(hashes[indptr[1:] - 1], kind='stable') if len(self) else np.empty(0, dtype=np.int64)
+
+        tables = {
+            'codes': codes,
+            'indptr': indptr,
+            'supports': np.asarray(self.supports, dtype=np.float64),
+            'hashes': hashes,
+            'hash_order': hash_order,
+            'sorted_hashes': hashes[indptr[1:] - 1][hash_order],
+        }
+
+        # Candidate rules: every split of a pattern between two itemsets, with a small enough consequent
+        rows = np.repeat(np.arange(len(self)), np.maximum(counts - 1, 0))
+        depths = _ranges(np.ones(len(self), dtype=np.int64), counts)
+        if max_consequent is not None:
+            items = np.cumsum(np.fromiter(map(len, itemsets), dtype=np.int64, count=len(itemsets))[codes])
+            consequent = items[indptr[rows + 1] - 1] - items[indptr[rows] + depths - 1]
+            rows, depths = rows[consequent <= max_consequent], depths[consequent <= max_consequent]
+
+        chunks = [(rows[start:start + chunk_size], depths[start:start + chunk_size])
+                  for start in range(0, len(rows), chunk_size)]
+        if len(chunks) <= 1:
+            results = [_rule_chunk(tables, *chunk, min_confidence) for chunk in chunks]
+        else:
+            with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_rule_tables,
+                                     initargs=(tables,)) as executor:
+                futures = [executor.submit(_rule_chunk_worker, *chunk, min_confidence) for chunk in chunks]
+                results = [future.result() for future in futures]
+
+        rows, depths, confidence = (np.concatenate(arrays) for arrays in zip(*results)) if results \
+            else (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0))
+
+        # The antecedent and consequent are split from the formatted pattern at the end of the antecedent
+        texts = [' '.join(itemset) for itemset in itemsets]
+        characters = np.cumsum(np.fromiter(map(len, texts), dtype=np.int64, count=len(texts))[codes])
+        patterns = {row: ' -> '.join([texts[code] for code in codes[indptr[row]:indptr[row + 1]].tolist()])
+                    for row in np.unique(rows).tolist()}
+        ends = (characters[indptr[rows] + depths - 1] - np.r_[0, characters][indptr[rows]] + 4 * (depths - 1)).tolist()
+        rows = rows.tolist()
+        return pd.DataFrame({
+            'Antecedent': [patterns[row][:end] for row, end in zip(rows, ends)],
+            'Consequent': [patterns[row][end + 4:] for row, end in zip(rows, ends)],
+            'Support': [self.supports[row] for row in rows],
+            'Confidence': confidence,
+        })
+
+    def _vocabulary(self) -> Dict[Text, int]:
+        """ Code of each item appearing in the patterns """
+        items = sorted({item for pattern in self.patterns for itemset in pattern for item in itemset})
+        return {item: code for code, item in enumerate(items)}
+
+    def _encode_patterns(self, vocabulary: Dict[Text, int]) -> List[List[np.ndarray]]:
+        """ Encode the patterns as lists of item code arrays """
+        return [[np.array([vocabulary[item] for item in itemset]) for itemset in pattern] for pattern in self.patterns]
+
+    def _sequential_chunks(self, input_df: pd.DataFrame, vocabulary: Dict[Text, int], chunk_size: int) -> List[Dict]:
+        """ Split a sequence database in chunks of whole sequences, with the arrays to build their inverted index """
+        sequence = input_df.groupby('ID').ngroup().to_numpy()
+        itemset = input_df.groupby(['ID', 'Time Points']).ngroup().to_numpy()
+        codes = input_df['Items'].astype(str).map(vocabulary).fillna(-1).to_numpy(dtype=np.int64)
+
+        itemset_sequence = np.zeros(itemset.max() + 1 if len(itemset) else 0, dtype=np.int64)
+        itemset_sequence[itemset] = sequence
+
+        chunks = []
+        for first in range(0, sequence.max() + 1 if len(sequence) else 0, chunk_size):
+            rows = (sequence >= first) & (sequence < first + chunk_size)
+            chunks.append({'index': {
+                'codes': codes[rows],
+                'positions': itemset[rows],
+                'position_group': itemset_sequence,
+            }})
+
+        return chunks
+
+    def _episode_chunks(self, input_df: pd.DataFrame, vocabulary: Dict[Text, int], chunk_size: int) -> List[Dict]:
+        """ Split an event sequence in chunks of time points, overlapping by max_window, with the arrays to build
+            their inverted index
+        """
+        df = input_df if 'Time points' in input_df else input_df.reset_index(names='Time points')
+        df = df.reset_index(drop=True)
+        items = df['Itemset'].astype(str).str.split().explode()
+        time = pd.to_numeric(df['Time points']).to_numpy()[items.index]
+        codes = items.map(vocabulary).fillna(-1).to_numpy(dtype=np.int64)
+
+        times = np.unique(time)
+        positions = np.searchsorted(times, time)
+
+        chunks = []
+        for first in range(0, len(times), chunk_size):
+            start = times[first]
+            end = times[first + chunk_size] if first + chunk_size < len(times) else math.inf
+            rows = (time >= start) & (time < end + self.max_window)
+            chunks.append({
+                'index': {'codes': codes[rows], 'positions': positions[rows], 'position_group': times},
+                'start': start,
+                'end': end,
+            })
+
+        return chunks
+
+    def count_support(self, input_df: pd.DataFrame, chunk_size: int = 50_000, max_workers: int = None) -> pd.DataFrame:
+        """ Count the support of the patterns in new data, without mining it
+
+        :param input_df: Input Dataframe in the format of the mining algorithms. For sequential patterns, with
+            Sequence IDs in 'ID' column, time in 'Time Points' column and items in 'Items' column. For episodes,
+            with Itemsets in 'Itemset' column and time in 'Time points' column (row number if absent).
+        :param chunk_size: Number of sequences, or time points for episodes, counted by each parallel process.
+            Default = 50000
+        :param max_workers: Maximum number of parallel processes. Default = number of CPUs
+        :return: Dataframe containing the patterns and their support in the input dataframe
+        """
+        vocabulary = self._vocabulary()
+        patterns = self._encode_patterns(vocabulary)
+        chunks = self._sequential_chunks(input_df, vocabulary, chunk_size) if self.kind == 'sequential' \
+            else self._episode_chunks(input_df, vocabulary, chunk_size)
+
+        if len(chunks) <= 1:
+            supports = [_count_chunk(self.kind, chunk, patterns, self.max_gap, self.max_window) for chunk in chunks]
+        else:
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                futures = [executor.submit(_count_chunk, self.kind, chunk, patterns, self.max_gap, self.max_window)
+                           for chunk in chunks]
+                supports = [future.result() for future in futures]
+
+        counted = copy.copy(self)
+        counted.supports = np.sum(supports, axis=0).tolist() if supports else [0] * len(self)
+        return counted.to_dataframe()
+
+
+class SequenceIndex:
+    """ Sparse pattern to sequence index, stored in the CSR format of a patterns x sequences matrix.
+        Row i holds the sequences supporting the pattern in row i of the output dataframe.
+    """
+
+    def __init__(self, indptr: np.ndarray, indices: np.ndarray, labels: np.ndarray) -> None:
+        """ Initialize Object
+
+        :param indptr: Start of the sequences of each pattern in indices, plus the number of pattern-sequence pairs
+        :param indices: Sorted positions of the sequences of each pattern
+        :param labels: Original 'ID' label of each sequence position
+        """
+        self.indptr = indptr
+        self.indices = indices
+        self.labels = labels
+        self._transpose = None
+
+    @classmethod
+    def from_lists(cls, sequence_ids: List[Text], labels: np.ndarray) -> 'SequenceIndex':
+        """ Build the index from the sequence positions printed by SPMF
+
+        :param sequence_ids: Space separated sequence positions of each pattern
+        :param labels: Original 'ID' label of each sequence position
+        :return: Sequence index
+        """
+        counts = np.fromiter((len(ids.split()) for ids in sequence_ids), dtype=np.int64, count=len(sequence_ids))
+        indices = np.array(' '.join(sequence_ids).split(), dtype=np.int32)
+        return cls(np.r_[0, np.cumsum(counts)], indices, labels)
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        """ Number of patterns and number of sequences """
+        return len(self.indptr) - 1, len(self.labels)
+
+    def __len__(self) -> int:
+        """ Number of patterns """
+        return len(self.indptr) - 1
+
+    def sequences(self, row: int) -> np.ndarray:
+        """ Labels of the sequences supporting a pattern
+
+        :param row: Row of the pattern in the output dataframe
+        :return: Array of 'ID' labels
+        """
+        return self.labels[self.indices[self.indptr[row]:self.indptr[row + 1]]]
+
+    def patterns(self, label) -> np.ndarray:
+        """ Patterns supported by a sequence
+
+        :param label: 'ID' label of the sequence
+        :return: Array of rows of the output dataframe
+        """
+        if self._transpose is None:
+            # CSC format of the same matrix, built on the first lookup by sequence
+            rows = np.repeat(np.arange(len(self), dtype=np.int32), np.diff(self.indptr))
+            order = np.argsort(self.indices, kind='stable')
+            indptr = np.r_[0, np.cumsum(np.bincount(self.indices, minlength=len(self.labels)))]
+            self._transpose = (indptr, rows[order], pd.Index(self.labels))
+
+        indptr, rows, labels = self._transpose
+        position = labels.get_loc(label)
+        return rows[indptr[position]:indptr[position + 1]]
+
+    def take(self, rows: np.ndarray) -> 'SequenceIndex':
+        """ Index of a subset of the patterns
+
+        :param rows: Rows of the patterns to keep, in their new order
+        :return: Sequence index
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        starts, ends = self.indptr[rows], self.indptr[rows + 1]
+        return SequenceIndex(np.r_[0, np.cumsum(ends - starts)], self.indices[_ranges(starts, ends)], self.labels)
+
+    def to_scipy(self) -> Any:
+        """ Convert the index to a SciPy sparse matrix of ones. Requires scipy
+
+        :return: Patterns x sequences CSR matrix
+        """
+        try:
+            from scipy.sparse import csr_matrix
+        except ImportError:
+            raise ImportError('scipy is required to convert the sequence index to a sparse matrix')
+
+        return csr_matrix((np.ones(len(self.indices), dtype=np.int8), self.indices, self.indptr), shape=self.shape)
@@ -0,0 +1,289 @@
+""" Lazy Mining Pipelines with Stage-level Caching
+
+A pipeline records its stages without running them:
+    load -> apply (filters) -> encode -> run -> decode -> apply (post-processing)
+encode, run and decode are the steps of Spmf.run_pandas: _parse_input_dataframe, run with _parse_output_file,
+and _create_output_dataframe. Each stage is identified by a fingerprint of its function, its parameters and
+the fingerprints of its inputs. When a stage and its upstream stages are unchanged, its result is read from the
+cache instead of being computed again, and its upstream stages are not computed at all.
+
+compute() runs the stages missing from the cache level by level, the independent stages of a level (such as
+several algorithms mining one encoding) in parallel threads, like Spmf.run_many.
+"""
+
+import copy
+import hashlib
+import os
+import pickle
+import re
+import time
+import types
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Text, Tuple
+
+import pandas as pd
+
+from spmf.base import Spmf
+
+# Name of the pickled result of a stage in the cache directory, from the fingerprint of the stage
+CACHE_FILE = re.compile(r'[0-9a-f]{64}\.stage\.pkl')
+
+
+def fingerprint(value: Any) -> Text:
+    """ Fingerprint of a value, equal for equal dataframes, functions with the same code, and equal parameters
+
+    :param value: Dataframe, function, algorithm, or picklable value
+    :return: Hexadecimal SHA-256 digest
+    """
+    digest = hashlib.sha256()
+
+    def update(value: Any) -> None:
+        digest.update(type(value).__qualname__.encode())
+        if isinstance(value, (pd.DataFrame, pd.Series)):
+            digest.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+            frame = value.to_frame() if isinstance(value, pd.Series) else value
+            update([str(column) for column in frame.columns])
+            update([str(dtype) for dtype in frame.dtypes])
+        elif isinstance(value, (list, tuple)):
+            for item in value:
+                update(item)
+        elif isinstance(value, dict):
+            for key in sorted(value, key=repr):
+                update(key)
+                update(value[key])
+        elif isinstance(value, types.CodeType):
+            digest.update(value.co_code)
+            update([const for const in value.co_consts])
+            update(list(value.co_names))
+        elif isinstance(value, (types.FunctionType, types.MethodType)):
+            function = getattr(value, '__func__', value)
+            digest.update(f'{function.__module__}.{function.__qualname__}'.encode())
+            update(function.__code__)
+            update(list(function.__defaults__ or ()))
+            update([cell.cell_contents for cell in function.__closure__ or ()])
+            if isinstance(value, types.MethodType):
+                update(value.__self__)
+        elif isinstance(value, Spmf):
+            update(sorted((key, item) for key, item in vars(value).items() if key != 'output_file_name'))
+        else:
+            try:
+                digest.update(pickle.dumps(value))
+            except (pickle.PicklingError, TypeError, AttributeError):
+                digest.update(repr(value).encode())
+
+    update(value)
+    return digest.hexdigest()
+
+
+def _encode(algorithm: Spmf, input_df: pd.DataFrame) -> Tuple[Text, Dict[Text, Any]]:
+    """ Encode an input dataframe in the SPMF format of an algorithm
+
+    :param algorithm: SPMF algorithm object
+    :param input_df: Input Dataframe
+    :return: Tuple of the input text, and the attributes set by the encoding, such as the mapping of the items
+    """
+    encoder = copy.deepcopy(algorithm)
+    before = dict(vars(encoder))
+    text = encoder._parse_input_dataframe(input_df)
+    return text, {key: value for key, value in vars(encoder).items() if key not in before or before[key] is not value}
+
+
+def _run(algorithm: Spmf, encoded: Tuple[Text, Dict[Text, Any]]) -> Tuple:
+    """ Run an algorithm on an encoded input, and parse its output file """
+    text, state = encoded
+    job = algorithm._copy()
+    vars(job).update(state)
+    input_file = job._create_temp_file(input=text)
+    try:
+        job.run(input_file.name)
+    finally:
+        job._delete_temp_file(input_file)
+    return job._parse_output_file(delete=True)
+
+
+def _decode(algorithm: Spmf, encoded: Tuple[Text, Dict[Text, Any]], parsed: Tuple) -> pd.DataFrame:
+    """ Create the output dataframe of parsed patterns, with the mapping of the encoding """
+    job = copy.copy(algorithm)
+    vars(job).update(encoded[1])
+    return job._create_output_dataframe(*parsed)
+
+
+class Stage:
+    """ Lazy result of a stage of a pipeline """
+
+    def __init__(self, pipeline: 'Pipeline', name: Text, function: Callable, inputs: List['Stage'],
+                 key: Text) -> None:
+        """ Initialize Object
+
+        :param pipeline: Pipeline holding the cache of the stage
+        :param name: Name of the stage, for the log
+        :param function: Function computing the result of the stage from the results of its inputs
+        :param inputs: Upstream stages
+        :param key: Fingerprint of the stage, its parameters and its upstream stages
+        """
+        self.pipeline = pipeline
+        self.name = name
+        self.function = function
+        self.inputs = inputs
+        self.key = key
+
+    def _then(self, name: Text, function: Callable, inputs: List['Stage'], *parameters: Any) -> 'Stage':
+        """ Create a downstream stage """
+        key = fingerprint([name, *parameters, [stage.key for stage in inputs]])
+        return Stage(self.pipeline, name, function, inputs, key)
+
+    def apply(self, function: Callable, *args, **kwargs) -> 'Stage':
+        """ Add a stage calling function(result, *args, **kwargs), such as a filter of the input dataframe or
+            a ranking of the output dataframe. The result must not be modified in place, since it may be cached
+
+        :param function: Function of the result of this stage
+        :return: Stage
+        """
+        return self._then(getattr(function, '__name__', 'apply'), lambda result: function(result, *args, **kwargs),
+                          [self], function, args, kwargs)
+
+    def encode(self, algorithm: Spmf) -> 'Stage':
+        """ Add a stage encoding the input dataframe for an algorithm. Algorithms whose encoding parameters are
+            equal share the stage
+
+        :param algorithm: SPMF algorithm object
+        :return: Stage
+        """
+        encoding = (type(algorithm)._transform_input_dataframe.__qualname__
+                    if hasattr(algorithm, '_transform_input_dataframe') else None,
+                    type(algorithm)._parse_input_dataframe.__qualname__,
+                    [getattr(algorithm, name, None) for name in algorithm.ENCODING_ATTRIBUTES])
+        return self._then('encode', lambda input_df: _encode(algorithm, input_df), [self], encoding)
+
+    def mine(self, algorithm: Spmf) -> 'Stage':
+        """ Add the stages encoding the input dataframe, running an algorithm on it and decoding its output.
+            Equivalent to algorithm.run_pandas(input_df) for the frequent pattern mining algorithms. The input
+            is not prefiltered, which does not change the output
+
+        :param algorithm: SPMF algorithm object
+        :return: Stage of the output dataframe
+        """
+        if not isinstance(algorithm, Spmf):
+            raise TypeError(f'Pipelines run SPMF algorithms, got {type(algorithm).__name__}')
+        if getattr(algorithm, 'required_items', None) or getattr(algorithm, 'approximate', False):
+            raise ValueError('required_items and approximate mining are only supported by run_pandas')
+        algorithm = copy.deepcopy(algorithm)
+
+        encoded = self.encode(algorithm)
+        arguments = copy.copy(algorithm)
+        arguments.output_file_name = 'output'
+        parsed = encoded._then('run', lambda encoded: _run(algorithm, encoded), [encoded], type(algorithm).__name__,
+                               arguments._create_subprocess_arguments('input'))
+        return parsed._then('decode', lambda encoded, parsed: _decode(algorithm, encoded, parsed),
+                            [encoded, parsed], type(algorithm)._create_output_dataframe.__qualname__)
+
+    def compute(self) -> Any:
+        """ Compute the result of the stage, with the upstream stages missing from the cache
+
+        :return: Result of the stage
+        """
+        return self.pipeline.compute(self)[0]
+
+
+class Pipeline:
+    """ Lazy pipeline of mining stages, with a cache of their results """
+
+    def __init__(self, cache_dir: Text = None, max_workers: int = None) -> None:
+        """ Initialize Object
+
+        :param cache_dir (optional): Directory where the results of the stages are pickled, to reuse them across
+            sessions. Default = None, results are only cached in memory
+        :param max_workers (optional): Maximum number of stages computed at the same time. Default = number of CPUs,
+            as in Spmf.run_many
+        """
+        self.cache_dir = cache_dir
+        self.max_workers = max_workers
+        self.cache: Dict[Text, Any] = {}
+        self.log: List[Dict[Text, Any]] = []   # name, key, status and duration of the stages of the last compute
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def load(self, source: Any, *args, **kwargs) -> Stage:
+        """ Create the first stage of a pipeline
+
+        :param source: Input Dataframe, or function returning it when called with args and kwargs, such as
+            pd.read_csv. A function is fingerprinted with its arguments, not with the data it reads
+        :return: Stage
+        """
+        if callable(source):
+            function = getattr(source, '__name__', 'load')
+            return Stage(self, function, lambda: source(*args, **kwargs), [],
+                         fingerprint(['load', source, args, kwargs]))
+        return Stage(self, 'load', lambda: source, [], fingerprint(['load', source]))
+
+    def _path(self, key: Text) -> Text:
+        """ Path of the pickled result of a stage """
+        return os.path.join(self.cache_dir, f'{key}.stage.pkl')
+
+    def _cached(self, key: Text) -> bool:
+        """ Whether the result of a stage is in the memory or disk cache """
+        return key in self.cache or bool(self.cache_dir and os.path.exists(self._path(key)))
+
+    def _get(self, key: Text) -> Any:
+        """ Read the result of a stage from the cache """
+        if key not in self.cache:
+            with open(self._path(key), 'rb') as fp:
+                self.cache[key] = pickle.load(fp)
+        return self.cache[key]
+
+    def _put(self, key: Text, result: Any) -> None:
+        """ Write the result of a stage to the cache """
+        self.cache[key] = result
+        if self.cache_dir:
+            with open(self._path(key), 'wb') as fp:
+                pickle.dump(result, fp)
+
+    def compute(self, *stages: Stage) -> List[Any]:
+        """ Compute the results of stages, with the upstream stages missing from the cache.
+            The stages are computed by levels of their depth, and the stages of a level in parallel
+
+        :param stages: Stages of this pipeline
+        :return: List of the results, in the same order as the stages
+        """
+        # Cached stages are read as they are, so their upstream stages are not needed
+        levels: Dict[Text, int] = {}
+        needed: Dict[Text, Stage] = {}
+
+        def visit(stage: Stage) -> int:
+            if stage.key not in levels:
+                needed[stage.key] = stage
+                upstream = [] if self._cached(stage.key) else stage.inputs
+                levels[stage.key] = 1 + max((visit(upstream_stage) for upstream_stage in upstream), default=-1)
+            return levels[stage.key]
+
+        for stage in stages:
+            if stage.pipeline is not self:
+                raise ValueError('The stage belongs to another pipeline')
+            visit(stage)
+
+        self.log = []
+
+        def run(stage: Stage) -> Dict[Text, Any]:
+            start = time.perf_counter()
+            if self._cached(stage.key):
+                self._get(stage.key)
+                status = 'cached'
+            else:
+                self._put(stage.key, stage.function(*[self.cache[upstream.key] for upstream in stage.inputs]))
+                status = 'computed'
+            return {'name': stage.name, 'key': stage.key, 'status': status, 'seconds': time.perf_counter() - start}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers or os.cpu_count()) as executor:
+            for level in range(max(levels.values(), default=-1) + 1):
+                self.log += executor.map(run, [stage for key, stage in needed.items() if levels[key] == level])
+        return [self.cache[stage.key] for stage in stages]
+
+    def clear(self) -> None:
+        """ Remove the results of the stages from the memory and disk caches. Other files of the cache directory
+            are kept
+        """
+        if self.cache_dir:
+            for name in os.listdir(self.cache_dir):
+                if CACHE_FILE.fullmatch(name):
+                    os.remove(os.path.join(self.cache_dir, name))
+        self.cache.clear()
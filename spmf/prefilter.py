@@ -0,0 +1,113 @@
+""" Lossless Prefiltering of Infrequent Items
+
+An item less frequent than the minimum support cannot be in a frequent pattern, so it can be dropped
+before the input is serialized for SPMF. Long-tail data, such as click streams, shrinks considerably.
+Likewise, a sequence without all the required items cannot support a pattern containing them.
+"""
+
+import math
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+# Safety margin so that float rounding never raises the absolute threshold computed by SPMF
+THRESHOLD_MARGIN = 1 - 1e-9
+
+
+def rescale_min_support(min_support: float, n_sequences: int, n_kept: int) -> float:
+    """ Relative minimum support giving the same absolute threshold once sequences are dropped
+
+    :param min_support: minimum support, as a fraction of the sequences
+    :param n_sequences: number of sequences in the input
+    :param n_kept: number of sequences left after prefiltering
+    :return: minimum support, as a fraction of the sequences left
+    """
+    return math.ceil(min_support * n_sequences) / n_kept * THRESHOLD_MARGIN
+
+
+def filter_sequences(input_df: pd.DataFrame, min_count: int, keep_itemsets: bool = False,
+                     keep_sequences: bool = False) -> pd.DataFrame:
+    """ Drop the items contained in fewer than min_count sequences
+
+    :param input_df: Input Dataframe containing Sequence IDs in 'ID' column, time in
+        'Time Points' column and items in 'Items' column.
+    :param min_count: minimum support, as a number of sequences
+    :param keep_itemsets: Keep one item of the itemsets left empty, for gap constraints which count itemsets
+    :param keep_sequences: Keep one item of the sequences left empty, for algorithms which depend on the
+        number of sequences
+    :return: Filtered dataframe
+    """
+    supports = input_df.drop_duplicates(['ID', 'Items'])['Items'].value_counts()
+    keep = input_df['Items'].isin(supports.index[supports >= min_count])
+
+    for columns, enabled in [(['ID', 'Time Points'], keep_itemsets), (['ID'], keep_sequences)]:
+        if enabled:
+            empty = ~keep.groupby([input_df[column] for column in columns]).transform('any')
+            keep |= empty & ~input_df.duplicated(columns)
+
+    return input_df[keep]
+
+
+def filter_required_items(input_df: pd.DataFrame, items: List) -> pd.DataFrame:
+    """ Drop the sequences which do not contain every required item
+
+    :param input_df: Input Dataframe containing Sequence IDs in 'ID' column and items in 'Items' column
+    :param items: Required items
+    :return: Filtered dataframe
+    """
+    required = set(map(str, items))
+    labels = input_df['Items'].astype(str)
+    found = labels.where(labels.isin(required)).groupby(input_df['ID']).transform('nunique')
+    return input_df[found == len(required)]
+
+
+def contains_items(patterns: pd.Series, items: List) -> pd.Series:
+    """ Check which patterns contain every required item
+
+    :param patterns: Patterns, as space separated items and ' -> ' separated itemsets
+    :param items: Required items
+    :return: Boolean Series with the index of the patterns
+    """
+    required = set(map(str, items))
+    tokens = patterns.astype(str).str.split().explode()
+    found = tokens[tokens.isin(required)].groupby(level=0).nunique()
+    return found.reindex(patterns.index, fill_value=0) == len(required)
+
+
+def filter_events(input_df: pd.DataFrame, min_support: int, max_window: int, split_itemsets: bool) -> pd.DataFrame:
+    """ Drop the items which cannot be in an episode with a head support of at least min_support.
+        An occurrence of an item at time u is within the window of heads at time points in [u - max_window, u],
+        so an item whose occurrences are within the window of fewer than min_support time points is dropped.
+
+    :param input_df: Input Dataframe containing Itemsets in 'Itemset' column and time in 'Time points' column
+    :param min_support: minimum support, as a number of time points
+    :param max_window: maximum window length
+    :param split_itemsets: Set to True if the 'Itemset' column contains space separated items, False if it
+        contains one item per row
+    :return: Filtered dataframe
+    """
+    df = input_df.reset_index(drop=True)
+    items = df['Itemset'].astype(str).str.split().explode().dropna() if split_itemsets else df['Itemset']
+    codes, uniques = pd.factorize(items)
+    time = pd.to_numeric(df['Time points']).to_numpy()
+    times = np.unique(time)
+
+    # Occurrences sorted by item and time
+    item_time = time[items.index.to_numpy()]
+    order = np.lexsort((item_time, codes))
+    codes, item_time = codes[order], item_time[order]
+
+    # Union of the time point ranges of the occurrences of each item, which are sorted by time
+    low = np.searchsorted(times, item_time - max_window, 'left')
+    high = np.searchsorted(times, item_time, 'right')
+    previous_high = np.zeros(len(high), dtype=high.dtype)
+    previous_high[1:] = np.where(codes[1:] == codes[:-1], high[:-1], 0)
+    supports = np.bincount(codes, weights=np.maximum(high - np.maximum(low, previous_high), 0), minlength=len(uniques))
+
+    frequent = items.isin(uniques[supports >= min_support]).to_numpy()
+    if not split_itemsets:
+        return input_df[frequent]
+
+    kept = items[frequent].groupby(level=0).agg(' '.join)
+    return input_df.iloc[kept.index].assign(Itemset=kept.to_numpy())
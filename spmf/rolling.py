@@ -0,0 +1,205 @@
+""" Rolling Time Window Mining
+
+The input is split into time buckets, such as days, and mined over windows of consecutive buckets.
+Each bucket is encoded once, and a window is only mined again when one of its buckets changed.
+
+For frequent sequential pattern algorithms, a pattern frequent in a window is frequent in at least one of
+its buckets, since the sequences of the buckets are disjoint. Each bucket is then mined once, and the
+support of a pattern in a window is the sum of its supports in the buckets.
+"""
+
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Hashable, List, Set, Text, Tuple, Union
+
+import pandas as pd
+
+from spmf.base import Spmf
+from spmf.episode import Episode, EpisodeRules
+from spmf.patterns import (SEQUENTIAL_COLUMN, Pattern, PatternSet,
+                           format_pattern, parse_pattern)
+from spmf.seq_pat import CMSPADE, SPADE, SPAM, PrefixSpan, SeqPat
+
+
+class Bucket:
+    """ Time bucket encoded in the SPMF format """
+
+    def __init__(self, input_df: pd.DataFrame, key: int, text: Text, n_sequences: int) -> None:
+        """ Initialize Object
+
+        :param input_df: Input Dataframe of the bucket
+        :param key: Hash of the input dataframe, which changes with the content of the bucket
+        :param text: Input of the bucket in the SPMF format, one line per sequence or time point
+        :param n_sequences: Number of sequences in the bucket
+        """
+        self.input_df = input_df
+        self.key = key
+        self.text = text
+        self.n_sequences = n_sequences
+        self.frequent: Set[Pattern] = None           # frequent patterns of the bucket
+        self.supports: Dict[Pattern, int] = {}       # supports of the frequent and counted patterns
+
+
+class RollingWindow:
+    """ Mine an algorithm over rolling windows of time buckets """
+
+    COMBINABLE_ALGORITHMS = (PrefixSpan, SPADE, CMSPADE, SPAM)
+
+    def __init__(self, algorithm: Spmf, window: int, step: int = 1, combine_buckets: bool = True,
+                 max_workers: int = None) -> None:
+        """ Initialize Object
+
+        :param algorithm: Sequential Pattern Mining or Episode Mining algorithm
+        :param window: number of buckets in a window
+        :param step: number of buckets between the ends of consecutive windows. Default = 1
+        :param combine_buckets: Mine each bucket once and sum the supports of the buckets, for PrefixSpan, SPADE,
+            CMSPADE and SPAM. Set to False when buckets are too small for the minimum support to prune,
+            to mine each window instead. Default = True
+        :param max_workers: Maximum number of SPMF processes running at the same time. Default = number of CPUs
+        """
+        if not isinstance(algorithm, (SeqPat, Episode)) or isinstance(algorithm, EpisodeRules):
+            raise TypeError(f'Rolling windows require a sequential pattern or episode mining algorithm, '
+                            f'got {type(algorithm).__name__}')
+        if getattr(algorithm, 'approximate', False):
+            raise ValueError('approximate mining is not supported by rolling windows')
+
+        self.algorithm = algorithm._copy()
+        if isinstance(algorithm, Episode):
+            self.algorithm.timestamp_present = True
+        self.window = window
+        self.step = step
+        self.combine_buckets = combine_buckets and isinstance(algorithm, self.COMBINABLE_ALGORITHMS)
+        self.max_workers = max_workers
+
+        self.codes: Dict[Text, int] = {}                        # item dictionary shared by the buckets
+        self.buckets: Dict[Hashable, Bucket] = {}
+        self.results: Dict[Tuple[int, ...], pd.DataFrame] = {}  # output of each window, by keys of its buckets
+        self.mined: List[Hashable] = []                         # windows mined by the last run
+
+    def _encode_items(self, items: pd.Series) -> pd.Series:
+        """ Encode items with the shared dictionary, adding the new items """
+        items = items.astype(str)
+        for item in items.drop_duplicates():
+            self.codes.setdefault(item, len(self.codes) + 1)
+        return items.map(self.codes)
+
+    def _encode_sequences(self, input_df: pd.DataFrame) -> Tuple[Text, int]:
+        """ Encode the sequences of a bucket
+
+        :return: Tuple of text in SPMF format and number of sequences
+        """
+        df = input_df.drop_duplicates(['ID', 'Time Points', 'Items'])
+        df = df.assign(Code=self._encode_items(df['Items'])).sort_values(['ID', 'Time Points', 'Code'])
+        itemsets = df.groupby(['ID', 'Time Points'], sort=False)['Code'].agg(lambda codes: ' '.join(map(str, codes)))
+        sequences = itemsets.groupby(level='ID', sort=False).agg(' -1 '.join)
+        return ''.join(f'{sequence} -1 -2\n' for sequence in sequences), len(sequences)
+
+    def _encode_events(self, input_df: pd.DataFrame) -> Tuple[Text, int]:
+        """ Encode the time points of a bucket
+
+        :return: Tuple of text in SPMF format and number of time points
+        """
+        items = input_df['Itemset'].astype(str).str.split().explode()
+        df = pd.DataFrame({'Time points': input_df['Time points'].loc[items.index], 'Code': self._encode_items(items)})
+        df = df.drop_duplicates().sort_values(['Time points', 'Code'])
+        itemsets = df.groupby('Time points')['Code'].agg(lambda codes: ' '.join(map(str, codes)))
+        return ''.join(f'{codes}|{time}\n' for time, codes in itemsets.items()), len(itemsets)
+
+    def _update_buckets(self, input_df: pd.DataFrame, labels: pd.Series) -> List[Hashable]:
+        """ Encode the new and changed buckets
+
+        :return: Sorted bucket labels
+        """
+        buckets = {}
+        for label, bucket_df in input_df.groupby(labels, sort=True):
+            key = int(pd.util.hash_pandas_object(bucket_df, index=False).sum())
+            bucket = self.buckets.get(label)
+            if bucket is None or bucket.key != key:
+                encode = self._encode_sequences if isinstance(self.algorithm, SeqPat) else self._encode_events
+                bucket = Bucket(bucket_df, key, *encode(bucket_df))
+            buckets[label] = bucket
+
+        self.buckets = buckets
+        return list(buckets)
+
+    def _mapping(self) -> Dict[Text, Text]:
+        """ Original value of each item code """
+        return {str(code): item for item, code in self.codes.items()}
+
+    def _mine_window(self, buckets: List[Bucket]) -> pd.DataFrame:
+        """ Mine the concatenated input of the buckets of a window """
+        output = self.algorithm._copy()._run_encoded(''.join(bucket.text for bucket in buckets), self._mapping())
+        # Items are sorted by name in itemsets, so that the patterns of windows with different codes are equal
+        column = output.columns[0]
+        output[column] = [format_pattern(parse_pattern(pattern)) for pattern in output[column]]
+        return output
+
+    def _mine_bucket(self, bucket: Bucket) -> None:
+        """ Mine the frequent patterns of a bucket """
+        if bucket.frequent is None:
+            output = self.algorithm._copy()._run_encoded(bucket.text, self._mapping())
+            bucket.supports = {parse_pattern(pattern): support for pattern, support in output.itertuples(index=False)}
+            bucket.frequent = set(bucket.supports)
+
+    def _count_bucket(self, bucket: Bucket, patterns: Set[Pattern]) -> None:
+        """ Count the support of the patterns not counted yet in a bucket """
+        missing = [pattern for pattern in patterns if pattern not in bucket.supports]
+        if missing:
+            pattern_set = PatternSet([format_pattern(pattern) for pattern in missing],
+                                     max_gap=getattr(self.algorithm, 'max_gap', None) or None)
+            bucket.supports.update(zip(missing, pattern_set.count_support(bucket.input_df)['Support']))
+
+    def _combine_window(self, buckets: List[Bucket]) -> pd.DataFrame:
+        """ Combine the supports of the buckets of a window """
+        min_count = math.ceil(self.algorithm.min_support * sum(bucket.n_sequences for bucket in buckets))
+        candidates = set().union(*(bucket.frequent for bucket in buckets))
+        supports = {pattern: sum(bucket.supports[pattern] for bucket in buckets) for pattern in candidates}
+
+        frequent = sorted((pattern, support) for pattern, support in supports.items() if support >= min_count)
+        return pd.DataFrame(
+            ([format_pattern(pattern) for pattern, _ in frequent], [support for _, support in frequent]),
+            index=[SEQUENTIAL_COLUMN, 'Support'],
+        ).T
+
+    def run_pandas(self, input_df: pd.DataFrame, bucket: Union[Text, pd.Series]) -> Dict[Hashable, pd.DataFrame]:
+        """ Mine every window of the input. Calling it again with updated data, such as a new day,
+            only mines the windows whose buckets changed.
+
+        :param input_df: Input Dataframe of the algorithm. Episodes need time in the 'Time points' column
+            NOTE: Every item of a sequence must be in the same bucket
+        :param bucket: Name of the column, or Series, with the bucket label of each row. Labels are sorted in time order
+        :return: Dictionary of the label of the last bucket of each window and the output dataframe of the window
+        """
+        labels = input_df[bucket] if isinstance(bucket, str) else bucket
+        if isinstance(self.algorithm, SeqPat) and (labels.groupby(input_df['ID']).nunique() > 1).any():
+            raise ValueError('Every item of a sequence must be in the same bucket')
+
+        labels = self._update_buckets(input_df, labels)
+        ends = list(range(self.window - 1, len(labels), self.step))
+        windows = {labels[end]: [self.buckets[label] for label in labels[end - self.window + 1:end + 1]]
+                   for end in ends}
+        changed = {end: buckets for end, buckets in windows.items()
+                   if tuple(bucket.key for bucket in buckets) not in self.results}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers or os.cpu_count()) as executor:
+            if self.combine_buckets:
+                new_buckets = {id(bucket): bucket for buckets in changed.values() for bucket in buckets}
+                list(executor.map(self._mine_bucket, new_buckets.values()))
+
+                # Every bucket counts the patterns frequent in another bucket of one of its windows
+                candidates = {key: set() for key in new_buckets}
+                for buckets in changed.values():
+                    patterns = set().union(*(bucket.frequent for bucket in buckets))
+                    for bucket in buckets:
+                        candidates[id(bucket)] |= patterns
+                list(executor.map(lambda key: self._count_bucket(new_buckets[key], candidates[key]), new_buckets))
+                outputs = list(map(self._combine_window, changed.values()))
+            else:
+                outputs = list(executor.map(self._mine_window, changed.values()))
+
+        keys = {end: tuple(bucket.key for bucket in buckets) for end, buckets in windows.items()}
+        results = dict(zip((keys[end] for end in changed), outputs))
+        self.results = {key: results[key] if key in results else self.results[key] for key in keys.values()}
+        self.mined = list(changed)
+        return {end: self.results[key] for end, key in keys.items()}
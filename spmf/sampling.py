@@ -0,0 +1,134 @@
+""" Approximate Sequential Pattern Mining on a Sample of Sequences
+
+The relative support of a pattern in a uniform sample of sequences estimates its support in the database.
+By Bernstein's inequality, the estimate of a pattern at the minimum support is within epsilon of its
+support with probability 1 - delta, for a sample size depending on epsilon, delta and the minimum support:
+    1. The sample is mined at min_support - epsilon, so that a frequent pattern is found with probability
+       at least 1 - delta.
+    2. Each pattern found carries an empirical Bernstein confidence interval of its support.
+    3. Optionally, the supports of the patterns found are counted in the whole database, which gives
+       their exact support and drops the infrequent ones.
+"""
+
+import copy
+import math
+from typing import Any, Tuple
+
+import numpy as np
+import pandas as pd
+
+from spmf.patterns import SEQUENTIAL_COLUMN, PatternSet
+from spmf.prefilter import THRESHOLD_MARGIN
+
+
+def _bernstein_error(variance: Any, sample_size: int, delta: float) -> Any:
+    """ Two-sided Bernstein bound of the error of a mean of sample_size values in [0, 1] """
+    log_term = math.log(2 / delta)
+    return np.sqrt(2 * variance * log_term / sample_size) + 2 * log_term / (3 * sample_size)
+
+
+def sample_size_for(epsilon: float, delta: float, min_support: float) -> int:
+    """ Number of sequences for an error below epsilon at the minimum support, with probability 1 - delta
+
+    :param epsilon: maximum error of the relative support
+    :param delta: probability of a larger error
+    :param min_support: minimum support, as a fraction of the sequences
+    :return: Sample size
+    """
+    # Bernstein's bound is a quadratic in 1 / sqrt(sample_size)
+    log_term = math.log(2 / delta)
+    a, b = 2 * log_term / 3, math.sqrt(2 * min_support * (1 - min_support) * log_term)
+    x = (-b + math.sqrt(b ** 2 + 4 * a * epsilon)) / (2 * a)
+    return math.ceil(1 / x ** 2)
+
+
+def epsilon_for(sample_size: int, delta: float, min_support: float) -> float:
+    """ Error of the relative support at the minimum support, with probability 1 - delta
+
+    :param sample_size: number of sequences in the sample
+    :param delta: probability of a larger error
+    :param min_support: minimum support, as a fraction of the sequences
+    :return: Maximum error epsilon
+    """
+    return float(_bernstein_error(min_support * (1 - min_support), sample_size, delta))
+
+
+def support_intervals(supports: np.ndarray, sample_size: int, delta: float) -> Tuple[np.ndarray, np.ndarray]:
+    """ Empirical Bernstein confidence intervals of relative supports (Maurer & Pontil, 2009)
+
+    :param supports: supports in the sample, as numbers of sequences
+    :param sample_size: number of sequences in the sample
+    :param delta: probability that a support is outside its interval
+    :return: Tuple of lower and upper bounds of the relative supports in the database
+    """
+    estimates = supports / sample_size
+    variance = estimates * (1 - estimates) * sample_size / max(sample_size - 1, 1)
+    log_term = math.log(2 / delta)
+    error = np.sqrt(2 * variance * log_term / sample_size) + 7 * log_term / (3 * max(sample_size - 1, 1))
+    return np.clip(estimates - error, 0, 1), np.clip(estimates + error, 0, 1)
+
+
+def sample_sequences(input_df: pd.DataFrame, sample_size: int, random_state: Any = None) -> pd.DataFrame:
+    """ Uniform sample of sequences, without replacement
+
+    :param input_df: Input Dataframe containing Sequence IDs in 'ID' column
+    :param sample_size: number of sequences in the sample
+    :param random_state (optional): Seed or numpy Generator
+    :return: Rows of the sampled sequences
+    """
+    ids = input_df['ID'].unique()
+    sampled = np.random.default_rng(random_state).choice(len(ids), size=min(sample_size, len(ids)), replace=False)
+    return input_df[input_df['ID'].isin(ids[sampled])]
+
+
+def run_approximate(algorithm: Any, input_df: pd.DataFrame) -> pd.DataFrame:
+    """ Mine a sample of the sequences with a frequent sequential pattern mining algorithm
+
+    :param algorithm: Algorithm with approximate, sample_size or epsilon, delta, verify and random_state attributes
+    :param input_df: Input Dataframe containing Sequence IDs in 'ID' column, time in
+        'Time Points' column and items in 'Items' column.
+    :return: Dataframe containing the patterns found, their estimated support and the bounds of its confidence
+        interval, as numbers of sequences of the database. Verified supports are exact, and so are their bounds.
+    """
+    if getattr(algorithm, 'show_seq_ids', False):
+        raise ValueError('show_seq_ids is not supported by approximate mining')
+
+    n_sequences = input_df['ID'].nunique()
+    min_support, delta = algorithm.min_support, algorithm.delta
+    sample_size = algorithm.sample_size or sample_size_for(algorithm.epsilon, delta, min_support)
+    epsilon = epsilon_for(sample_size, delta, min_support)
+
+    miner = copy.copy(algorithm)
+    miner.approximate = False
+    if sample_size < n_sequences:
+        if epsilon >= min_support:
+            raise ValueError(f'The error at the minimum support ({epsilon:.4g}) must be lower than min_support, '
+                             f'increase sample_size or epsilon')
+        input_sample = sample_sequences(input_df, sample_size, algorithm.random_state)
+        miner.min_support = (min_support - epsilon) * THRESHOLD_MARGIN
+    else:
+        input_sample, sample_size = input_df, n_sequences
+
+    output = miner.run_pandas(input_sample)
+    algorithm.mapping = miner.mapping
+    supports = pd.to_numeric(output['Support']).to_numpy(dtype=np.float64)
+
+    if sample_size == n_sequences:
+        lower = upper = supports
+    elif algorithm.verify:
+        pattern_set = PatternSet.from_dataframe(output, max_gap=getattr(algorithm, 'max_gap', None) or None)
+        supports = pd.to_numeric(pattern_set.count_support(input_df)['Support'])
+        frequent = (supports >= math.ceil(min_support * n_sequences)).to_numpy()
+        output, supports = output[frequent].reset_index(drop=True), supports.to_numpy(dtype=np.float64)[frequent]
+        lower = upper = supports
+    else:
+        lower, upper = support_intervals(supports, sample_size, delta)
+        lower, upper = np.floor(lower * n_sequences), np.ceil(upper * n_sequences)
+        supports = np.round(supports / sample_size * n_sequences)
+
+    return pd.DataFrame({
+        SEQUENTIAL_COLUMN: output[SEQUENTIAL_COLUMN].to_list(),
+        'Support': supports.astype(np.int64),
+        'Support lower': np.asarray(lower).astype(np.int64),
+        'Support upper': np.asarray(upper).astype(np.int64),
+    })
@@ -0,0 +1,87 @@
+""" Automatic Selection of a Frequent Sequential Pattern Mining Algorithm
+
+Which algorithm is fastest depends on the shape of the sequence database: pattern growth on projected
+databases (PrefixSpan) on sparse data, vertical id-lists (SPADE, CMSPADE) or bitmaps (SPAM) on dense data.
+The statistics of the input are binned on the edges of a decision table, calibrated by
+benchmarks/calibrate_selection.py and stored in selection_table.json. Each cell of the table holds the
+total mining time of each algorithm over the calibration runs which fell in the cell, relative to the
+fastest. Cells without calibration runs hold the runtimes of the nearest cell.
+"""
+
+import json
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Text
+
+import numpy as np
+
+from spmf.estimator import SequenceStatistics
+
+TABLE_PATH = Path(__file__).parent / 'selection_table.json'
+
+# Algorithms among which the decision table chooses, all returning the same frequent sequential patterns
+CANDIDATES = ['PrefixSpan', 'SPADE', 'CMSPADE', 'SPAM']
+
+
+class Selection(NamedTuple):
+    """ Algorithm chosen for an input, with the reason of the choice """
+
+    algorithm: Text
+    reason: Text
+    features: Dict[Text, float]
+    statistics: Optional[SequenceStatistics]
+
+
+@lru_cache(maxsize=1)
+def load_table() -> Dict[Text, Any]:
+    """ Load the calibrated decision table """
+    with open(TABLE_PATH, 'r') as fp:
+        return json.load(fp)
+
+
+def selection_features(statistics: SequenceStatistics) -> Dict[Text, float]:
+    """ Features of the decision table
+
+    :param statistics: Statistics of the sequence database
+    :return: Dictionary of density (mean fraction of the alphabet in a sequence), mean number of items per
+        itemset, and mean number of itemsets per sequence
+    """
+    return {
+        'density': statistics.density,
+        'itemset_size': statistics.n_occurrences / max(statistics.n_itemsets, 1),
+        'mean_length': statistics.mean_length,
+    }
+
+
+def cell_of(features: Dict[Text, float], edges: Dict[Text, Any]) -> Text:
+    """ Key of the cell of the decision table containing the features
+
+    :param features: Features of the decision table
+    :param edges: Bin edges of each feature
+    :return: Comma separated bin numbers, in the order of the edges
+    """
+    return ','.join(str(int(np.searchsorted(bounds, features[name], side='right'))) for name, bounds in edges.items())
+
+
+def select(statistics: SequenceStatistics, candidates: List[Text] = None) -> Selection:
+    """ Choose the fastest algorithm for a sequence database
+
+    :param statistics: Statistics of the sequence database
+    :param candidates (optional): Names of the algorithms to choose from. Default = CANDIDATES
+    :return: Selection
+    """
+    table = load_table()
+    features = selection_features(statistics)
+    cell = table['cells'][cell_of(features, table['edges'])]
+    runtimes = {name: ratio for name, ratio in cell['relative_runtime'].items() if name in (candidates or CANDIDATES)}
+    if not runtimes:
+        raise ValueError(f'No calibrated algorithm among {candidates}')
+
+    ranked = sorted(runtimes, key=runtimes.get)
+    fastest = runtimes[ranked[0]]
+    described = ', '.join(f'{name.replace("_", " ")} {value:.3g}' for name, value in features.items())
+    data = f"{cell['runs']} calibration runs on similar data" if cell['runs'] else 'the nearest calibrated data'
+    others = ', '.join(f'{name} x{runtimes[name] / fastest:.2f}' for name in ranked[1:])
+    reason = f"{described}: {ranked[0]} was the fastest on {data} ({cell['datasets']})" + \
+        (f', relative runtimes {others}' if others else '')
+    return Selection(ranked[0], reason, features, statistics)
@@ -1,17 +1,69 @@
 """ Sequential Pattern Mining """
 
+import inspect
+import io
+import math
+import os
 import re
-import warnings
-from typing import List, Text, Tuple
+import tempfile
+from typing import IO, Any, Callable, Iterable, List, Text, Tuple
 
+import numpy as np
 import pandas as pd
 
-from spmf.base import Spmf
+from spmf import estimator, ingest, native, prefilter, sampling, selection
+from spmf.base import CHUNK_LINES, Spmf
+from spmf.patterns import SequenceIndex
+
+# Input size up to which the native engine is faster than starting a Java VM.
+# Calibrated by benchmarks/calibrate_native.py on kosarak25k subsets, where the native engine is slower above 1.7 MB
+# at min_support = 0.005, and above 3.4 MB and 5.6 MB at 0.01 and 0.02
+NATIVE_MAX_INPUT_BYTES = 1_600_000
 
 
 class SeqPat(Spmf):
     """ Base class for Sequential Pattern Mining """
 
+    # Whether approximate mining on a sample of sequences is supported
+    APPROXIMATE = False
+
+    OUTPUT_COLUMNS = ('Frequent sequential pattern', 'Support')
+
+    def __init__(self, required_items: List = None, approximate: bool = False, sample_size: int = None,
+                 epsilon: float = None, delta: float = 0.05, verify: bool = False, random_state: Any = None,
+                 **kwargs) -> None:
+        """ Initialize Object
+
+        :param required_items (optional): items which every pattern found must contain. Sequences without all of
+            them are dropped from input dataframes before running SPMF. Default = None
+        :param approximate (optional): Mine a uniform sample of the sequences at a lowered minimum support, for
+            PrefixSpan, SPADE, CMSPADE and SPAM. The output has the bounds of the confidence interval of each
+            support in 'Support lower' and 'Support upper' columns. Default = False
+        :param sample_size (optional): number of sequences in the sample. Required if epsilon is not set
+        :param epsilon (optional): maximum error of the estimated relative support of a pattern at the minimum
+            support, which sets the sample size. Required if sample_size is not set
+        :param delta (optional): probability that an estimate is not within its error bound. Default = 0.05
+        :param verify (optional): Count the exact supports of the patterns found in the whole database, and keep
+            the frequent ones. Default = False
+        :param random_state (optional): Seed or numpy Generator of the sample. Default = None
+        """
+        super().__init__(**kwargs)
+        self.required_items = required_items
+
+        if approximate and not self.APPROXIMATE:
+            raise ValueError(f'Approximate mining requires PrefixSpan, SPADE, CMSPADE or SPAM, '
+                             f'got {type(self).__name__}')
+        if approximate and sample_size is None and epsilon is None:
+            raise ValueError('Approximate mining requires sample_size or epsilon')
+        if not 0 < delta < 1:
+            raise ValueError(f'delta must be in (0, 1), got {delta}')
+        self.approximate = approximate
+        self.sample_size = sample_size
+        self.epsilon = epsilon
+        self.delta = delta
+        self.verify = verify
+        self.random_state = random_state
+
     def _transform_input_dataframe(self, input_df: pd.DataFrame) -> pd.DataFrame:
         """ Transform input dataframe to the format required by SPMF
 
@@ -19,14 +71,36 @@ class SeqPat(Spmf):
             NOTE: If Timestamp present, dataframe should contain it in 'Time points' column
         :return: Transformed dataframe
         """
+        df = self._aggregate_sequences(self._encode_input_dataframe(input_df))
+
+        # SPMF identifies sequences by their position in the input file
+        self.sequence_labels = df['ID'].to_numpy()
+        return df
+
+    def _encode_input_dataframe(self, input_df: pd.DataFrame) -> pd.DataFrame:
+        """ Encode the items of the input dataframe as SPMF event IDs, with their mapping, and sort its rows
+
+        :param input_df: Input Dataframe, as in _parse_input_dataframe
+        :return: Rows of the input dataframe with their 'Event_ID', sorted by sequence, time and event ID
+        """
+        df = input_df.drop_duplicates(['ID', 'Time Points', 'Items'])
 
-        df = input_df.copy()
+        # SPMF requires the items of an itemset in ascending order
+        df = df.assign(Event_ID=df.groupby('Items').ngroup()+1).sort_values(['ID', 'Time Points', 'Event_ID'])
+        items = df.drop_duplicates('Event_ID')
+        self.mapping = items['Items'].astype(str).set_axis(items['Event_ID'].astype(str)).to_dict()
+        return df
 
-        df['Event_ID'] = (df.groupby('Items').ngroup()+1).astype(str)
-        self.mapping = str.maketrans(df[['Items', 'Event_ID']].set_index('Event_ID', drop=True).to_dict()['Items'])
+    @staticmethod
+    def _aggregate_sequences(df: pd.DataFrame) -> pd.DataFrame:
+        """ Aggregate the encoded rows of sequences into the lines of the SPMF input
 
-        return df.pipe(pd.DataFrame.groupby, by='Time Points') \
-            .pipe(pd.core.groupby.generic.DataFrameGroupBy.agg, {'ID': 'first', 'Event_ID': (' ').join}) \
+        :param df: Rows returned by _encode_input_dataframe
+        :return: Dataframe of the sequence IDs in 'ID' column and their SPMF input lines in 'input' column
+        """
+        return df.assign(Event_ID=df['Event_ID'].astype(str)) \
+            .pipe(pd.DataFrame.groupby, by=['ID', 'Time Points']) \
+            .pipe(pd.core.groupby.generic.DataFrameGroupBy.agg, {'Event_ID': (' ').join}) \
             .pipe(pd.DataFrame.reset_index) \
             .pipe(pd.DataFrame.groupby, by='ID') \
             .pipe(pd.core.groupby.generic.DataFrameGroupBy.agg, {'Event_ID': (' -1 ').join}) \
@@ -42,34 +116,85 @@ class SeqPat(Spmf):
             NOTE: Items in the same sequence must have the same value in the 'ID' column
         :return: Parsed String representation
         """
-        df = self._transform_input_dataframe(input_df)
-        return (' -1 -2\n').join(df['input'].to_list()) + ' -1 -2'
+        fp = io.StringIO()
+        self._write_input_dataframe(input_df, fp)
+        return fp.getvalue()
 
-    def _parse_output_file(self, **kwargs) -> Tuple[List[Text], List[int]]:
+    def _write_input_dataframe(self, input_df: pd.DataFrame, fp: IO) -> None:
+        """ Write Input Dataframe to the SPMF input file, CHUNK_LINES sequences at a time. The lines of the
+            sequences are aggregated by chunks, from the sorted rows of their IDs
+
+        :param input_df: Input Dataframe, as in _parse_input_dataframe
+        :param fp: Text file object of the SPMF input
+        """
+        df = self._encode_input_dataframe(input_df)
+        ids = df['ID'].to_numpy()
+        starts = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]]) if len(ids) else np.zeros(0, dtype=np.int64)
+
+        # SPMF identifies sequences by their position in the input file
+        self.sequence_labels = ids[starts]
+
+        # An empty input is written as one empty sequence, as SPMF expects
+        bounds = np.append(starts[::CHUNK_LINES], len(ids))
+        for chunk, (start, end) in enumerate(zip(bounds[:-1], bounds[1:])):
+            lines = self._aggregate_sequences(df.iloc[start:end])['input']
+            fp.write(('\n' if chunk else '') + (' -1 -2\n').join(lines) + ' -1 -2')
+        if not len(ids):
+            fp.write(' -1 -2')
+
+    def _parse_output_file(self, **kwargs) -> Tuple:
         """ Parse output txt file created by the Episode Mining algorithm
 
         :param kwargs: keyword arguments to read output file (delete)
-        :return: Tuple of patterns and corresponding support
+        :return: Tuple of patterns and corresponding support, plus the SequenceIndex of the supporting
+            sequence positions if show_seq_ids is True
         """
         lines = self._read_file(**kwargs)
-        patterns, supports = [], []
+        patterns, supports, sequence_ids = [], [], []
 
         for line in lines:
+            line, _, sids = line.partition('#SID:')
             line = line.strip().split('-1')
             patterns.append((' -> ').join([c.strip() for c in line[:-1]]))
-            supports.append(re.search(r'(\d+)$', line[-1]).group(0))
+            supports.append(re.search(r'(\d+)$', line[-1].strip()).group(0))
+            sequence_ids.append(sids)
+
+        if not getattr(self, 'show_seq_ids', False):
+            return patterns, list(map(int, supports))
 
-        return patterns, list(map(int, supports))
+        index = SequenceIndex.from_lists(sequence_ids, np.empty(0, dtype=np.int64))
+        index.labels = np.arange(index.indices.max() + 1 if len(index.indices) else 0)
+        return patterns, list(map(int, supports)), index
 
-    def _create_output_dataframe(self, patterns: List[Text], supports: List[int]) -> pd.DataFrame:
+    def _create_output_dataframe(self, patterns: List[Text], supports: List[int],
+                                 sequence_index: SequenceIndex = None) -> pd.DataFrame:
         """ Create Output Dataframe
 
         :param patterns: Frequent Episode Patterns return by the episode mining algorithm
         :param supports: Corresponding supports for each pattern
+        :param sequence_index (optional): Positions of the sequences supporting each pattern. They are mapped to
+            the original 'ID' labels and stored in the sequence_index attribute
         :return: Dataframe containing patterns and corresponding support
         """
-        patterns_mapped = [pattern.translate(self.mapping) for pattern in patterns]
-        return pd.DataFrame((patterns_mapped, supports), index=['Frequent sequential pattern', 'Support']).T
+        self._set_sequence_index(sequence_index)
+        patterns_mapped = [self.map_pattern(pattern, self.mapping) for pattern in patterns]
+        return pd.DataFrame((patterns_mapped, supports), index=list(self.OUTPUT_COLUMNS)).T
+
+    def _create_output_table(self, patterns: List[Text], supports: List[int],
+                             sequence_index: SequenceIndex = None) -> Any:
+        """ Create Output Arrow Table, and store the sequence index as _create_output_dataframe does """
+        self._set_sequence_index(sequence_index)
+        return super()._create_output_table(patterns, supports)
+
+    def _set_sequence_index(self, sequence_index: SequenceIndex = None) -> None:
+        """ Map the positions of the sequences supporting each pattern to the original 'ID' labels, and store them
+            in the sequence_index attribute if show_seq_ids is True
+        """
+        if getattr(self, 'show_seq_ids', False):
+            if sequence_index is None:
+                sequence_index = SequenceIndex.from_lists([], np.empty(0, dtype=np.int64))
+            sequence_index.labels = getattr(self, 'sequence_labels', sequence_index.labels)
+            self.sequence_index = sequence_index
 
     def run_pandas(self, input_df: pd.DataFrame) -> pd.DataFrame:
         """ Run Episode Mining algorithm on Pandas Dataframe
@@ -80,34 +205,179 @@ class SeqPat(Spmf):
             NOTE: Items in the same sequence must have the same value in the 'ID' column
         :return: Dataframe containing the frequent sequential patterns and support.
         """
-        return super().run_pandas(input_df)
+        if getattr(self, 'approximate', False):
+            return sampling.run_approximate(self, input_df)
+
+        n_sequences = input_df['ID'].nunique()
+        min_count = math.ceil(self.min_support * n_sequences) if self.PREFILTER else 1
+
+        # A pattern with the required items is only supported by the sequences containing all of them.
+        # The generators of VGEN depend on the support of their sub-patterns, which may not contain them
+        if self.required_items and not isinstance(self, VGEN):
+            input_df = prefilter.filter_required_items(input_df, self.required_items)
+
+        # Gap constraints count itemsets, so itemsets are kept even if all their items are dropped.
+        # VGEN outputs the empty pattern, whose support is the number of sequences, so sequences are kept too
+        if self.PREFILTER and self.prefilter and min_count > 1:
+            input_df = prefilter.filter_sequences(input_df, min_count, keep_itemsets=bool(getattr(self, 'max_gap', '')),
+                                                  keep_sequences=isinstance(self, VGEN))
+
+        n_kept = input_df['ID'].nunique()
+        if n_kept < n_sequences and (not n_kept or min_count > n_kept):
+            self.mapping = dict()
+            return self._create_output_dataframe([], [])
+
+        # Dropped sequences change the number of sequences, hence the relative support of the algorithms which
+        # can be prefiltered. The support of NOSEP counts occurrences, and TKS has no minimum support
+        min_support = getattr(self, 'min_support', None)
+        if self.PREFILTER and n_kept < n_sequences:
+            self.min_support = prefilter.rescale_min_support(min_support, n_sequences, n_kept)
+        try:
+            output = super().run_pandas(input_df)
+        finally:
+            if self.PREFILTER:
+                self.min_support = min_support
+        return self._filter_output(output)
+
+    def _filter_output(self, output: pd.DataFrame) -> pd.DataFrame:
+        """ Keep the patterns containing every required item, with their supporting sequences
+
+        :param output: Output Dataframe
+        :return: Output Dataframe of the patterns containing the required items
+        """
+        if not self.required_items:
+            return output
+
+        found = prefilter.contains_items(output['Frequent sequential pattern'], self.required_items)
+        # Distributed workers do not return the sequence index of the patterns
+        if getattr(self, 'show_seq_ids', False) and len(self.sequence_index) == len(output):
+            self.sequence_index = self.sequence_index.take(np.flatnonzero(found))
+        return output[found].reset_index(drop=True)
+
+    def _encode_required_items(self) -> List[Text]:
+        """ Map the required items to their codes in the input file
+
+        :return: Codes of the required items. Items of input files are already codes, and items missing from
+            the mapping are given an unused code, which no pattern contains
+        """
+        mapping = getattr(self, 'mapping', None)
+        if not mapping:
+            return [str(item) for item in self.required_items or []]
 
-    def run_file(self, input_file_name: Text) -> Tuple[List[Text], List[int]]:
+        codes = {item: code for code, item in mapping.items()}
+        unused = str(max(map(int, mapping)) + 1)
+        return [codes.get(str(item), unused) for item in self.required_items or []]
+
+    def run_file(self, input_file_name: Text, archive: Text = None) -> Tuple[List[Text], List[int]]:
         """ Run Episode Mining algorithm on an input txt file
 
-        :param input_file_name: Input txt file name
+        :param input_file_name: Input txt file name, which may be compressed ('.gz' or '.zst')
+        :param archive (optional): File name where the SPMF output is copied, compressed if it ends with '.gz' or
+            '.zst'. Default = None
         :return: Tuple of frequent sequential patterns and corresponding support
         """
-        return super().run_file(input_file_name)
+        return super().run_file(input_file_name, archive)
+
+    def run_parquet(self, path: Text, columns: List[Text] = None, batch_size: int = 65536) -> pd.DataFrame:
+        """ Run Sequential Pattern Mining algorithm on a Parquet file or dataset, read by batches without creating
+            a Pandas Dataframe of the input. Requires pyarrow. Rows should be ordered by ID; otherwise they are
+            sorted externally. The input is not prefiltered, which does not change the output
+
+        :param path: Path of a Parquet file, or of a directory of Parquet files with hive partitioning
+        :param columns (optional): Names of the sequence ID, time and item columns.
+            Default = ['ID', 'Time Points', 'Items']
+        :param batch_size (optional): Maximum number of rows read at once. Default = 65536
+        :return: Dataframe containing the frequent sequential patterns and support.
+        """
+        batches, n_rows = ingest.read_parquet(path, columns or self._input_columns(), batch_size)
+        return self._create_output_dataframe(*self._run_batches(batches, n_rows))
+
+    def run_sql(self, connection: Any, query: Text, id_col: Text = 'ID', time_col: Text = 'Time Points',
+                item_col: Text = 'Items', params: Any = None, batch_size: int = 65536,
+                quote_char: Text = '"') -> pd.DataFrame:
+        """ Run Sequential Pattern Mining algorithm on the result of an SQL query, fetched by batches from a cursor
+            ordered by sequence ID and time, without holding the result in memory. The input is not prefiltered
+
+        :param connection: DB-API connection, or function returning a new cursor, such as a named (server-side)
+            cursor of psycopg2. The query may be executed again if the database orders IDs differently from Python
+        :param query: SQL query returning the sequence ID, time and item columns
+        :param id_col (optional): Name of the sequence ID column. Default = 'ID'
+        :param time_col (optional): Name of the time column. Default = 'Time Points'
+        :param item_col (optional): Name of the item column. Default = 'Items'
+        :param params (optional): Parameters of the query, in the paramstyle of the connection. Default = None
+        :param batch_size (optional): Number of rows fetched at once. Default = 65536
+        :param quote_char (optional): Character quoting the column names in the SQL wrapping the query, such as
+            '`' for MySQL and MariaDB. Default = '"'
+        :return: Dataframe containing the frequent sequential patterns and support.
+        """
+        batches, n_rows = ingest.read_sql(connection, query, [id_col, time_col, item_col], batch_size, params,
+                                          quote_char=quote_char)
+        return self._create_output_dataframe(*self._run_batches(batches, n_rows))
+
+    def _input_columns(self) -> List[Text]:
+        """ Default names of the sequence ID, time and item columns of inputs read by batches """
+        return ['ID', 'Time Points', 'Items']
+
+    def _check_batches(self) -> None:
+        """ Check that the parameters of the algorithm are supported for inputs read by batches """
+        if self.required_items or getattr(self, 'approximate', False):
+            raise ValueError('required_items and approximate mining are only supported by run_pandas')
+
+    def _write_batches(self, batches: Callable[[], Iterable[ingest.Batch]], fp: IO, n_rows: int = None) -> None:
+        """ Write an input read by batches to the SPMF input file, with the mapping of the items and sequences """
+        dictionary, self.sequence_labels = ingest.write_sequences(batches, fp, n_rows)
+        self.mapping = dictionary.mapping
+
+    def estimate(self, input_df: pd.DataFrame) -> estimator.Estimate:
+        """ Predict the number of patterns, peak heap and runtime of run_pandas, without running SPMF
+
+        :param input_df: Input Dataframe containing Sequence IDs in 'ID' column, time in
+            'Time Points' column and items in 'Items' column.
+        :return: Estimate, with the statistics of the input dataframe
+        """
+        statistics = estimator.sequence_statistics(input_df)
+        min_support = getattr(self, 'min_support', 0)
+        min_count = min_support if min_support >= 1 else math.ceil(min_support * statistics.n_sequences)
+        return estimator.predict(type(self).__name__, statistics, min_count, k=getattr(self, 'k', None))
 
 
 class PrefixSpan(SeqPat):
     """ Mining Frequent Sequential Patterns Using The PrefixSpan Algorithm """
 
-    def __init__(self, min_support: float, max_pattern_length: int = None, show_seq_ids: bool = False, **kwargs) -> None:
+    PREFILTER = True
+    APPROXIMATE = True
+
+    def __init__(self, min_support: float, max_pattern_length: int = None, show_seq_ids: bool = False, engine: Text = 'jvm', **kwargs) -> None:
         """ Initialize Object. Refer to https://www.philippe-fournier-viger.com/spmf/PrefixSpan.php
 
         :param min_support: minimum occurence frequency
         :param max_pattern_length (optional): maximum number of items that patterns found should contain
-        :param show_seq_id (not implemented): Show sequence IDs for patterns in the output
+        :param show_seq_ids (optional): Store the sequences of the patterns in the sequence_index attribute
+        :param engine: 'jvm' to run SPMF, 'native' to run the NumPy implementation in process, or 'auto'
+            to use the native engine for inputs smaller than NATIVE_MAX_INPUT_BYTES. Default = 'jvm'
         """
         super().__init__(**kwargs)
         self.min_support = min_support
         self.max_pattern_length = max_pattern_length if max_pattern_length else ''
 
-        # TODO
-        if show_seq_ids:
-            warnings.warn('Sequence IDs in output not implemented. Ignoring argument.')
+        if engine not in ('jvm', 'native', 'auto'):
+            raise ValueError(f"engine must be 'jvm', 'native' or 'auto', got {engine}")
+        self.engine = engine
+        self.show_seq_ids = show_seq_ids
+
+    def run(self, input_file_name: Text) -> None:
+        """ Run PrefixSpan on the selected engine
+
+        :param input_file_name: Complete path to input txt file
+        """
+        if self.engine == 'jvm' or (self.engine == 'auto' and os.path.getsize(input_file_name) > NATIVE_MAX_INPUT_BYTES):
+            return super().run(input_file_name)
+
+        database = native.read_sequence_database(input_file_name)
+        patterns, supports, sequence_ids = native.prefixspan(
+            database, self.min_support, self.max_pattern_length or None, self.show_seq_ids
+        )
+        native.write_patterns(self.output_file_name, patterns, supports, sequence_ids)
 
     def _create_subprocess_arguments(self, input_file_name: Text) -> List:
         """ Create arguments list to pass to subprocess """
@@ -123,6 +393,7 @@ class PrefixSpan(SeqPat):
             'Output': self.output_file_name,
             'min_support': str(self.min_support),
             'max_pattern_length': str(self.max_pattern_length),
+            'show_seq_ids': str(self.show_seq_ids).lower(),
         }
 
         return list(arguments.values())
@@ -131,18 +402,18 @@ class PrefixSpan(SeqPat):
 class SPADE(SeqPat):
     """ Mining Frequent Sequential Patterns Using The SPADE Algorithm """
 
+    PREFILTER = True
+    APPROXIMATE = True
+
     def __init__(self, min_support: float, show_seq_ids: bool = False, **kwargs) -> None:
         """ Initialize Object. Refer to https://www.philippe-fournier-viger.com/spmf/SPADE.php
 
         :param min_support: minimum occurence frequency
-        :param show_seq_id (not implemented): Show sequence IDs for patterns in the output
+        :param show_seq_ids (optional): Store the sequences of the patterns in the sequence_index attribute
         """
         super().__init__(**kwargs)
         self.min_support = min_support
-
-        # TODO
-        if show_seq_ids:
-            warnings.warn('Sequence IDs in output not implemented. Ignoring argument.')
+        self.show_seq_ids = show_seq_ids
 
     def _create_subprocess_arguments(self, input_file_name: Text) -> List:
         """ Create arguments list to pass to subprocess """
@@ -156,7 +427,8 @@ class SPADE(SeqPat):
             'Algorithm': 'SPADE',
             'Input': input_file_name,
             'Output': self.output_file_name,
-            'min_support': str(self.min_support)
+            'min_support': str(self.min_support),
+            'show_seq_ids': str(self.show_seq_ids).lower(),
         }
 
         return list(arguments.values())
@@ -165,18 +437,18 @@ class SPADE(SeqPat):
 class CMSPADE(SeqPat):
     """ Mining Frequent Sequential Patterns Using The CM-SPADE Algorithm """
 
+    PREFILTER = True
+    APPROXIMATE = True
+
     def __init__(self, min_support: float, show_seq_ids: bool = False, **kwargs) -> None:
         """ Initialize Object. Refer to https://www.philippe-fournier-viger.com/spmf/CM-SPADE.php
 
         :param min_support: minimum occurence frequency
-        :param show_seq_id (not implemented): Show sequence IDs for patterns in the output
+        :param show_seq_ids (optional): Store the sequences of the patterns in the sequence_index attribute
         """
         super().__init__(**kwargs)
         self.min_support = min_support
-
-        # TODO
-        if show_seq_ids:
-            warnings.warn('Sequence IDs in output not implemented. Ignoring argument.')
+        self.show_seq_ids = show_seq_ids
 
     def _create_subprocess_arguments(self, input_file_name: Text) -> List:
         """ Create arguments list to pass to subprocess """
@@ -190,7 +462,8 @@ class CMSPADE(SeqPat):
             'Algorithm': 'CM-SPADE',
             'Input': input_file_name,
             'Output': self.output_file_name,
-            'min_support': str(self.min_support)
+            'min_support': str(self.min_support),
+            'show_seq_ids': str(self.show_seq_ids).lower(),
         }
 
         return list(arguments.values())
@@ -199,6 +472,9 @@ class CMSPADE(SeqPat):
 class SPAM(SeqPat):
     """ Mining Frequent Sequential Patterns Using The SPAM Algorithm """
 
+    PREFILTER = True
+    APPROXIMATE = True
+
     def __init__(self, min_support: float, min_pattern_length: int = None, max_pattern_length: int = None, max_gap: int = None, show_seq_ids: bool = False, **kwargs) -> None:
         """ Initialize Object. Refer to https://www.philippe-fournier-viger.com/spmf/SPAM.php
 
@@ -206,17 +482,14 @@ class SPAM(SeqPat):
         :param min_pattern_length (optional): minimum pattern length in the output. Default = 1
         :param max_pattern_length (optional): maximum pattern length in the output. Default = +inf
         :param max_gap (optional): maximum gap allowed between consecutive itemsets in the pattern. Default = +inf
-        :param show_seq_id (not implemented): Show sequence IDs for patterns in the output
+        :param show_seq_ids (optional): Store the sequences of the patterns in the sequence_index attribute
         """
         super().__init__(**kwargs)
         self.min_support = min_support
         self.min_pattern_length = min_pattern_length if min_pattern_length else ''
         self.max_pattern_length = max_pattern_length if max_pattern_length else ''
         self.max_gap = max_gap if max_gap else ''
-
-        # TODO
-        if show_seq_ids:
-            warnings.warn('Sequence IDs in output not implemented. Ignoring argument.')
+        self.show_seq_ids = show_seq_ids
 
     def _create_subprocess_arguments(self, input_file_name: Text) -> List:
         """ Create arguments list to pass to subprocess """
@@ -233,7 +506,8 @@ class SPAM(SeqPat):
             'min_support': str(self.min_support),
             'min_pattern_length': str(self.min_pattern_length),
             'max_pattern_length': str(self.max_pattern_length),
-            'max_gap': str(self.max_gap)
+            'max_gap': str(self.max_gap),
+            'show_seq_ids': str(self.show_seq_ids).lower(),
         }
 
         return list(arguments.values())
@@ -242,18 +516,17 @@ class SPAM(SeqPat):
 class ClaSP(SeqPat):
     """ Mining Frequent Closed Sequential Patterns Using The ClaSP Algorithm """
 
+    PREFILTER = True
+
     def __init__(self, min_support: float, show_seq_ids: bool = False, **kwargs) -> None:
         """ Initialize Object. Refer to https://www.philippe-fournier-viger.com/spmf/ClaSP.php
 
         :param min_support: minimum occurence frequency
-        :param show_seq_id (not implemented): Show sequence IDs for patterns in the output
+        :param show_seq_ids (optional): Store the sequences of the patterns in the sequence_index attribute
         """
         super().__init__(**kwargs)
         self.min_support = min_support
-
-        # TODO
-        if show_seq_ids:
-            warnings.warn('Sequence IDs in output not implemented. Ignoring argument.')
+        self.show_seq_ids = show_seq_ids
 
     def _create_subprocess_arguments(self, input_file_name: Text) -> List:
         """ Create arguments list to pass to subprocess """
@@ -267,7 +540,8 @@ class ClaSP(SeqPat):
             'Algorithm': 'ClaSP',
             'Input': input_file_name,
             'Output': self.output_file_name,
-            'min_support': str(self.min_support)
+            'min_support': str(self.min_support),
+            'show_seq_ids': str(self.show_seq_ids).lower(),
         }
 
         return list(arguments.values())
@@ -276,18 +550,17 @@ class ClaSP(SeqPat):
 class CMClaSP(SeqPat):
     """ Mining Frequent Closed Sequential Patterns Using The CM-ClaSP Algorithm """
 
+    PREFILTER = True
+
     def __init__(self, min_support: float, show_seq_ids: bool = False, **kwargs) -> None:
         """ Initialize Object. Refer to https://www.philippe-fournier-viger.com/spmf/CM-ClaSP.php
 
         :param min_support: minimum occurence frequency
-        :param show_seq_id (not implemented): Show sequence IDs for patterns in the output
+        :param show_seq_ids (optional): Store the sequences of the patterns in the sequence_index attribute
         """
         super().__init__(**kwargs)
         self.min_support = min_support
-
-        # TODO
-        if show_seq_ids:
-            warnings.warn('Sequence IDs in output not implemented. Ignoring argument.')
+        self.show_seq_ids = show_seq_ids
 
     def _create_subprocess_arguments(self, input_file_name: Text) -> List:
         """ Create arguments list to pass to subprocess """
@@ -301,7 +574,8 @@ class CMClaSP(SeqPat):
             'Algorithm': 'CM-ClaSP',
             'Input': input_file_name,
             'Output': self.output_file_name,
-            'min_support': str(self.min_support)
+            'min_support': str(self.min_support),
+            'show_seq_ids': str(self.show_seq_ids).lower(),
         }
 
         return list(arguments.values())
@@ -310,22 +584,21 @@ class CMClaSP(SeqPat):
 class VMSP(SeqPat):
     """ Mining Frequent Maximal Sequential Patterns Using The VMSP Algorithm """
 
+    PREFILTER = True
+
     def __init__(self, min_support: float, max_pattern_length: int = None, max_gap: int = None, show_seq_ids: bool = False, **kwargs) -> None:
         """ Initialize Object. Refer to https://www.philippe-fournier-viger.com/spmf/VMSP.php
 
         :param min_support: minimum occurence frequency
         :param max_pattern_length (optional): maximum pattern length in the output. Default = +inf
         :param max_gap (optional): maximum gap allowed between consecutive itemsets in the pattern. Default = +inf
-        :param show_seq_id (not implemented): Show sequence IDs for patterns in the output
+        :param show_seq_ids (optional): Store the sequences of the patterns in the sequence_index attribute
         """
         super().__init__(**kwargs)
         self.min_support = min_support
         self.max_pattern_length = max_pattern_length if max_pattern_length else ''
         self.max_gap = max_gap if max_gap else ''
-
-        # TODO
-        if show_seq_ids:
-            warnings.warn('Sequence IDs in output not implemented. Ignoring argument.')
+        self.show_seq_ids = show_seq_ids
 
     def _create_subprocess_arguments(self, input_file_name: Text) -> List:
         """ Create arguments list to pass to subprocess """
@@ -341,7 +614,8 @@ class VMSP(SeqPat):
             'Output': self.output_file_name,
             'min_support': str(self.min_support),
             'max_pattern_length': str(self.max_pattern_length),
-            'max_gap': str(self.max_gap)
+            'max_gap': str(self.max_gap),
+            'show_seq_ids': str(self.show_seq_ids).lower(),
         }
 
         return list(arguments.values())
@@ -350,22 +624,21 @@ class VMSP(SeqPat):
 class VGEN(SeqPat):
     """ Mining Frequent Sequential Generator Patterns Using The VGEN Algorithm """
 
+    PREFILTER = True
+
     def __init__(self, min_support: float, max_pattern_length: int = None, max_gap: int = None, show_seq_ids: bool = False, **kwargs) -> None:
         """ Initialize Object. Refer to https://www.philippe-fournier-viger.com/spmf/VGEN.php
 
         :param min_support: minimum occurence frequency
         :param max_pattern_length (optional): maximum pattern length in the output. Default = +inf
         :param max_gap (optional): maximum gap allowed between consecutive itemsets in the pattern. Default = +inf
-        :param show_seq_id (not implemented): Show sequence IDs for patterns in the output
+        :param show_seq_ids (optional): Store the sequences of the patterns in the sequence_index attribute
         """
         super().__init__(**kwargs)
         self.min_support = min_support
         self.max_pattern_length = max_pattern_length if max_pattern_length else ''
         self.max_gap = max_gap if max_gap else ''
-
-        # TODO
-        if show_seq_ids:
-            warnings.warn('Sequence IDs in output not implemented. Ignoring argument.')
+        self.show_seq_ids = show_seq_ids
 
     def _create_subprocess_arguments(self, input_file_name: Text) -> List:
         """ Create arguments list to pass to subprocess """
@@ -381,7 +654,8 @@ class VGEN(SeqPat):
             'Output': self.output_file_name,
             'min_support': str(self.min_support),
             'max_pattern_length': str(self.max_pattern_length),
-            'max_gap': str(self.max_gap)
+            'max_gap': str(self.max_gap),
+            'show_seq_ids': str(self.show_seq_ids).lower(),
         }
 
         return list(arguments.values())
@@ -431,28 +705,68 @@ class NOSEP(SeqPat):
 class TKS(SeqPat):
     """ Mining Top-K Sequential Patterns Using The TKS Algorithm """
 
-    def __init__(self, k: int, min_pattern_length: int = None, max_pattern_length: int = None, required_items: List[int] = None, max_gap: int = None, **kwargs) -> None:
+    def __init__(self, k: int, min_pattern_length: int = None, max_pattern_length: int = None, required_items: List = None, max_gap: int = None, **kwargs) -> None:
         """ Initialize Object. Refer to https://www.philippe-fournier-viger.com/spmf/TKS.php
 
         :param k: number of patterns to output
         :param min_pattern_length (optional): minimum pattern length in the output. Default = 1
         :param max_pattern_length (optional): maximum pattern length in the output. Default = +inf
         :param max_gap (optional): maximum gap allowed between consecutive itemsets in the pattern. Default = +inf
-        :param required_items (not implemented): list of items that must appears in every patterns found
+        :param required_items (optional): list of items that must appears in every patterns found
         """
-        super().__init__(**kwargs)
+        super().__init__(required_items=required_items, **kwargs)
         self.k = k
         self.min_pattern_length = min_pattern_length if min_pattern_length else ''
         self.max_pattern_length = max_pattern_length if max_pattern_length else ''
         self.max_gap = max_gap if max_gap else ''
 
-        # TODO
-        if required_items:
-            warnings.warn('Required items in output not implemented. Ignoring argument.')
+    def _filter_output(self, output: pd.DataFrame) -> pd.DataFrame:
+        """ Keep the top-k patterns containing every required item
+
+        :param output: Output Dataframe
+        :return: Output Dataframe of the top-k patterns containing the required items
+        """
+        output = super()._filter_output(output)
+        if not self.required_items:
+            return output
+
+        # With required items, SPMF outputs every pattern above its final minimum support, which may be more than k
+        return output.sort_values('Support', ascending=False, kind='stable').head(self.k).reset_index(drop=True)
+
+    def run(self, input_file_name: Text) -> None:
+        """ Run TKS on an input file. With required items, the sequences without all of them are dropped first,
+            since SPMF miscounts the supports of the patterns when the input has such sequences
+
+        :param input_file_name: Complete path to input txt file
+        """
+        if not self.required_items:
+            return super().run(input_file_name)
+
+        codes = set(self._encode_required_items())
+        fp = tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False)
+        try:
+            n_sequences = 0
+            with fp, open(input_file_name) as input_fp:
+                for line in input_fp:
+                    # Lines of comments and metadata are kept
+                    header = line.startswith(('#', '%', '@'))
+                    if header or codes <= set(line.split()):
+                        fp.write(line)
+                        n_sequences += not header
+
+            # SPMF fails on an input without sequences, where no pattern is found
+            if n_sequences:
+                super().run(fp.name)
+            else:
+                open(self.output_file_name, 'w').close()
+        finally:
+            os.unlink(fp.name)
 
     def _create_subprocess_arguments(self, input_file_name: Text) -> List:
         """ Create arguments list to pass to subprocess """
 
+        # SPMF requires the codes of the required items in ascending order
+        required_items = sorted(set(self._encode_required_items()), key=int)
         arguments = {
             'Subprocess': 'java',
             'Memory': f'-Xmx{self.memory}m',
@@ -465,8 +779,72 @@ class TKS(SeqPat):
             'k': str(self.k),
             'min_pattern_length': str(self.min_pattern_length),
             'max_pattern_length': str(self.max_pattern_length),
-            'required_items': '',
+            'required_items': ','.join(required_items),
             'max_gap': str(self.max_gap),
         }
 
         return list(arguments.values())
+
+
+class FrequentSequentialPatterns:
+    """ Mining Frequent Sequential Patterns with the fastest algorithm for the input """
+
+    ALGORITHMS = {'PrefixSpan': PrefixSpan, 'SPADE': SPADE, 'CMSPADE': CMSPADE, 'SPAM': SPAM}
+
+    def __init__(self, min_support: float, algorithm: Text = 'auto', **kwargs) -> None:
+        """ Initialize Object
+
+        :param min_support: minimum occurence frequency
+        :param algorithm (optional): 'auto' to choose among PrefixSpan, SPADE, CMSPADE and SPAM from the density
+            statistics of the input, with the decision table of spmf.selection, or the name of one of them.
+            Default = 'auto'
+        :param kwargs: keyword arguments of the algorithm. With 'auto', only the algorithms accepting all of them
+            are considered, such as SPAM with max_gap
+        """
+        if algorithm != 'auto' and algorithm not in self.ALGORITHMS:
+            raise ValueError(f"algorithm must be 'auto' or one of {', '.join(self.ALGORITHMS)}, got {algorithm}")
+        self.min_support = min_support
+        self.algorithm = algorithm
+        self.kwargs = kwargs
+
+        self.selection = None   # algorithm chosen by the last run, with the reason of the choice
+        self.miner = None       # algorithm object of the last run
+
+    def candidates(self) -> List[Text]:
+        """ Names of the algorithms accepting the keyword arguments """
+        def accepts(algorithm: type, name: Text) -> bool:
+            return any(name in inspect.signature(cls.__init__).parameters
+                       for cls in algorithm.__mro__ if '__init__' in cls.__dict__)
+
+        names = [name for name, algorithm in self.ALGORITHMS.items()
+                 if all(accepts(algorithm, argument) for argument in self.kwargs)]
+        if not names:
+            raise ValueError(f'No algorithm accepts all of {", ".join(self.kwargs)}')
+        return names
+
+    def select(self, input_df: pd.DataFrame) -> selection.Selection:
+        """ Choose the algorithm of an input, without running it
+
+        :param input_df: Input Dataframe containing Sequence IDs in 'ID' column, time in
+            'Time Points' column and items in 'Items' column.
+        :return: Selection, with the name of the algorithm and the reason of the choice
+        """
+        if self.algorithm != 'auto':
+            return selection.Selection(self.algorithm, 'set by the algorithm parameter', {}, None)
+        candidates = self.candidates()
+        return selection.select(estimator.sequence_statistics(input_df), candidates)
+
+    def run_pandas(self, input_df: pd.DataFrame) -> pd.DataFrame:
+        """ Run the chosen algorithm on Pandas Dataframe
+
+        :param input_df: Input Dataframe containing Sequence IDs in 'ID' column, time in
+            'Time Points' column and items in 'Items' column.
+        :return: Dataframe containing the frequent sequential patterns and support.
+        """
+        self.selection = self.select(input_df)
+        self.miner = self.ALGORITHMS[self.selection.algorithm](min_support=self.min_support, **self.kwargs)
+        output = self.miner.run_pandas(input_df)
+        self.mapping = self.miner.mapping
+        if getattr(self.miner, 'show_seq_ids', False):
+            self.sequence_index = self.miner.sequence_index
+        return output
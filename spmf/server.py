@@ -0,0 +1,558 @@
+""" Local Mining Service
+
+A long-running process shared by several users of the wrapper on one machine. It runs the SPMF algorithms
+on a queue of jobs with a pool of worker threads:
+- Jobs are identified by the fingerprint of the algorithm, its parameters and the input dataframe. A request
+  identical to a queued or running job is attached to it, so it is computed once (coalescing), and a request
+  identical to a finished job gets its result (cache).
+- With a state directory, each job is saved as a JSON file, so queued jobs are run and finished results are
+  served again after a restart.
+- The workers start with the Java runtime checked and keep running between jobs. The SPMF command line has no
+  server mode, so each job still starts its own Java VM.
+- Queue depth, job counts, hit rates and latency histograms are exposed in the Prometheus text format.
+
+The API is JSON over HTTP, on a TCP port or a Unix socket:
+    POST /jobs          {"algorithm": "PrefixSpan", "parameters": {"min_support": 0.5},
+                         "input": {"columns": [...], "data": [[...], ...]}}, ?wait=1 to wait for the result
+    GET  /jobs/<id>     Status of a job, and its output as {"columns": [...], "data": [...]} when it is done
+    GET  /metrics       Metrics
+    GET  /health        Status of the service
+
+Start a service with:
+    python -m spmf.server --port 8766 --workers 4 --state-dir ~/.spmf-server
+"""
+
+import argparse
+import bisect
+import http.client
+import http.server
+import json
+import os
+import queue
+import socket
+import socketserver
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Text, Tuple, Union
+from urllib.parse import parse_qs, urlsplit
+
+import pandas as pd
+
+from spmf.base import Spmf
+from spmf.distributed import (LOCAL_ATTRIBUTES, create_algorithm,
+                              get_algorithm_class, get_algorithm_state)
+from spmf.pipeline import fingerprint
+
+Address = Tuple[Text, int]
+
+# Upper bounds in seconds of the buckets of the latency histograms
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+
+
+class Histogram:
+    """ Histogram of durations, with cumulative buckets as in Prometheus """
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> None:
+        """ Initialize Object
+
+        :param buckets: Upper bounds of the buckets, in ascending order. Default = LATENCY_BUCKETS
+        """
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        """ Add a duration """
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def to_dict(self) -> Dict[Text, Any]:
+        """ Cumulative counts of the buckets by upper bound, sum and count of the durations """
+        cumulative = [sum(self.counts[:position + 1]) for position in range(len(self.counts))]
+        return {'buckets': dict(zip([str(bound) for bound in self.buckets] + ['+Inf'], cumulative)),
+                'sum': self.sum, 'count': cumulative[-1]}
+
+
+class Job:
+    """ Mining job of the service """
+
+    def __init__(self, id: Text, key: Text, request: Dict[Text, Any], status: Text = 'queued') -> None:
+        """ Initialize Object
+
+        :param id: Identifier of the job
+        :param key: Fingerprint of the algorithm, its parameters and the input
+        :param request: Normalized request, with the algorithm name, its state and the input
+        :param status: 'queued', 'running', 'done' or 'failed'. Default = 'queued'
+        """
+        self.id = id
+        self.key = key
+        self.request = request
+        self.status = status
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+
+    def to_dict(self, result: bool = True) -> Dict[Text, Any]:
+        """ Status of the job, as returned by the API
+
+        :param result: Include the output of a finished job. Default = True
+        :return: Dictionary of JSON serializable values
+        """
+        status = {key: getattr(self, key) for key in ['id', 'status', 'submitted', 'started', 'finished', 'error']}
+        status['algorithm'] = self.request['algorithm']
+        if result and self.status == 'done':
+            status['result'] = self.result
+        return status
+
+    def save(self, directory: Text) -> None:
+        """ Write the job to its file in a state directory. The input is dropped once the job is finished """
+        request = self.request if self.status in ('queued', 'running') else \
+            {key: value for key, value in self.request.items() if key != 'input'}
+        path = os.path.join(directory, f'{self.id}.json')
+        with open(path + '.tmp', 'w') as fp:
+            json.dump({**self.to_dict(), 'key': self.key, 'request': request}, fp)
+        os.replace(path + '.tmp', path)
+
+    @classmethod
+    def load(cls, path: Text) -> 'Job':
+        """ Read a job saved with save """
+        with open(path, 'r') as fp:
+            saved = json.load(fp)
+        job = cls(saved['id'], saved['key'], saved['request'], saved['status'])
+        for key in ['submitted', 'started', 'finished', 'error', 'result']:
+            setattr(job, key, saved.get(key))
+        return job
+
+
+class MiningService:
+    """ Queue of mining jobs run by a pool of warm workers, with coalescing of identical requests """
+
+    def __init__(self, workers: int = None, state_dir: Text = None, cache_size: int = 1024) -> None:
+        """ Initialize Object
+
+        :param workers (optional): Number of jobs run at the same time. Default = number of CPUs
+        :param state_dir (optional): Directory where jobs are saved, to resume them after a restart.
+            Default = None, jobs are only kept in memory
+        :param cache_size (optional): Number of finished jobs kept, whose results are served to identical
+            requests. Default = 1024
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.state_dir = state_dir
+        self.cache_size = cache_size
+
+        self.lock = threading.Lock()
+        self.queue: queue.Queue = queue.Queue()
+        self.jobs: Dict[Text, Job] = {}
+        self.inflight: Dict[Text, Job] = {}        # queued and running jobs, by key
+        self.cache: Dict[Text, Job] = {}           # done jobs, by key
+        self.finished: OrderedDict = OrderedDict()  # finished jobs by id, least recently used first
+        self.threads: List[threading.Thread] = []
+        self.counters = {'requests': 0, 'cache_hits': 0, 'coalesced': 0, 'completed': 0, 'failed': 0}
+        self.histograms = {'queue_seconds': Histogram(), 'run_seconds': Histogram()}
+
+        if state_dir:
+            os.makedirs(state_dir, exist_ok=True)
+            self._restore()
+
+    def _restore(self) -> None:
+        """ Load the saved jobs, queueing again the jobs which were not finished """
+        saved = [Job.load(os.path.join(self.state_dir, name)) for name in os.listdir(self.state_dir)
+                 if name.endswith('.json')]
+        for job in sorted(saved, key=lambda job: job.submitted):
+            self.jobs[job.id] = job
+            if job.status in ('queued', 'running'):
+                job.status, job.started = 'queued', None
+                self.inflight[job.key] = job
+                self.queue.put(job)
+            else:
+                job.done.set()
+                self._finish(job)
+
+    def start(self) -> 'MiningService':
+        """ Check the Java runtime and start the workers
+
+        :return: The service
+        """
+        Spmf._install_java_runtime()
+        for _ in range(self.workers):
+            thread = threading.Thread(target=self._work, daemon=True)
+            thread.start()
+            self.threads.append(thread)
+        return self
+
+    def stop(self) -> None:
+        """ Stop the workers after their current jobs. Queued jobs stay in the state directory """
+        for _ in self.threads:
+            self.queue.put(None)
+        for thread in self.threads:
+            thread.join()
+        self.threads = []
+
+    def submit(self, request: Dict[Text, Any]) -> Job:
+        """ Submit a mining request
+
+        :param request: Dictionary with the name of the algorithm class in 'algorithm', its constructor arguments
+            in 'parameters' (or its attributes in 'state', as sent by Client), and the input dataframe in 'input'
+            as {'columns': [...], 'data': [[...], ...]}
+        :return: Job computing the result, which may be an identical job queued or finished before
+        """
+        name = request['algorithm']
+        cls = get_algorithm_class(name)
+        if 'state' in request:
+            state = {key: value for key, value in request['state'].items() if key not in LOCAL_ATTRIBUTES}
+        else:
+            state = get_algorithm_state(cls(**request.get('parameters', {})))
+        input = {'columns': list(request['input']['columns']), 'data': request['input']['data']}
+        key = fingerprint([name, state, pd.DataFrame(**input)])
+
+        with self.lock:
+            self.counters['requests'] += 1
+            if key in self.inflight:
+                self.counters['coalesced'] += 1
+                return self.inflight[key]
+            if key in self.cache:
+                self.counters['cache_hits'] += 1
+                job = self.cache[key]
+                self.finished.move_to_end(job.id)
+                return job
+
+            job = Job(uuid.uuid4().hex, key, {'algorithm': name, 'state': state, 'input': input})
+            self.jobs[job.id] = job
+            self.inflight[key] = job
+            if self.state_dir:
+                job.save(self.state_dir)
+        self.queue.put(job)
+        return job
+
+    def get(self, id: Text) -> Job:
+        """ Get a job by identifier
+
+        :param id: Identifier of the job
+        :return: Job
+        """
+        with self.lock:
+            if id not in self.jobs:
+                raise KeyError(f'Unknown job {id}')
+            return self.jobs[id]
+
+    def _work(self) -> None:
+        """ Run the queued jobs until stop """
+        while True:
+            job = self.queue.get()
+            if job is None:
+                return
+
+            with self.lock:
+                job.status, job.started = 'running', time.time()
+            try:
+                result, error = self._run(job), None
+            except Exception as e:
+                result, error = None, f'{type(e).__name__}: {e}'
+
+            with self.lock:
+                job.finished = time.time()
+                job.status, job.result, job.error = ('done', result, None) if error is None else ('failed', None, error)
+                self.counters['completed' if error is None else 'failed'] += 1
+                self.histograms['queue_seconds'].observe(job.started - job.submitted)
+                self.histograms['run_seconds'].observe(job.finished - job.started)
+                del self.inflight[job.key]
+                self._finish(job)
+                if self.state_dir:
+                    job.save(self.state_dir)
+            job.done.set()
+
+    @staticmethod
+    def _run(job: Job) -> Dict[Text, Any]:
+        """ Run the algorithm of a job on its input
+
+        :param job: Job
+        :return: Output dataframe as {'columns': [...], 'data': [[...], ...]}
+        """
+        algorithm = create_algorithm(job.request['algorithm'], job.request['state'])
+        try:
+            output = algorithm.run_pandas(pd.DataFrame(**job.request['input']))
+        finally:
+            if os.path.exists(algorithm.output_file_name):
+                os.remove(algorithm.output_file_name)
+        return {'columns': [str(column) for column in output.columns],
+                'data': json.loads(output.to_json(orient='values'))}
+
+    def _finish(self, job: Job) -> None:
+        """ Keep a finished job, and forget the least recently used ones beyond the cache size """
+        self.finished[job.id] = job
+        if job.status == 'done':
+            self.cache[job.key] = job
+        while len(self.finished) > self.cache_size:
+            _, old = self.finished.popitem(last=False)
+            del self.jobs[old.id]
+            if self.cache.get(old.key) is old:
+                del self.cache[old.key]
+            if self.state_dir and os.path.exists(os.path.join(self.state_dir, f'{old.id}.json')):
+                os.remove(os.path.join(self.state_dir, f'{old.id}.json'))
+
+    def metrics(self) -> Dict[Text, Any]:
+        """ Metrics of the service
+
+        :return: Dictionary of the gauges, counters, hit rates and latency histograms
+        """
+        with self.lock:
+            requests = self.counters['requests']
+            return {
+                'queue_depth': self.queue.qsize(),
+                'running_jobs': sum(job.status == 'running' for job in self.inflight.values()),
+                'workers': len(self.threads),
+                **{f'{name}_total': count for name, count in self.counters.items()},
+                'cache_hit_rate': self.counters['cache_hits'] / requests if requests else 0.0,
+                'coalesced_rate': self.counters['coalesced'] / requests if requests else 0.0,
+                **{name: histogram.to_dict() for name, histogram in self.histograms.items()},
+            }
+
+    def metrics_text(self) -> Text:
+        """ Metrics of the service in the Prometheus text format """
+        lines = []
+        for name, value in self.metrics().items():
+            if isinstance(value, dict):
+                lines.append(f'# TYPE spmf_{name} histogram')
+                lines += [f'spmf_{name}_bucket{{le="{bound}"}} {count}' for bound, count in value['buckets'].items()]
+                lines += [f'spmf_{name}_sum {value["sum"]}', f'spmf_{name}_count {value["count"]}']
+            else:
+                lines.append(f'# TYPE spmf_{name} {"counter" if name.endswith("_total") else "gauge"}')
+                lines.append(f'spmf_{name} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    """ Answer the HTTP requests of the API """
+
+    def log_message(self, format: Text, *args) -> None:
+        """ Do not log each request """
+
+    def address_string(self) -> Text:
+        """ Address of the client, which has none on a Unix socket """
+        return str(self.client_address[0]) if self.client_address else 'unix'
+
+    def _send(self, code: int, body: Any, content_type: Text = 'application/json') -> None:
+        """ Send a response """
+        data = (body if isinstance(body, str) else json.dumps(body)).encode('UTF-8')
+        self.send_response(code)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _wait(self, job: Job, query: Dict[Text, List[Text]]) -> None:
+        """ Wait for a job if the query asks for it, with an optional timeout in seconds """
+        if query.get('wait', ['0'])[0] not in ('0', 'false', ''):
+            job.done.wait(float(query['timeout'][0]) if 'timeout' in query else None)
+
+    def do_GET(self) -> None:
+        """ Get the status of a job, the metrics or the health of the service """
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        service: MiningService = self.server.service
+
+        if url.path == '/metrics':
+            self._send(200, service.metrics_text(), 'text/plain; version=0.0.4')
+        elif url.path == '/health':
+            self._send(200, {'status': 'ok', 'workers': len(service.threads)})
+        elif url.path.startswith('/jobs/'):
+            try:
+                job = service.get(url.path[len('/jobs/'):])
+            except KeyError as e:
+                return self._send(404, {'error': str(e.args[0])})
+            self._wait(job, query)
+            self._send(200, job.to_dict())
+        else:
+            self._send(404, {'error': f'Unknown path {url.path}'})
+
+    def do_POST(self) -> None:
+        """ Submit a job """
+        url = urlsplit(self.path)
+        if url.path != '/jobs':
+            return self._send(404, {'error': f'Unknown path {url.path}'})
+
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+            job = self.server.service.submit(request)
+        except (KeyError, TypeError, ValueError) as e:
+            return self._send(400, {'error': f'{type(e).__name__}: {e}'})
+        self._wait(job, parse_qs(url.query))
+        self._send(200 if job.done.is_set() else 202, job.to_dict())
+
+
+class HTTPServer(http.server.ThreadingHTTPServer):
+    """ HTTP API of a mining service on a TCP port """
+
+    def __init__(self, service: MiningService, host: Text = '127.0.0.1', port: int = 0) -> None:
+        """ Initialize Object
+
+        :param service: Mining service
+        :param host: Interface to listen on. Default = '127.0.0.1'
+        :param port: Port to listen on. Default = 0 (any free port)
+        """
+        self.service = service
+        super().__init__((host, port), _Handler)
+
+    @property
+    def address(self) -> Address:
+        """ Address the server is listening on """
+        return self.server_address[:2]
+
+
+# Unix sockets are not available on Windows, where the service listens on a TCP port only
+if hasattr(socket, 'AF_UNIX'):
+
+    class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        """ HTTP API of a mining service on a Unix socket, reachable by the users of the machine only """
+
+        daemon_threads = True
+
+        def __init__(self, service: MiningService, path: Text) -> None:
+            """ Initialize Object
+
+            :param service: Mining service
+            :param path: Path of the socket file, removed when the server is closed
+            """
+            self.service = service
+            if os.path.exists(path):
+                os.remove(path)
+            super().__init__(path, _Handler)
+
+        @property
+        def address(self) -> Text:
+            """ Path of the socket file """
+            return self.server_address
+
+        def server_close(self) -> None:
+            """ Close the socket and remove its file """
+            super().server_close()
+            if os.path.exists(self.server_address):
+                os.remove(self.server_address)
+
+    class _UnixHTTPConnection(http.client.HTTPConnection):
+        """ HTTP connection over a Unix socket """
+
+        def __init__(self, path: Text, timeout: float = None) -> None:
+            super().__init__('localhost')
+            self.socket_path = path
+            self.socket_timeout = timeout
+
+        def connect(self) -> None:
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.settimeout(self.socket_timeout)
+            self.sock.connect(self.socket_path)
+
+
+class Client:
+    """ Submit mining jobs to a MiningService """
+
+    def __init__(self, address: Union[Address, Text], timeout: float = None) -> None:
+        """ Initialize Object
+
+        :param address: (host, port) of an HTTPServer, or path of the socket of a UnixHTTPServer
+        :param timeout (optional): Timeout in seconds of each request. Default = None (no timeout)
+        """
+        if isinstance(address, (str, os.PathLike)) and not hasattr(socket, 'AF_UNIX'):
+            raise ValueError('Unix sockets are not supported on this platform')
+        self.address = address
+        self.timeout = timeout
+
+    def _request(self, method: Text, path: Text, body: Any = None) -> Any:
+        """ Send a request to the service
+
+        :return: Decoded JSON response, or text of the metrics
+        """
+        if isinstance(self.address, (str, os.PathLike)):
+            connection = _UnixHTTPConnection(str(self.address), self.timeout)
+        else:
+            connection = http.client.HTTPConnection(*self.address, timeout=self.timeout)
+        try:
+            connection.request(method, path, json.dumps(body) if body is not None else None,
+                               {'Content-Type': 'application/json'})
+            response = connection.getresponse()
+            data = response.read().decode('UTF-8')
+        finally:
+            connection.close()
+
+        if response.status >= 400:
+            raise RuntimeError(f'{response.status}: {json.loads(data)["error"]}')
+        return json.loads(data) if response.getheader('Content-Type') == 'application/json' else data
+
+    def submit(self, algorithm: Spmf, input_df: pd.DataFrame) -> Text:
+        """ Submit a job, without waiting for it
+
+        :param algorithm: SPMF algorithm object
+        :param input_df: Input Dataframe, as in run_pandas
+        :return: Identifier of the job
+        """
+        request = {
+            'algorithm': type(algorithm).__name__,
+            'state': get_algorithm_state(algorithm),
+            'input': {'columns': [str(column) for column in input_df.columns],
+                      'data': json.loads(input_df.to_json(orient='values'))},
+        }
+        return self._request('POST', '/jobs', request)['id']
+
+    def status(self, id: Text) -> Dict[Text, Any]:
+        """ Get the status of a job, as returned by GET /jobs/<id> """
+        return self._request('GET', f'/jobs/{id}')
+
+    def result(self, id: Text) -> pd.DataFrame:
+        """ Wait for a job and get its output
+
+        :param id: Identifier of the job
+        :return: Output Dataframe. The sequence index of show_seq_ids is not returned
+        """
+        status = self._request('GET', f'/jobs/{id}?wait=1')
+        if status['status'] == 'failed':
+            raise RuntimeError(status['error'])
+        return pd.DataFrame(status['result']['data'], columns=status['result']['columns'])
+
+    def run_pandas(self, algorithm: Spmf, input_df: pd.DataFrame) -> pd.DataFrame:
+        """ Run SPMF algorithm on Pandas Dataframe in the service. Equivalent to algorithm.run_pandas(input_df)
+
+        :param algorithm: SPMF algorithm object
+        :param input_df: Input Dataframe
+        :return: Output Dataframe
+        """
+        return self.result(self.submit(algorithm, input_df))
+
+    def metrics(self) -> Dict[Text, float]:
+        """ Get the metrics of the service
+
+        :return: Value of each Prometheus sample, such as 'spmf_queue_depth' or 'spmf_run_seconds_bucket{le="1"}'
+        """
+        lines = self._request('GET', '/metrics').splitlines()
+        return {line.rsplit(' ', 1)[0]: float(line.rsplit(' ', 1)[1]) for line in lines if not line.startswith('#')}
+
+
+def main() -> None:
+    """ Start a mining service from the command line """
+    parser = argparse.ArgumentParser(description='SPMF local mining service')
+    parser.add_argument('--host', default='127.0.0.1', help='Interface to listen on')
+    parser.add_argument('--port', type=int, default=0, help='Port to listen on (0 for any free port)')
+    parser.add_argument('--socket', help='Path of a Unix socket to listen on, instead of a TCP port')
+    parser.add_argument('--workers', type=int, default=None, help='Number of jobs run at the same time')
+    parser.add_argument('--state-dir', default=None, help='Directory where jobs are saved')
+    parser.add_argument('--cache-size', type=int, default=1024, help='Number of finished jobs kept')
+    args = parser.parse_args()
+    if args.socket and not hasattr(socket, 'AF_UNIX'):
+        parser.error('Unix sockets are not supported on this platform')
+
+    service = MiningService(args.workers, args.state_dir, args.cache_size).start()
+    server = UnixHTTPServer(service, args.socket) if args.socket else HTTPServer(service, args.host, args.port)
+    with server:
+        print(server.address if args.socket else '{}:{}'.format(*server.address), flush=True)
+        try:
+            server.serve_forever()
+        finally:
+            service.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,207 @@
+""" Persistent Result Store
+
+Mining results are saved to an Arrow IPC file, which is memory-mapped when it is loaded again:
+- Patterns are stored as lists of itemsets, themselves lists of dictionary encoded items. The item labels are
+  stored once, in the dictionary, and the patterns are integer codes and list offsets.
+- The other output columns (support, confidence, bounds) are numeric columns.
+- The run metadata, which is the algorithm, its parameters and run statistics, the item dictionary of its input
+  encoding and a hash of the input dataframe, is stored as JSON in the schema metadata.
+
+Loading only maps the file, whatever its size. The pages of a column are read when it is used, so a query on the
+supports does not read the patterns, and patterns are decoded to strings only for the rows asked for.
+"""
+
+import json
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Text
+
+import numpy as np
+import pandas as pd
+
+from spmf.base import Spmf
+from spmf.distributed import create_algorithm, get_algorithm_state
+from spmf.patterns import EPISODE_COLUMN, SEQUENTIAL_COLUMN
+from spmf.pipeline import fingerprint
+
+# Version of the layout of the result files
+FORMAT_VERSION = 1
+
+# Key of the run metadata in the schema metadata
+METADATA_KEY = b'spmf'
+
+
+def _import_pyarrow() -> Any:
+    """ Import pyarrow, an optional dependency """
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise ImportError('pyarrow is required to save and load results: pip install spmf-wrapper[arrow]')
+    return pa
+
+
+def _encode_patterns(patterns: pd.Series) -> Any:
+    """ Encode patterns such as 'a b -> c' as lists of itemsets of dictionary encoded items. Splitting on single
+        separators is reversed by _decode_patterns for any string, such as the rules of episode rule mining
+
+    :param patterns: Patterns in the format of the output dataframes
+    :return: Arrow list array
+    """
+    pa = _import_pyarrow()
+    import pyarrow.compute as pc
+
+    strings = pa.array(patterns.astype(str).to_numpy(), type=pa.string())
+    itemsets = pc.split_pattern(strings, ' -> ')
+    items = pc.split_pattern(itemsets.flatten(), ' ')
+    return pa.ListArray.from_arrays(itemsets.offsets, pa.ListArray.from_arrays(
+        items.offsets, pc.dictionary_encode(items.flatten())))
+
+
+def _decode_patterns(encoded: Any) -> Any:
+    """ Format patterns encoded by _encode_patterns as strings
+
+    :param encoded: Arrow list array of the encoded patterns
+    :return: Arrow string array
+    """
+    pa = _import_pyarrow()
+    import pyarrow.compute as pc
+
+    itemsets = encoded.values
+    items = itemsets.values.dictionary.take(itemsets.values.indices)
+    itemsets = pc.binary_join(pa.ListArray.from_arrays(itemsets.offsets, items), ' ')
+    return pc.binary_join(pa.ListArray.from_arrays(encoded.offsets, itemsets), ' -> ')
+
+
+def save_results(path: Text, output_df: pd.DataFrame, algorithm: Spmf = None, input_df: pd.DataFrame = None,
+                 compression: Text = None) -> None:
+    """ Save the output dataframe of a mining algorithm, with the metadata of its run. Requires pyarrow
+
+    :param path: File path, such as 'results.arrow'
+    :param output_df: Output dataframe of a Sequential Pattern Mining or Episode Mining algorithm
+    :param algorithm (optional): Algorithm object which returned the output, whose class, parameters and item
+        dictionary are saved. Default = None
+    :param input_df (optional): Input dataframe of the run, whose fingerprint is saved. Default = None
+    :param compression (optional): 'lz4' or 'zstd' to compress the columns, for archives. Compressed columns are
+        decompressed in memory when they are loaded, instead of being memory-mapped. Default = None
+    """
+    pa = _import_pyarrow()
+
+    column = SEQUENTIAL_COLUMN if SEQUENTIAL_COLUMN in output_df else EPISODE_COLUMN
+    if column not in output_df:
+        raise ValueError(f"The output dataframe has no '{SEQUENTIAL_COLUMN}' or '{EPISODE_COLUMN}' column")
+
+    arrays = {column: _encode_patterns(output_df[column])}
+    for name in output_df.columns.drop(column):
+        values = output_df[name]
+        try:
+            values = pd.to_numeric(values)     # output dataframes are built with the object dtype
+        except (TypeError, ValueError):
+            pass
+        arrays[str(name)] = pa.array(values.to_numpy())
+
+    metadata = {
+        'version': FORMAT_VERSION,
+        'created': datetime.now(timezone.utc).isoformat(),
+        'column': column,
+        'algorithm': type(algorithm).__name__ if algorithm is not None else None,
+        'parameters': get_algorithm_state(algorithm) if algorithm is not None else None,
+        'mapping': getattr(algorithm, 'mapping', None),
+        'statistics': getattr(algorithm, 'run_statistics', None),
+        'input_hash': fingerprint(input_df) if input_df is not None else None,
+    }
+    table = pa.table(arrays).replace_schema_metadata({METADATA_KEY: json.dumps(metadata, default=str)})
+
+    options = pa.ipc.IpcWriteOptions(compression=compression)
+    with pa.OSFile(str(path), 'wb') as fp, pa.ipc.new_file(fp, table.schema, options=options) as writer:
+        writer.write_table(table)
+
+
+def load_results(path: Text) -> 'Results':
+    """ Load results saved with save_results, memory-mapping the file. Requires pyarrow
+
+    :param path: File path
+    :return: Results
+    """
+    pa = _import_pyarrow()
+    table = pa.ipc.open_file(pa.memory_map(str(path), 'r')).read_all()
+    if METADATA_KEY not in (table.schema.metadata or {}):
+        raise ValueError(f'{path} was not saved by save_results')
+    return Results(table, json.loads(table.schema.metadata[METADATA_KEY]))
+
+
+class Results:
+    """ Mining results loaded by load_results """
+
+    def __init__(self, table: Any, metadata: Dict[Text, Any]) -> None:
+        """ Initialize Object. Use load_results to create the results
+
+        :param table: Arrow table of the encoded patterns and the other output columns, memory-mapped
+        :param metadata: Run metadata: version, created, column, algorithm, parameters, mapping, statistics and
+            input_hash
+        """
+        self.table = table
+        self.metadata = metadata
+        self.column = metadata['column']
+
+    def __len__(self) -> int:
+        """ Number of saved patterns """
+        return self.table.num_rows
+
+    @property
+    def columns(self) -> List[Text]:
+        """ Names of the output columns """
+        return self.table.column_names
+
+    @property
+    def input_hash(self) -> Text:
+        """ Fingerprint of the input dataframe, comparable with spmf.pipeline.fingerprint. None if unknown """
+        return self.metadata['input_hash']
+
+    @property
+    def algorithm(self) -> Spmf:
+        """ Algorithm object with the saved parameters, or None if no algorithm was saved """
+        if self.metadata['algorithm'] is None:
+            return None
+        return create_algorithm(self.metadata['algorithm'], self.metadata['parameters'])
+
+    def values(self, name: Text) -> np.ndarray:
+        """ Values of a numeric output column, such as 'Support', without copy when the column is in one chunk
+
+        :param name: Name of the column
+        :return: Numpy array
+        """
+        return self.table.column(name).to_numpy()
+
+    def _pattern_array(self, rows: np.ndarray = None) -> np.ndarray:
+        """ Patterns of some rows, as an array of strings """
+        encoded = self.table.column(self.column)
+        if rows is not None:
+            encoded = encoded.take(np.asarray(rows, dtype=np.int64))
+        return np.concatenate([_decode_patterns(chunk).to_numpy(zero_copy_only=False) for chunk in encoded.chunks]
+                              or [np.empty(0, dtype=object)])
+
+    def patterns(self, rows: np.ndarray = None) -> List[Text]:
+        """ Patterns of some rows, such as 'a b -> c'
+
+        :param rows (optional): Rows of the patterns. Default = all the patterns
+        :return: List of patterns
+        """
+        return self._pattern_array(rows).tolist()
+
+    def to_dataframe(self, rows: np.ndarray = None, columns: List[Text] = None) -> pd.DataFrame:
+        """ Create a dataframe in the format of the mining algorithms output
+
+        :param rows (optional): Rows of the patterns, such as np.flatnonzero(results.values('Support') > 100).
+            Default = all the patterns
+        :param columns (optional): Output columns to read. Default = all the columns
+        :return: Dataframe of the patterns and their other columns, indexed by row
+        """
+        columns = self.columns if columns is None else columns
+        index = np.arange(len(self)) if rows is None else np.asarray(rows, dtype=np.int64)
+        output = {}
+        for name in columns:
+            if name == self.column:
+                output[name] = self._pattern_array(rows)
+            else:
+                values = self.table.column(name)
+                output[name] = (values if rows is None else values.take(index)).to_numpy()
+        return pd.DataFrame(output, index=index, columns=columns)
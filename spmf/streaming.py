@@ -0,0 +1,304 @@
+""" Episode Mining on Event Streams """
+
+import asyncio
+import math
+import re
+from collections import deque
+from typing import (AsyncIterable, AsyncIterator, Dict, Hashable, Iterable,
+                    Iterator, List, NamedTuple, Optional, Text, Tuple)
+
+import pandas as pd
+
+from spmf.episode import Episode, EpisodeRules
+from spmf.patterns import EPISODE_COLUMN, format_pattern, parse_pattern
+
+
+class Match(NamedTuple):
+    """ Occurrence of an episode, or of the antecedent of an episode rule, completed on the stream """
+
+    pattern: Text   # episode or rule, as in the output dataframe
+    start: float    # time of the first event of the occurrence
+    end: float      # time of the event completing the occurrence
+
+
+def parse_rule_antecedent(rule: Text) -> Tuple[Tuple[Text, ...], ...]:
+    """ Parse the antecedent of an episode rule, such as '{a}{b,c} ==> {d}'
+
+    :param rule: Episode rule as in the output dataframe of the episode rule mining algorithms
+    :return: Tuple of itemsets, each itemset being a sorted tuple of items
+    """
+    itemsets = re.findall(r'\{([^}]*)\}', rule.split('==>')[0])
+    return tuple(tuple(sorted(re.split(r'[,\s]+', itemset.strip()))) for itemset in itemsets)
+
+
+class EpisodeMatcher:
+    """ Detect the occurrences of mined episodes on a live event stream.
+
+    The episodes are compiled into a prefix trie of itemsets. Each node of the trie keeps the latest start time
+    of a partial occurrence reaching it, since a later start leaves more of the window to complete the episode.
+    Partial occurrences older than max_window are ignored, so the state never grows beyond one entry per node.
+    """
+
+    def __init__(self, patterns: List[Text], max_window: float) -> None:
+        """ Initialize Object
+
+        :param patterns: Episodes such as 'a -> b c', or episode rules such as '{a} ==> {b}' which are matched
+            on their antecedent
+        :param max_window: maximum window length, as given to the episode mining algorithm
+        """
+        self.patterns = list(patterns)
+        self.max_window = max_window
+
+        self.n_nodes = 1                        # node 0 is the empty prefix
+        self.terminal: Dict[int, List[Text]] = {}   # patterns completed when reaching a node
+
+        # Transitions of the trie indexed by each item of their itemset, as (parent, child, itemset).
+        # The itemset is None for single items, which need no further check.
+        self.edges: Dict[Hashable, List[Tuple[int, int, frozenset]]] = {}
+
+        children: Dict[Tuple[int, Tuple], int] = {}
+        for pattern in self.patterns:
+            node = 0
+            itemsets = parse_rule_antecedent(pattern) if '==>' in pattern else parse_pattern(pattern)
+            for itemset in itemsets:
+                if (node, itemset) not in children:
+                    children[(node, itemset)] = self.n_nodes
+                    for item in itemset:
+                        edge = (node, self.n_nodes, frozenset(itemset) if len(itemset) > 1 else None)
+                        self.edges.setdefault(item, []).append(edge)
+                    self.n_nodes += 1
+                node = children[(node, itemset)]
+            self.terminal.setdefault(node, []).append(pattern)
+
+        self.reset()
+
+    @classmethod
+    def from_dataframe(cls, output_df: pd.DataFrame, max_window: float) -> 'EpisodeMatcher':
+        """ Compile the output dataframe of an episode or episode rule mining algorithm
+
+        :param output_df: Output dataframe of EMMA, TKE, AFEM, MaxFEM or of an episode rule mining algorithm
+        :param max_window: maximum window length, as given to the episode mining algorithm
+        :return: Episode matcher
+        """
+        return cls(output_df[EPISODE_COLUMN].to_list(), max_window)
+
+    def reset(self) -> None:
+        """ Forget all partial occurrences """
+        self.start = [-math.inf] * self.n_nodes     # latest start of a partial occurrence reaching each node
+        self.time = -math.inf                       # time point being received
+        self.itemset = set()                        # items received at that time point
+        self.pending: Dict[int, float] = {}         # nodes reached at that time point
+
+    def _commit(self) -> None:
+        """ Make the nodes reached at the current time point available to the next ones """
+        start = self.start
+        for node, node_start in self.pending.items():
+            if node_start > start[node]:
+                start[node] = node_start
+        self.pending = {}
+
+    def process(self, time: float, item: Hashable) -> List[Match]:
+        """ Receive one event. Events must arrive in time order, events of the same time point form an itemset.
+
+        :param time: Time of the event
+        :param item: Item of the event, compared with the items of the patterns as a string
+        :return: List of the occurrences completed by the event
+        """
+        if time != self.time:
+            if time < self.time:
+                raise ValueError(f'Event at time {time} received after time {self.time}')
+            self._commit()
+            self.time, self.itemset = time, set()
+
+        # Items of the patterns are strings, as in the output dataframes
+        item = str(item)
+        if item in self.itemset:
+            return []
+        self.itemset.add(item)
+
+        matches = []
+        start, pending, terminal, itemset = self.start, self.pending, self.terminal, self.itemset
+        earliest = time - self.max_window
+        for parent, child, edge_itemset in self.edges.get(item, ()):
+            node_start = start[parent] if parent else time
+            if node_start <= earliest or (edge_itemset is not None and not edge_itemset <= itemset):
+                continue
+
+            previous = pending.get(child)
+            if previous is None:
+                pending[child] = node_start
+                if child in terminal:
+                    matches += [Match(pattern, node_start, time) for pattern in terminal[child]]
+            elif node_start > previous:
+                pending[child] = node_start
+
+        return matches
+
+    def process_batch(self, events: Iterable[Tuple[float, Hashable]]) -> List[Match]:
+        """ Receive a micro-batch of events
+
+        :param events: Iterable of (time, item) in time order
+        :return: List of the occurrences completed by the events
+        """
+        matches = []
+        for time, item in events:
+            matches += self.process(time, item)
+        return matches
+
+
+class EpisodeDiff(NamedTuple):
+    """ Changes of the mined episodes between two mining steps of a StreamingEpisodeMiner """
+
+    time: float                             # latest time point covered by the mining step
+    appeared: Dict[Text, int]               # new episodes and their support
+    disappeared: Dict[Text, int]            # episodes no longer frequent and their previous support
+    changed: Dict[Text, Tuple[int, int]]    # episodes still frequent, with their previous and new support
+    output: pd.DataFrame                    # output dataframe of the mining step
+
+
+class StreamingEpisodeMiner:
+    """ Mine episodes over a sliding time window of an event stream.
+
+    Events are kept in a ring buffer of the time points in the last window time units. Items are encoded
+    once on arrival with a dictionary limited to the items in the buffer, and each time point is serialized
+    once, so a mining step only writes the buffer to the SPMF input file. Memory is bounded by the window.
+    """
+
+    def __init__(self, algorithm: Episode, window: float, cadence: float) -> None:
+        """ Initialize Object
+
+        :param algorithm: Episode mining algorithm, such as EMMA(min_support=10, max_window=5)
+        :param window: length of the sliding window, in time units
+        :param cadence: time units between two mining steps
+        """
+        if not isinstance(algorithm, Episode) or isinstance(algorithm, EpisodeRules):
+            raise TypeError(f'Streaming mining requires an episode mining algorithm, got {type(algorithm).__name__}')
+
+        self.algorithm = algorithm._copy()
+        self.algorithm.timestamp_present = True
+        self.window = window
+        self.cadence = cadence
+
+        self.buffer = deque()                   # (time, codes, serialized line) of each time point in the window
+        self.time = -math.inf                   # time point being received
+        self.itemset = set()                    # codes of the items received at that time point
+        self.next_mining = None                 # time at which the next mining step is due
+
+        self.codes: Dict[Hashable, int] = {}    # item dictionary, restricted to the items in the window
+        self.items: Dict[int, Hashable] = {}
+        self.counts: Dict[int, int] = {}        # number of time points in the window containing each code
+        self.free_codes: List[int] = []
+        self.supports: Dict[Text, int] = {}     # episodes found by the latest mining step
+
+    def _encode(self, item: Hashable) -> int:
+        """ Get the code of an item, reusing the codes of the items which left the window """
+        code = self.codes.get(item)
+        if code is None:
+            code = self.free_codes.pop() if self.free_codes else len(self.codes) + 1
+            self.codes[item], self.items[code], self.counts[code] = code, item, 0
+        return code
+
+    def _close(self) -> None:
+        """ Serialize the time point being received into the buffer """
+        if self.itemset:
+            codes = sorted(self.itemset)
+            self.buffer.append((self.time, codes, f"{' '.join(map(str, codes))}|{self.time}"))
+            self.itemset = set()
+
+    def _evict(self) -> None:
+        """ Remove the time points which left the window, and their items from the dictionary """
+        while self.buffer and self.buffer[0][0] <= self.time - self.window:
+            _, codes, _ = self.buffer.popleft()
+            for code in codes:
+                self.counts[code] -= 1
+                if not self.counts[code]:
+                    del self.codes[self.items.pop(code)], self.counts[code]
+                    self.free_codes.append(code)
+
+    def _due(self, time: float) -> bool:
+        """ Check if a mining step is due before receiving an event at the given time """
+        if self.next_mining is None:
+            self.next_mining = time + self.cadence
+        if time < self.next_mining:
+            return False
+        while self.next_mining <= time:
+            self.next_mining += self.cadence
+        return True
+
+    def _add(self, time: float, item: Hashable) -> None:
+        """ Add one event to the buffer """
+        if time != self.time:
+            if time < self.time:
+                raise ValueError(f'Event at time {time} received after time {self.time}')
+            self._close()
+            self.time = time
+            self._evict()
+
+        code = self._encode(item)
+        if code not in self.itemset:
+            self.itemset.add(code)
+            self.counts[code] += 1
+
+    def mine(self) -> EpisodeDiff:
+        """ Mine the episodes of the time points in the window
+
+        :return: Changes of the episodes since the previous mining step
+        """
+        self._close()
+        algorithm = self.algorithm
+
+        if self.buffer:
+            output = algorithm._run_encoded('\n'.join(line for _, _, line in self.buffer),
+                                            {str(code): str(item) for code, item in self.items.items()})
+            # Items are sorted by name in itemsets, since codes and hence their order change between steps
+            output[EPISODE_COLUMN] = [format_pattern(parse_pattern(episode)) for episode in output[EPISODE_COLUMN]]
+        else:
+            output = algorithm._create_output_dataframe([], [])
+
+        supports = dict(zip(output[EPISODE_COLUMN], output['Support']))
+        previous, self.supports = self.supports, supports
+        return EpisodeDiff(
+            time=self.time,
+            appeared={episode: support for episode, support in supports.items() if episode not in previous},
+            disappeared={episode: support for episode, support in previous.items() if episode not in supports},
+            changed={
+                episode: (previous[episode], support) for episode, support in supports.items()
+                if episode in previous and previous[episode] != support
+            },
+            output=output,
+        )
+
+    def push(self, time: float, item: Hashable) -> Optional[EpisodeDiff]:
+        """ Receive one event. Events must arrive in time order, events of the same time point form an itemset.
+
+        :param time: Time of the event
+        :param item: Item of the event
+        :return: Changes of the episodes if a mining step was due before the event, else None
+        """
+        diff = self.mine() if self._due(time) else None
+        self._add(time, item)
+        return diff
+
+    def run(self, events: Iterable[Tuple[float, Hashable]]) -> Iterator[EpisodeDiff]:
+        """ Mine an event stream on the configured cadence
+
+        :param events: Iterable of (time, item) in time order
+        :return: Iterator over the changes of the episodes at each mining step
+        """
+        for time, item in events:
+            diff = self.push(time, item)
+            if diff is not None:
+                yield diff
+
+    async def arun(self, events: AsyncIterable[Tuple[float, Hashable]]) -> AsyncIterator[EpisodeDiff]:
+        """ Mine an asynchronous event stream on the configured cadence. SPMF runs in a thread,
+            so that the event loop keeps running during a mining step.
+
+        :param events: Async iterable of (time, item) in time order
+        :return: Async iterator over the changes of the episodes at each mining step
+        """
+        loop = asyncio.get_running_loop()
+        async for time, item in events:
+            if self._due(time):
+                yield await loop.run_in_executor(None, self.mine)
+            self._add(time, item)
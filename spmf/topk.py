@@ -0,0 +1,174 @@
+""" Exact Top-K Mining on Sharded Inputs
+
+A shard's top-k is not the global top-k, so sharded mining runs in three steps:
+    1. Mine the top-k of every shard. The supports found give a lower bound on the global k-th support.
+    2. Re-mine every shard with a frequent pattern algorithm at that bound, to get every candidate.
+    3. Count the exact global support of each candidate and keep the top-k.
+"""
+
+import math
+from typing import Dict, List, Text, Tuple
+
+import pandas as pd
+
+from spmf.episode import EMMA, TKE
+from spmf.patterns import (Pattern, PatternSet, format_pattern, parse_pattern,
+                           pattern_length)
+from spmf.prefilter import THRESHOLD_MARGIN
+from spmf.seq_pat import TKS, PrefixSpan
+
+
+def top_k(supports: Dict[Pattern, int], k: int, column: Text) -> pd.DataFrame:
+    """ Create the output dataframe with the patterns whose support is at least the k-th highest support
+
+    :param supports: Dictionary of candidate patterns and their exact support
+    :param k: number of patterns to output
+    :param column: Name of the pattern column
+    :return: Dataframe containing patterns and corresponding support
+    """
+    ranked = sorted(supports.items(), key=lambda x: (-x[1], x[0]))
+    if len(ranked) > k:
+        ranked = [(pattern, support) for pattern, support in ranked if support >= ranked[k - 1][1]]
+
+    patterns = [format_pattern(pattern) for pattern, _ in ranked]
+    return pd.DataFrame((patterns, [support for _, support in ranked]), index=[column, 'Support']).T
+
+
+def kth_lower_bound(shard_outputs: List[pd.DataFrame], k: int, column: Text) -> int:
+    """ Lower bound on the global k-th support from the top-k of disjoint shards
+
+    :param shard_outputs: Output dataframes of the shards
+    :param k: number of patterns to output
+    :param column: Name of the pattern column
+    :return: Lower bound on the global k-th support
+    """
+    bounds = pd.concat(shard_outputs).groupby(column)['Support'].sum().sort_values(ascending=False)
+    return int(bounds.iloc[k - 1]) if len(bounds) >= k else 1
+
+
+class ShardedTKS:
+    """ Exact Top-K Sequential Patterns mined on shards of the sequence database in parallel """
+
+    def __init__(self, k: int, n_shards: int = 4, min_pattern_length: int = None, max_pattern_length: int = None,
+                 max_workers: int = None, **kwargs) -> None:
+        """ Initialize Object
+
+        :param k: number of patterns to output
+        :param n_shards: number of shards the sequences are split into. Default = 4
+        :param min_pattern_length (optional): minimum pattern length in the output. Default = 1
+        :param max_pattern_length (optional): maximum pattern length in the output. Default = +inf
+        :param max_workers: Maximum number of SPMF processes running at the same time. Default = number of CPUs
+        :param kwargs: Keyword arguments to base SPMF. (memory and executable_path)
+        """
+        self.k = k
+        self.n_shards = n_shards
+        self.min_pattern_length = min_pattern_length if min_pattern_length else 1
+        self.max_pattern_length = max_pattern_length
+        self.max_workers = max_workers
+        self.kwargs = kwargs
+
+    def _split(self, input_df: pd.DataFrame) -> List[pd.DataFrame]:
+        """ Split the sequences round-robin into shards """
+        shard = input_df.groupby('ID', sort=False).ngroup() % self.n_shards
+        return [shard_df for _, shard_df in input_df.groupby(shard)]
+
+    def run_pandas(self, input_df: pd.DataFrame) -> pd.DataFrame:
+        """ Run sharded TKS on Pandas Dataframe
+
+        :param input_df: Input Dataframe containing Sequence IDs in 'ID' column, time in
+            'Time Points' column and items in 'Items' column.
+        :return: Dataframe containing the top-k sequential patterns and support.
+        """
+        column = 'Frequent sequential pattern'
+        shards = self._split(input_df)
+        n_sequences = input_df['ID'].nunique()
+
+        tks = TKS(self.k, self.min_pattern_length, self.max_pattern_length, **self.kwargs)
+        bound = kth_lower_bound(tks.run_many(shards, self.max_workers), self.k, column)
+
+        # A pattern with global support >= bound has support >= bound * n_i / n in at least one shard
+        prefixspan = PrefixSpan(bound / n_sequences * THRESHOLD_MARGIN, self.max_pattern_length, **self.kwargs)
+        shard_outputs = [
+            output.assign(Pattern=output[column].map(parse_pattern)).set_index('Pattern')['Support']
+            for output in prefixspan.run_many(shards, self.max_workers)
+        ]
+        candidates = {
+            pattern for output in shard_outputs for pattern in output.index
+            if pattern_length(pattern) >= self.min_pattern_length
+        }
+
+        supports = dict.fromkeys(candidates, 0)
+        for shard, output in zip(shards, shard_outputs):
+            missing = [pattern for pattern in candidates if pattern not in output.index]
+            counted = PatternSet([format_pattern(pattern) for pattern in missing]).count_support(shard)
+            for pattern in candidates:
+                supports[pattern] += output.get(pattern, 0)
+            for pattern, support in zip(missing, counted['Support']):
+                supports[pattern] += support
+
+        return top_k(supports, self.k, column)
+
+
+class ShardedTKE:
+    """ Exact Top-K Frequent Episodes mined on time shards of the event sequence in parallel """
+
+    def __init__(self, k: int, max_window: int, timestamp_present: bool = False, n_shards: int = 4,
+                 max_workers: int = None, **kwargs) -> None:
+        """ Initialize Object
+
+        :param k: (a positive integer) indicating the number of episodes to find
+        :param max_window: maximum window length
+        :param timestamp_present: Bool indicating if timestamp is present
+        :param n_shards: number of time ranges the event sequence is split into. Default = 4
+        :param max_workers: Maximum number of SPMF processes running at the same time. Default = number of CPUs
+        :param kwargs: Keyword arguments to base SPMF. (transform, memory and executable_path)
+        """
+        self.k = k
+        self.max_window = max_window
+        self.timestamp_present = timestamp_present
+        self.n_shards = n_shards
+        self.max_workers = max_workers
+        self.kwargs = kwargs
+
+    def _split(self, time: pd.Series) -> List[Tuple[float, float]]:
+        """ Split the time points into contiguous ranges of equal size
+
+        :return: List of (start, end) of each time range
+        """
+        times = time.drop_duplicates().sort_values().to_list()
+        size = math.ceil(len(times) / self.n_shards)
+        starts = times[::size]
+        return list(zip(starts, starts[1:] + [math.inf]))
+
+    def run_pandas(self, input_df: pd.DataFrame) -> pd.DataFrame:
+        """ Run sharded TKE on Pandas Dataframe
+
+        :param input_df: Input Dataframe containing Itemsets in 'Itemset' column
+            NOTE: If Timestamp present, dataframe should contain it in 'Time points' column
+        :return: Dataframe containing the top-k episodes and support.
+        """
+        column = 'Frequent episode'
+        df = input_df if self.timestamp_present else input_df.reset_index(names='Time points')
+        time = pd.to_numeric(df['Time points'])
+        ranges = self._split(time)
+
+        # Occurrences are counted in the shard where they start, hence shards overlap by max_window
+        shards = [df[(time >= start) & (time < end)] for start, end in ranges]
+        extended_shards = [df[(time >= start) & (time < end + self.max_window)] for start, end in ranges]
+
+        tke = TKE(self.k, self.max_window, timestamp_present=True, **self.kwargs)
+        bound = kth_lower_bound(tke.run_many(shards, self.max_workers), self.k, column)
+
+        # An episode with support >= bound has at least bound / n_shards occurrences starting in one shard
+        emma = EMMA(math.ceil(bound / len(ranges)), self.max_window, timestamp_present=True, **self.kwargs)
+        candidates = {
+            parse_pattern(pattern) for output in emma.run_many(extended_shards, self.max_workers)
+            for pattern in output[column]
+        }
+
+        candidates = list(candidates)
+        episodes = PatternSet([format_pattern(pattern) for pattern in candidates], kind='episode',
+                              max_window=self.max_window)
+        counted = episodes.count_support(df.assign(**{'Time points': time}), max_workers=self.max_workers,
+                                         chunk_size=time.nunique() // len(ranges) + 1)
+        return top_k(dict(zip(candidates, counted['Support'])), self.k, column)
@@ -0,0 +1,45 @@
+""" Test Suite for Compressed Inputs and Outputs """
+
+import os
+import shutil
+
+import pytest
+
+from spmf import compression
+from spmf.episode import EMMA
+from spmf.seq_pat import PrefixSpan
+
+seqpat_test_file_path = os.path.join('tests', 'test_files', 'contextPrefixSpan.txt')
+episode_test_file_path = os.path.join('tests', 'test_files', 'contextEMMA.txt')
+
+
+def compress(path: str, compressed_path: str) -> str:
+    """ Compress a file """
+    with open(path, 'rb') as source, compression.open_file(compressed_path, 'wb') as fp:
+        shutil.copyfileobj(source, fp)
+    return compressed_path
+
+
+@pytest.mark.parametrize('extension', ['.gz', '.zst'])
+def test_compressed_input_and_archive(tmp_path, monkeypatch, extension) -> None:
+    """ Test running on compressed inputs and archiving compressed outputs, copied by several blocks """
+    if extension == '.zst':
+        pytest.importorskip('zstandard')
+    monkeypatch.setattr(compression, 'BLOCK_SIZE', 64)
+
+    expected = PrefixSpan(min_support=0.5).run_file(seqpat_test_file_path)
+    input_file_name = compress(seqpat_test_file_path, str(tmp_path / f'input.txt{extension}'))
+    archive = str(tmp_path / f'output.txt{extension}')
+    assert PrefixSpan(min_support=0.5).run_file(input_file_name, archive=archive) == expected
+    assert sorted(os.listdir(tmp_path)) == [f'input.txt{extension}', f'output.txt{extension}']
+
+    with compression.open_file(archive, 'rt') as fp:
+        lines = fp.readlines()
+    assert len(lines) == len(expected[0]) and lines[0].startswith('1 -1 #SUP: 4')
+    PrefixSpan(min_support=0.5).run_file(seqpat_test_file_path, archive=str(tmp_path / 'output.txt'))
+    with open(tmp_path / 'output.txt') as fp:
+        assert fp.read() == ''.join(lines)
+
+    algorithm = EMMA(min_support=2, max_window=2, timestamp_present=True)
+    input_file_name = compress(episode_test_file_path, str(tmp_path / f'events.txt{extension}'))
+    assert algorithm.run_file(input_file_name) == algorithm.run_file(episode_test_file_path)
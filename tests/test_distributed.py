@@ -0,0 +1,126 @@
+""" Test Suite for Distributed Mining """
+
+import socket
+import subprocess
+import sys
+import threading
+import time
+from typing import Iterator, List
+
+import pytest
+
+from spmf.distributed import Coordinator, Worker
+from spmf.episode import EMMA
+from spmf.seq_pat import TKS, PrefixSpan
+from tests.test_episode_mining import \
+    create_mock_raw_dataframe as create_mock_episode_dataframe
+from tests.test_seqpat_mining import create_mock_raw_dataframe
+from tests.utils import as_dict, create_random_sequences
+
+
+@pytest.fixture(scope='module')
+def workers() -> Iterator[List]:
+    """ Start two worker processes on localhost """
+    processes = [subprocess.Popen([sys.executable, '-m', 'spmf.distributed', '--port', '0'],
+                                  stdout=subprocess.PIPE, text=True) for _ in range(2)]
+    addresses = []
+    for process in processes:
+        host, port = process.stdout.readline().strip().split(':')
+        addresses.append((host, int(port)))
+
+    yield addresses
+
+    for process in processes:
+        process.terminate()
+        process.wait()
+
+
+def unused_address() -> tuple:
+    """ Get a localhost address nobody is listening on """
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()
+
+
+def test_run_many_local() -> None:
+    """ Test local run_many against run_pandas """
+    mock_df = create_mock_raw_dataframe()
+    outputs = PrefixSpan(min_support=0.5).run_many([mock_df, mock_df.iloc[:16]])
+    assert len(outputs) == 2
+    assert outputs[0].equals(PrefixSpan(min_support=0.5).run_pandas(mock_df))
+    assert outputs[1].equals(PrefixSpan(min_support=0.5).run_pandas(mock_df.iloc[:16]))
+
+
+def test_coordinator_seqpat(workers: List) -> None:
+    """ Test distributed PrefixSpan against local run_many """
+    mock_df = create_mock_raw_dataframe()
+    input_dfs = [mock_df, mock_df.iloc[:16], mock_df.iloc[9:]]
+    prefixspan = PrefixSpan(min_support=0.5)
+
+    outputs = Coordinator(workers).run_many(prefixspan, input_dfs)
+    expected = prefixspan.run_many(input_dfs)
+    assert len(outputs) == 3
+    assert all(output.equals(other) for output, other in zip(outputs, expected))
+
+
+def test_coordinator_required_items(workers: List) -> None:
+    """ Test distributed mining with required items against run_pandas """
+    sequences = create_random_sequences(0, 200, seed=1)
+    for algorithm in [PrefixSpan(min_support=0.05, required_items=['d', 'g']), TKS(k=3, required_items=['d', 'g']),
+                      TKS(k=3, required_items=['d', 'z'])]:
+        outputs = Coordinator(workers).run_many(algorithm, [sequences])
+        assert as_dict(outputs[0]) == as_dict(algorithm.run_pandas(sequences))
+
+    with pytest.raises(ValueError):
+        Coordinator(workers).run_many(PrefixSpan(min_support=0.05, approximate=True, sample_size=100), [sequences])
+
+
+def test_coordinator_episode(workers: List) -> None:
+    """ Test distributed EMMA against local run_many """
+    mock_df = create_mock_episode_dataframe()
+    emma = EMMA(min_support=2, max_window=2, timestamp_present=True)
+
+    outputs = Coordinator(workers).run_many(emma, [mock_df, mock_df])
+    assert len(outputs) == 2
+    assert set(outputs[1]['Frequent episode'].to_list()) == {'a', 'b', 'a b', 'a -> a', 'a -> b', 'a -> a b'}
+
+
+def test_coordinator_retry(workers: List) -> None:
+    """ Test that jobs scheduled on an unreachable worker are retried on the others """
+    mock_df = create_mock_raw_dataframe()
+    outputs = Coordinator([unused_address()] + workers).run_many(PrefixSpan(min_support=0.5), [mock_df] * 4)
+    assert len(outputs) == 4
+    assert all(x in outputs[3]['Frequent sequential pattern'].to_list() for x in {'b c -> a', 'f -> b', 'f -> b -> c'})
+
+    with pytest.raises(RuntimeError):
+        Coordinator([unused_address()], retries=1).run_many(PrefixSpan(min_support=0.5), [mock_df])
+
+
+class SlowWorker(Worker):
+    """ Worker whose first job takes longer than the timeout of the coordinator """
+
+    slow_jobs = 1
+    running_jobs = max_running_jobs = 0
+
+    def process(self, *args):
+        """ Run a job, recording the number of jobs running at the same time """
+        self.running_jobs += 1
+        self.max_running_jobs = max(self.max_running_jobs, self.running_jobs)
+        try:
+            if self.slow_jobs:
+                self.slow_jobs -= 1
+                time.sleep(3)
+            return Worker.process(*args)
+        finally:
+            self.running_jobs -= 1
+
+
+def test_coordinator_timeout() -> None:
+    """ Test that a worker slow on a job is kept, and only sent the retry once it finished the job """
+    mock_df = create_mock_raw_dataframe()
+    with SlowWorker() as worker:
+        threading.Thread(target=worker.serve_forever, daemon=True).start()
+        outputs = Coordinator([worker.address], timeout=1).run_many(PrefixSpan(min_support=0.5), [mock_df])
+        worker.shutdown()
+    assert outputs[0].equals(PrefixSpan(min_support=0.5).run_pandas(mock_df))
+    assert worker.max_running_jobs == 1
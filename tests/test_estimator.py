@@ -0,0 +1,72 @@
+""" Test Suite for the Pre-flight Cost Estimator """
+
+import numpy as np
+import pandas as pd
+
+import spmf.estimator
+from spmf.base import Spmf
+from spmf.episode import EMMA, TKE
+from spmf.estimator import event_statistics, sequence_statistics
+from spmf.seq_pat import TKS, PrefixSpan
+from tests.utils import create_random_sequences
+
+
+def test_statistics() -> None:
+    """ Test the statistics of sequence databases and event sequences """
+    df = pd.DataFrame({
+        'ID': [1, 1, 1, 1, 2, 2],
+        'Time Points': [1, 1, 2, 2, 1, 3],
+        'Items': ['a', 'b', 'a', 'a', 'b', 'c'],
+    })
+    statistics = sequence_statistics(df)
+    assert (statistics.n_sequences, statistics.n_itemsets, statistics.n_occurrences) == (2, 4, 5)
+    assert statistics.alphabet_size == 3 and statistics.mean_length == 2
+    assert statistics.item_supports.tolist() == [2, 1, 1] and statistics.item_occurrences.tolist() == [2, 2, 1]
+    assert statistics.frequent_items(2) == (1, 2) and statistics.density == 4 / 6
+
+    events = pd.DataFrame({'Itemset': ['a', 'b', 'a', 'c'], 'Time points': [1, 1, 3, 10]})
+    statistics = event_statistics(events)
+    assert (statistics.n_time_points, statistics.span, statistics.n_events) == (3, 10, 4)
+    assert statistics.frequent_items(2) == (1, 2) and statistics.event_rate == 0.4
+    assert event_statistics(pd.DataFrame({'Itemset': ['1 2', '2']}), timestamp_present=False,
+                            split_itemsets=True).item_supports.tolist() == [2, 1]
+
+
+def test_pair_supports(monkeypatch) -> None:
+    """ Test the supports of the ordered pairs of items, counted by blocks of sequences """
+    df = create_random_sequences(0, 200, seed=1)
+    supports = df.drop_duplicates(['ID', 'Items']).groupby('Items')['ID'].count()
+    ranks = {item: rank for rank, item in enumerate(supports.sort_values(ascending=False, kind='stable').index)}
+    items = len(ranks)
+    expected = np.zeros((items, items), dtype=np.int64)
+    for _, sequence in df.groupby('ID'):
+        first, last = sequence.groupby('Items')['Time Points'].min(), sequence.groupby('Items')['Time Points'].max()
+        for a in first.index:
+            for b in last.index:
+                expected[ranks[a], ranks[b]] += first[a] < last[b]
+
+    monkeypatch.setattr(spmf.estimator, 'MAX_PAIRS', 10)
+    assert (sequence_statistics(df).pair_supports == expected).all()
+
+
+def test_estimate() -> None:
+    """ Test that the estimates are consistent with the parameters """
+    sequences = create_random_sequences(0, 500, seed=0)
+    low, high = PrefixSpan(min_support=0.05).estimate(sequences), PrefixSpan(min_support=0.3).estimate(sequences)
+    assert low.n_patterns > high.n_patterns > 0
+    assert low.runtime_s > 0 and low.memory_mb > 0 and low.statistics.n_sequences == 500
+    assert PrefixSpan(min_support=0.9).estimate(sequences).n_patterns == 0
+    assert TKS(k=25).estimate(sequences).n_patterns == 25
+
+    events = pd.DataFrame({'Itemset': list('abcabdab' * 50), 'Time points': np.arange(400)})
+    estimate = EMMA(min_support=20, max_window=3, timestamp_present=True).estimate(events)
+    assert estimate.n_patterns > 0 and set(estimate.error_factors) == {'patterns', 'memory', 'runtime'}
+    assert TKE(k=10, max_window=3, timestamp_present=True).estimate(events).n_patterns == 10
+
+
+def test_parse_statistics() -> None:
+    """ Test the statistics printed by SPMF """
+    assert Spmf._parse_statistics(' Total time ~ 12 ms\n Max memory (mb) : 6.94\n') == \
+        {'memory_mb': 6.94, 'runtime_ms': 12}
+    assert Spmf._parse_statistics(' Maximum memory usage : 7.5 mb\n Total time ~ : 3 ms') == \
+        {'memory_mb': 7.5, 'runtime_ms': 3}
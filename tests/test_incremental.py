@@ -0,0 +1,41 @@
+""" Test Suite for Incremental Sequential Pattern Mining """
+
+import pandas as pd
+import pytest
+
+from spmf.incremental import IncrementalSeqPat
+from spmf.seq_pat import SPAM, ClaSP, PrefixSpan
+from tests.utils import as_dict, create_random_sequences
+
+
+@pytest.mark.parametrize('create_algorithm', [
+    lambda: PrefixSpan(min_support=0.2, engine='native'),
+    lambda: SPAM(min_support=0.2, max_gap=1),
+])
+def test_incremental_seqpat(create_algorithm) -> None:
+    """ Test appended batches against mining the whole database """
+    database = create_random_sequences(0, 200, seed=0)
+    incremental = IncrementalSeqPat(create_algorithm())
+    assert as_dict(incremental.run_pandas(database)) == as_dict(create_algorithm().run_pandas(database))
+
+    remined = []
+    for i in range(4):
+        batch = create_random_sequences(200 + 4 * i, 4, seed=i + 1)
+        database = pd.concat([database, batch])
+        assert as_dict(incremental.append(batch)) == as_dict(create_algorithm().run_pandas(database))
+        remined.append(incremental.remined)
+
+    # Small batches are absorbed by the buffer without mining the whole database
+    assert not remined[0]
+
+
+def test_incremental_seqpat_errors() -> None:
+    """ Test invalid algorithms and appended sequence IDs """
+    with pytest.raises(TypeError):
+        IncrementalSeqPat(ClaSP(min_support=0.2))
+
+    database = create_random_sequences(0, 20, seed=0)
+    incremental = IncrementalSeqPat(PrefixSpan(min_support=0.2, engine='native'))
+    incremental.run_pandas(database)
+    with pytest.raises(ValueError):
+        incremental.append(create_random_sequences(10, 4, seed=1))
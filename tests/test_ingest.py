@@ -0,0 +1,188 @@
+""" Test Suite for Streaming Ingestion of Large Inputs """
+
+import copy
+import glob
+import io
+import os
+import sqlite3
+import tempfile
+
+import numpy as np
+import pytest
+
+from spmf import episode, ingest, seq_pat
+from spmf.episode import EMMA
+from spmf.seq_pat import PrefixSpan
+from tests.test_episode_mining import create_mock_raw_dataframe
+from tests.utils import as_dict, create_random_sequences
+
+
+def decode(text: str, mapping: dict) -> list:
+    """ Sequences of an SPMF input, as lists of sets of the original items """
+    return [[{mapping[code] for code in itemset.split()} for itemset in line.split(' -1 ')[:-1]]
+            for line in text.replace(' -1 -2', ' -1 ').splitlines()]
+
+
+def test_sequence_writer() -> None:
+    """ Test the SPMF input written by batches, against the input of run_pandas """
+    sequences = create_random_sequences(0, 50, seed=4)
+    columns = sequences['ID'].to_numpy(), sequences['Time Points'].to_numpy(), sequences['Items'].to_numpy()
+    algorithm = PrefixSpan(min_support=0.1)
+    expected = decode(algorithm._parse_input_dataframe(sequences), algorithm.mapping)
+
+    # Any split of the rows into batches writes the same sequences, whatever the item codes
+    for batch_size in [1, 7, len(sequences)]:
+        fp = io.StringIO()
+        dictionary, labels = ingest.write_sequences(lambda: (
+            ingest.Batch(*(column[start:start + batch_size] for column in columns))
+            for start in range(0, len(sequences), batch_size)), fp)
+        assert decode(fp.getvalue(), dictionary.mapping) == expected
+        assert np.array_equal(labels, algorithm.sequence_labels)
+
+    # Dictionary encoded items are looked up by their dictionary
+    dictionary = ingest.ItemDictionary()
+    codes = dictionary.encode(ingest.Batch(None, None, np.array([1, 0, 1]), np.array(['x', 'y'])))
+    assert codes.tolist() == [2, 1, 2] and dictionary.mapping == {'1': 'x', '2': 'y'}
+
+
+def test_write_input_dataframe(monkeypatch) -> None:
+    """ Test the SPMF input written by chunks, against the input text of _parse_input_dataframe """
+    sequences = create_random_sequences(0, 50, seed=7)
+    events = create_mock_raw_dataframe()
+    algorithms = [(PrefixSpan(min_support=0.1), sequences), (PrefixSpan(min_support=0.1), sequences.iloc[:0]),
+                  (EMMA(min_support=2, max_window=2, timestamp_present=True), events),
+                  (EMMA(min_support=2, max_window=2, timestamp_present=False), events[['Itemset']])]
+    expected = [copy.deepcopy(algorithm)._parse_input_dataframe(input_df) for algorithm, input_df in algorithms]
+    assert expected[1] == ' -1 -2' and expected[2].splitlines()[0] == '1|1'
+
+    for module in [seq_pat, episode]:
+        monkeypatch.setattr(module, 'CHUNK_LINES', 2)
+    for (algorithm, input_df), text in zip(algorithms, expected):
+        input_file = algorithm._convert_dataframe_to_file_object(input_df)
+        with open(input_file.name) as fp:
+            assert fp.read() == text
+        algorithm._delete_temp_file(input_file)
+
+
+def test_run_parquet(tmp_path) -> None:
+    """ Test mining Parquet files, ordered or sorted externally, against run_pandas """
+    pa = pytest.importorskip('pyarrow')
+    pq = pytest.importorskip('pyarrow.parquet')
+
+    sequences = create_random_sequences(0, 300, seed=3)
+    expected = PrefixSpan(min_support=0.1, show_seq_ids=True)
+    expected_patterns = expected.run_pandas(sequences)['Frequent sequential pattern']
+    expected_output = as_dict(expected.run_pandas(sequences))
+
+    pq.write_table(pa.Table.from_pandas(sequences, preserve_index=False), tmp_path / 'ordered.parquet',
+                   row_group_size=100)
+    shuffled = sequences.sample(frac=1, random_state=0).astype({'Items': 'category'})
+    for part in range(2):
+        (tmp_path / 'shuffled' / f'part={part}').mkdir(parents=True)
+        pq.write_table(pa.Table.from_pandas(shuffled[part::2], preserve_index=False),
+                       tmp_path / 'shuffled' / f'part={part}' / 'data.parquet', row_group_size=100)
+
+    for path, partition_rows in [('ordered.parquet', 1_000_000), ('shuffled', 200)]:
+        ingest.PARTITION_ROWS, default = partition_rows, ingest.PARTITION_ROWS
+        try:
+            algorithm = PrefixSpan(min_support=0.1, show_seq_ids=True)
+            output = algorithm.run_parquet(str(tmp_path / path), batch_size=50)
+        finally:
+            ingest.PARTITION_ROWS = default
+        assert as_dict(output) == expected_output
+        supporting = {pattern: set(algorithm.sequence_index.sequences(row))
+                      for row, pattern in enumerate(output['Frequent sequential pattern'])}
+        assert supporting == {pattern: set(expected.sequence_index.sequences(row))
+                              for row, pattern in enumerate(expected_patterns)}
+
+    events = create_mock_raw_dataframe()
+    pq.write_table(pa.Table.from_pandas(events, preserve_index=False), tmp_path / 'events.parquet', row_group_size=3)
+    pq.write_table(pa.Table.from_pandas(events.sample(frac=1, random_state=1), preserve_index=False),
+                   tmp_path / 'shuffled_events.parquet', row_group_size=3)
+    for timestamp_present in [True, False]:
+        expected_output = EMMA(min_support=2, max_window=2, timestamp_present=timestamp_present).run_pandas(
+            events if timestamp_present else events[['Itemset']])
+        output = EMMA(min_support=2, max_window=2, timestamp_present=timestamp_present).run_parquet(
+            str(tmp_path / 'events.parquet'), batch_size=2)
+        assert as_dict(output) == as_dict(expected_output)
+
+    output = EMMA(min_support=2, max_window=2, timestamp_present=True).run_parquet(
+        str(tmp_path / 'shuffled_events.parquet'), batch_size=2)
+    assert as_dict(output) == as_dict(EMMA(min_support=2, max_window=2, timestamp_present=True).run_pandas(events))
+
+
+def test_run_arrow() -> None:
+    """ Test mining Arrow tables and Polars DataFrames against run_pandas """
+    pa = pytest.importorskip('pyarrow')
+
+    sequences = create_random_sequences(0, 200, seed=5)
+    expected = as_dict(PrefixSpan(min_support=0.1).run_pandas(sequences))
+    table = pa.Table.from_pandas(sequences, preserve_index=False)
+    output = PrefixSpan(min_support=0.1).run_arrow(table, batch_size=64)
+    assert isinstance(output, pa.Table) and output.column_names == ['Frequent sequential pattern', 'Support']
+    assert as_dict(output.to_pandas()) == expected
+    assert PrefixSpan(min_support=0.1).run_arrow(table.slice(0, 0)).num_rows == 0
+
+    events = create_mock_raw_dataframe()
+    algorithm = EMMA(min_support=2, max_window=2, timestamp_present=True)
+    output = algorithm.run_arrow(pa.Table.from_pandas(events, preserve_index=False))
+    assert as_dict(output.to_pandas()) == as_dict(EMMA(min_support=2, max_window=2, timestamp_present=True)
+                                                  .run_pandas(events))
+
+    # Without transform, itemsets are already in the SPMF format
+    encoded = events.assign(Itemset=events['Itemset'].map({'a': '1', 'b': '2', 'c': '3', 'd': '4'}))
+    output = EMMA(min_support=2, max_window=2, timestamp_present=True, transform=False).run_arrow(
+        pa.Table.from_pandas(encoded, preserve_index=False))
+    assert as_dict(output.to_pandas()) == as_dict(EMMA(min_support=2, max_window=2, timestamp_present=True,
+                                                       transform=False).run_pandas(encoded))
+
+    pl = pytest.importorskip('polars')
+    input_df = pl.from_arrow(table).with_columns(pl.col('Items').cast(pl.Categorical))
+    output = PrefixSpan(min_support=0.1).run_polars(input_df)
+    assert isinstance(output, pl.DataFrame) and as_dict(output.to_pandas()) == expected
+
+
+def test_run_batches_errors() -> None:
+    """ Test that unsupported parameters are rejected before the input file is written """
+    pa = pytest.importorskip('pyarrow')
+
+    table = pa.Table.from_pandas(create_random_sequences(0, 20, seed=7), preserve_index=False)
+    temp_files = set(glob.glob(os.path.join(tempfile.gettempdir(), 'tmp*.txt')))
+    for input_table in [table, table.slice(0, 0)]:
+        with pytest.raises(ValueError):
+            PrefixSpan(min_support=0.5, required_items=['a']).run_arrow(input_table)
+    assert set(glob.glob(os.path.join(tempfile.gettempdir(), 'tmp*.txt'))) <= temp_files
+
+
+def test_run_sql() -> None:
+    """ Test mining the result of SQL queries on SQLite against run_pandas """
+    sequences = create_random_sequences(0, 200, seed=6).sample(frac=1, random_state=0)
+    events = create_mock_raw_dataframe()
+    connection = sqlite3.connect(':memory:')
+    sequences.to_sql('sequences', connection, index=False)
+    events.to_sql('events', connection, index=False)
+
+    output = PrefixSpan(min_support=0.1).run_sql(connection, 'SELECT * FROM sequences', batch_size=64)
+    assert as_dict(output) == as_dict(PrefixSpan(min_support=0.1).run_pandas(sequences))
+
+    query = 'SELECT "ID" AS user, "Time Points" AS day, "Items" AS page FROM sequences WHERE "ID" < ?'
+    output = PrefixSpan(min_support=0.1).run_sql(connection, query, 'user', 'day', 'page', params=(100,))
+    assert as_dict(output) == as_dict(PrefixSpan(min_support=0.1).run_pandas(sequences[sequences['ID'] < 100]))
+
+    # Names quoted with backticks, as MySQL requires, which SQLite also reads
+    query = 'SELECT "ID" AS "se`q", "Time Points", "Items" FROM sequences'
+    output = PrefixSpan(min_support=0.1).run_sql(connection, query, id_col='se`q', quote_char='`')
+    assert as_dict(output) == as_dict(PrefixSpan(min_support=0.1).run_pandas(sequences))
+
+    output = EMMA(min_support=2, max_window=2, timestamp_present=True).run_sql(connection, 'SELECT * FROM events',
+                                                                               batch_size=3)
+    assert as_dict(output) == as_dict(EMMA(min_support=2, max_window=2, timestamp_present=True).run_pandas(events))
+
+    # Without timestamps, the time of an event is its row number in the order of order_col
+    events.assign(event_id=range(len(events))).sample(frac=1, random_state=2).to_sql(
+        'shuffled_events', connection, index=False)
+    output = EMMA(min_support=2, max_window=2).run_sql(connection, 'SELECT * FROM shuffled_events', batch_size=3,
+                                                       order_col='event_id')
+    assert as_dict(output) == as_dict(EMMA(min_support=2, max_window=2).run_pandas(events[['Itemset']]))
+    with pytest.raises(ValueError):
+        EMMA(min_support=2, max_window=2).run_sql(connection, 'SELECT * FROM events')
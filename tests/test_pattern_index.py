@@ -0,0 +1,66 @@
+""" Test Suite for the Pattern Query Index """
+
+import os
+
+import pandas as pd
+
+from spmf.episode import EMMA
+from spmf.pattern_index import PatternIndex
+from spmf.patterns import parse_pattern, pattern_length
+from spmf.seq_pat import PrefixSpan
+from tests.test_episode_mining import \
+    create_mock_raw_dataframe as create_mock_episode_dataframe
+from tests.utils import create_sequence_dataframe
+
+seqpat_test_file_path = os.path.join('tests', 'test_files', 'contextPrefixSpan.txt')
+
+
+def scan(output_df: pd.DataFrame, starts_with: str = None, contains: list = None, min_support: int = None,
+         min_length: int = None) -> list:
+    """ Rows of the output dataframe satisfying the conditions, found by scanning every pattern """
+    rows = []
+    for row, (pattern, support) in enumerate(output_df.itertuples(index=False)):
+        pattern = parse_pattern(pattern)
+        prefix = parse_pattern(starts_with) if starts_with else ()
+        found = all(any(item in itemset for itemset in pattern) for item in contains or [])
+        if found and pattern[:len(prefix)] == prefix and support >= (min_support or 0) \
+                and pattern_length(pattern) >= (min_length or 0):
+            rows.append(row)
+    return rows
+
+
+def test_pattern_index_queries(tmp_path) -> None:
+    """ Test queries of a PrefixSpan output against a scan, and a saved index """
+    output = PrefixSpan(min_support=0.25).run_pandas(create_sequence_dataframe(seqpat_test_file_path))
+    index = PatternIndex.from_dataframe(output)
+    assert len(index) == len(output)
+
+    queries = [
+        {'starts_with': '1'},
+        {'starts_with': '1 -> 2 3'},
+        {'starts_with': '3 2 -> 1'},
+        {'contains': ['1', '6']},
+        {'min_support': 3},
+        {'starts_with': '1', 'contains': ['3'], 'min_support': 2, 'min_length': 3},
+        {'starts_with': '9'},
+        {'contains': ['9']},
+        {},
+    ]
+    for query in queries:
+        assert index.query(**query).tolist() == scan(output, **query)
+
+    assert index.to_dataframe([0, 5]).equals(output.iloc[[0, 5]].astype({'Support': int}))
+    index.save(tmp_path / 'index.npz')
+    loaded = PatternIndex.load(tmp_path / 'index.npz')
+    assert all(loaded.query(**query).tolist() == index.query(**query).tolist() for query in queries)
+
+
+def test_pattern_index_episodes() -> None:
+    """ Test an index of episodes and an empty index """
+    output = EMMA(min_support=2, max_window=2, timestamp_present=True).run_pandas(create_mock_episode_dataframe())
+    index = PatternIndex.from_dataframe(output)
+    assert index.query(starts_with='a', min_length=2).tolist() == scan(output, starts_with='a', min_length=2)
+    assert index.to_dataframe().columns.to_list() == ['Frequent episode', 'Support']
+
+    empty = PatternIndex.from_dataframe(output.iloc[:0])
+    assert len(empty) == 0 and empty.query(starts_with='a', contains=['b']).tolist() == []
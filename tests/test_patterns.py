@@ -0,0 +1,120 @@
+""" Test Suite for Pattern Sets """
+
+import os
+
+import numpy as np
+import pytest
+
+from spmf.episode import EMMA
+from spmf.patterns import (PatternSet, SequenceIndex, format_pattern,
+                           pattern_length, sub_patterns)
+from spmf.seq_pat import SPAM, VMSP, ClaSP, PrefixSpan
+from tests.test_episode_mining import (create_mock_dataframe,
+                                       create_mock_raw_dataframe)
+from tests.utils import as_dict, create_sequence_dataframe
+
+seqpat_test_file_path = os.path.join('tests', 'test_files', 'contextPrefixSpan.txt')
+episode_test_file_path = os.path.join('tests', 'test_files', 'contextEMMA.txt')
+
+
+def test_count_support_sequential() -> None:
+    """ Test support counting of sequential patterns against PrefixSpan and SPAM """
+    mock_df = create_sequence_dataframe(seqpat_test_file_path)
+    output = PrefixSpan(min_support=0.25).run_pandas(mock_df)
+    patterns = PatternSet.from_dataframe(output)
+    assert patterns.count_support(mock_df).equals(output)
+    assert patterns.count_support(mock_df, chunk_size=1).equals(output)
+
+    # Known patterns counted on new data
+    new_df = mock_df[mock_df['ID'] < 2]
+    counted = patterns.count_support(new_df).set_index('Frequent sequential pattern')['Support']
+    expected = PrefixSpan(min_support=0.5).run_pandas(new_df).set_index('Frequent sequential pattern')['Support']
+    assert (counted <= output.set_index('Frequent sequential pattern')['Support']).all()
+    assert counted[counted >= 1].sort_index().equals(expected.loc[counted[counted >= 1].index].sort_index())
+
+    for max_gap in [1, 2]:
+        output = SPAM(min_support=0.5, max_gap=max_gap).run_pandas(mock_df)
+        assert PatternSet.from_dataframe(output, max_gap=max_gap).count_support(mock_df).equals(output)
+
+
+def test_count_support_episode() -> None:
+    """ Test head support counting of episodes against EMMA """
+    for max_window in [2, 3, 5]:
+        mock_df = create_mock_dataframe(episode_test_file_path)
+        output = EMMA(min_support=1, max_window=max_window, timestamp_present=True, transform=False).run_pandas(mock_df)
+        patterns = PatternSet.from_dataframe(output, max_window=max_window)
+        assert patterns.count_support(mock_df).equals(output)
+        assert patterns.count_support(mock_df, chunk_size=2).equals(output)
+
+        mock_df = create_mock_raw_dataframe().drop(columns='Time points')
+        output = EMMA(min_support=1, max_window=max_window).run_pandas(mock_df)
+        assert PatternSet.from_dataframe(output, max_window=max_window).count_support(mock_df).equals(output)
+
+
+def test_sequence_index() -> None:
+    """ Test lookups in both directions and subsets of a sequence index """
+    index = SequenceIndex.from_lists(['0 1 2', '', '1'], np.array(['x', 'y', 'z']))
+    assert index.shape == (3, 3)
+    assert index.sequences(0).tolist() == ['x', 'y', 'z'] and index.sequences(1).tolist() == []
+    assert index.patterns('y').tolist() == [0, 2] and index.patterns('z').tolist() == [0]
+
+    subset = index.take([2, 0])
+    assert subset.sequences(0).tolist() == ['y'] and subset.patterns('y').tolist() == [0, 1]
+
+
+@pytest.mark.parametrize('algorithm', [
+    PrefixSpan(min_support=0.5, show_seq_ids=True),
+    PrefixSpan(min_support=0.5, show_seq_ids=True, engine='native'),
+    SPAM(min_support=0.5, max_gap=1, show_seq_ids=True),
+    ClaSP(min_support=0.5, show_seq_ids=True),
+    VMSP(min_support=0.5, show_seq_ids=True),
+])
+def test_show_seq_ids(algorithm) -> None:
+    """ Test that the sequences of each pattern are the sequences in which it is counted """
+    mock_df = create_sequence_dataframe(seqpat_test_file_path)
+    mock_df['ID'] = 'S' + mock_df['ID'].astype(str)
+    output = algorithm.run_pandas(mock_df)
+    assert len(algorithm.sequence_index) == len(output)
+
+    patterns = PatternSet.from_dataframe(output, max_gap=getattr(algorithm, 'max_gap', None) or None)
+    for label, sequence_df in mock_df.groupby('ID'):
+        supported = np.flatnonzero(patterns.count_support(sequence_df)['Support'].to_numpy(dtype=int))
+        assert algorithm.sequence_index.patterns(label).tolist() == supported.tolist()
+
+
+def test_closed_and_maximal() -> None:
+    """ Test closed and maximal post-processing of PrefixSpan against ClaSP and VMSP """
+    assert set(sub_patterns((('a', 'b'), ('c',)))) == {(('b',), ('c',)), (('a',), ('c',)), (('a', 'b'),)}
+
+    mock_df = create_sequence_dataframe(seqpat_test_file_path)
+    for min_support in [0.25, 0.5, 0.75]:
+        patterns = PatternSet.from_dataframe(PrefixSpan(min_support=min_support).run_pandas(mock_df))
+        closed = ClaSP(min_support=min_support).run_pandas(mock_df)
+        maximal = VMSP(min_support=min_support).run_pandas(mock_df)
+        assert as_dict(patterns.to_closed().to_dataframe()) == as_dict(closed)
+        assert as_dict(patterns.to_maximal().to_dataframe()) == as_dict(maximal)
+
+    with pytest.raises(ValueError):
+        PatternSet(['a -> b'], [1], max_gap=1).to_closed()
+
+
+def test_generate_rules() -> None:
+    """ Test sequential rules against the splits of each pattern whose antecedent is in the pattern set """
+    patterns = PatternSet.from_dataframe(PrefixSpan(min_support=0.25).run_pandas(
+        create_sequence_dataframe(seqpat_test_file_path)))
+    supports = {format_pattern(pattern): int(support) for pattern, support in zip(patterns.patterns, patterns.supports)}
+
+    for min_confidence, max_consequent, chunk_size in [(0, None, 10_000), (0.6, None, 3), (0.5, 1, 10_000)]:
+        rules = patterns.generate_rules(min_confidence, max_consequent, chunk_size=chunk_size)
+        expected = {
+            (format_pattern(pattern[:depth]), format_pattern(pattern[depth:])): int(support)
+            for pattern, support in zip(patterns.patterns, patterns.supports)
+            for depth in range(1, len(pattern))
+            if int(support) >= min_confidence * supports[format_pattern(pattern[:depth])]
+            and (max_consequent is None or pattern_length(pattern[depth:]) <= max_consequent)
+        }
+        assert len(rules) and dict(zip(zip(rules['Antecedent'], rules['Consequent']), rules['Support'])) == expected
+        assert np.allclose(rules['Confidence'], rules['Support'] / rules['Antecedent'].map(supports))
+
+    with pytest.raises(ValueError):
+        PatternSet(['a -> b'], [1], kind='episode', max_window=2).generate_rules(0.5)
@@ -0,0 +1,73 @@
+""" Test Suite for Lazy Mining Pipelines """
+
+import pytest
+
+from spmf.episode import AFEM, EMMA
+from spmf.pipeline import Pipeline
+from spmf.seq_pat import PrefixSpan
+from tests.test_episode_mining import create_mock_raw_dataframe
+from tests.utils import as_dict, create_random_sequences
+
+
+def statuses(pipeline: Pipeline) -> dict:
+    """ Status of each stage of the last compute, by name """
+    return {entry['name']: entry['status'] for entry in pipeline.log}
+
+
+def drop_item(input_df, item):
+    """ Filter of the input dataframe """
+    return input_df[input_df['Itemset'] != item]
+
+
+def test_pipeline_shares_stages() -> None:
+    """ Test several algorithms mining one encoding, and recomputing only the changed stages """
+    pipeline = Pipeline()
+    events = pipeline.load(create_mock_raw_dataframe()).apply(drop_item, 'd')
+    parameters = {'min_support': 2, 'max_window': 2, 'timestamp_present': True}
+    emma, afem = EMMA(**parameters), AFEM(**parameters)
+    outputs = pipeline.compute(events.mine(emma), events.mine(afem))
+
+    expected_input = drop_item(create_mock_raw_dataframe(), 'd')
+    assert as_dict(outputs[0]) == as_dict(EMMA(**parameters).run_pandas(expected_input))
+    assert as_dict(outputs[1]) == as_dict(AFEM(**parameters).run_pandas(expected_input))
+    assert [entry['name'] for entry in pipeline.log].count('encode') == 1
+    assert [entry['name'] for entry in pipeline.log].count('run') == 2
+
+    # Cached stages are not computed again, and their upstream stages are not read
+    assert as_dict(events.mine(emma).compute()) == as_dict(outputs[0])
+    assert [(entry['name'], entry['status']) for entry in pipeline.log] == [('decode', 'cached')]
+
+    # A new filter is computed from the cached upstream filter, and everything downstream of it is recomputed
+    events.apply(drop_item, 'c').mine(emma).compute()
+    assert [(entry['name'], entry['status']) for entry in pipeline.log] == [
+        ('drop_item', 'cached'), ('drop_item', 'computed'), ('encode', 'computed'), ('run', 'computed'),
+        ('decode', 'computed')]
+
+    # A parameter of the run keeps the encoding
+    parameters = {**parameters, 'min_support': 3, 'prefilter': False}
+    events.mine(EMMA(**parameters)).compute()
+    events.mine(EMMA(**parameters, memory=2048)).compute()
+    assert statuses(pipeline) == {'encode': 'cached', 'run': 'computed', 'decode': 'computed'}
+
+
+def test_pipeline_disk_cache(tmp_path) -> None:
+    """ Test reusing the results of a previous pipeline """
+    sequences = create_random_sequences(0, 100, seed=2)
+    stage = Pipeline(cache_dir=tmp_path).load(sequences).mine(PrefixSpan(min_support=0.2))
+    output = stage.compute()
+    assert as_dict(output) == as_dict(PrefixSpan(min_support=0.2).run_pandas(sequences))
+
+    pipeline = Pipeline(cache_dir=tmp_path)
+    assert as_dict(pipeline.load(sequences).mine(PrefixSpan(min_support=0.2)).compute()) == as_dict(output)
+    assert statuses(pipeline) == {'decode': 'cached'}
+
+    (tmp_path / 'data.pkl').write_bytes(b'')     # a file of the user in a shared directory
+    pipeline.clear()
+    assert [path.name for path in tmp_path.iterdir()] == ['data.pkl']
+    pipeline.load(sequences).mine(PrefixSpan(min_support=0.2)).compute()
+    assert set(statuses(pipeline).values()) == {'computed'}
+
+    with pytest.raises(ValueError):
+        pipeline.load(sequences).mine(PrefixSpan(min_support=0.2, required_items=[1]))
+    with pytest.raises(ValueError):
+        Pipeline().compute(pipeline.load(sequences))
@@ -0,0 +1,106 @@
+""" Test Suite for the Infrequent Item Prefilter and Required Items """
+
+import random
+
+import pandas as pd
+import pytest
+
+from spmf.episode import EMMA, MaxFEM
+from spmf.prefilter import (contains_items, filter_events,
+                            filter_required_items, filter_sequences)
+from spmf.seq_pat import SPAM, TKS, VGEN, PrefixSpan
+from tests.utils import as_dict, create_random_sequences
+
+
+def create_long_tail_sequences(n_sequences: int, seed: int) -> pd.DataFrame:
+    """ Create random Sequential Pattern Mining dataframe with a few frequent items and many rare ones """
+    rng = random.Random(seed)
+    rows = {
+        (sequence_id, time, min(int(rng.paretovariate(1.0)), 60))
+        for sequence_id in range(n_sequences)
+        for time in range(rng.randint(1, 5))
+        for _ in range(rng.randint(1, 3))
+    }
+    return pd.DataFrame(sorted(rows), columns=['ID', 'Time Points', 'Items'])
+
+
+def test_filter_sequences() -> None:
+    """ Test that items are dropped on their sequence support, keeping itemsets or sequences if required """
+    df = pd.DataFrame({
+        'ID': [1, 1, 1, 2, 2, 3],
+        'Time Points': [1, 2, 3, 1, 1, 1],
+        'Items': ['a', 'b', 'a', 'a', 'c', 'c'],
+    })
+    assert filter_sequences(df, 2).index.to_list() == [0, 2, 3, 4, 5]
+    assert filter_sequences(df, 3).index.to_list() == []
+
+    df.loc[5, 'Items'] = 'd'
+    assert filter_sequences(df, 2).index.to_list() == [0, 2, 3]
+    assert filter_sequences(df, 2, keep_itemsets=True).index.to_list() == [0, 1, 2, 3, 5]
+    assert filter_sequences(df, 2, keep_sequences=True).index.to_list() == [0, 2, 3, 5]
+
+
+def test_filter_events() -> None:
+    """ Test that the support bound of an item counts the time points whose window contains it """
+    df = pd.DataFrame({'Time points': [1, 2, 3, 4, 10, 11], 'Itemset': ['a', 'a', 'a', 'b', 'c', 'c']})
+
+    # b occurs once but is within the window of the heads at time points 2, 3 and 4
+    assert filter_events(df, 3, max_window=2, split_itemsets=False)['Itemset'].to_list() == ['a', 'a', 'a', 'b']
+    assert filter_events(df, 2, max_window=0, split_itemsets=False)['Itemset'].to_list() == ['a', 'a', 'a', 'c', 'c']
+
+    codes = pd.DataFrame({'Time points': [1, 2, 5], 'Itemset': ['1 2', '1 3', '3']})
+    filtered = filter_events(codes, 2, max_window=1, split_itemsets=True)
+    assert filtered.to_dict('list') == {'Time points': [1, 2, 5], 'Itemset': ['1', '1 3', '3']}
+
+
+@pytest.mark.parametrize('create_algorithm', [
+    lambda **kwargs: PrefixSpan(min_support=0.04, engine='native', **kwargs),
+    lambda **kwargs: SPAM(min_support=0.02, max_gap=1, **kwargs),
+    lambda **kwargs: VGEN(min_support=0.07, **kwargs),
+])
+def test_prefilter_sequences(create_algorithm) -> None:
+    """ Test that prefiltered sequential pattern mining returns the same patterns """
+    sequences = create_long_tail_sequences(150, seed=3)
+    assert as_dict(create_algorithm().run_pandas(sequences)) == \
+        as_dict(create_algorithm(prefilter=False).run_pandas(sequences))
+
+
+@pytest.mark.parametrize('algorithm', [EMMA, MaxFEM])
+def test_prefilter_episodes(algorithm) -> None:
+    """ Test that prefiltered episode mining returns the same episodes """
+    rng = random.Random(5)
+    events = sorted({(time, f'i{int(rng.paretovariate(0.8))}') for time in range(0, 300, 2) for _ in range(3)})
+    events = pd.DataFrame(events, columns=['Time points', 'Itemset'])
+
+    for min_support, max_window in [(4, 3), (8, 5)]:
+        output = algorithm(min_support, max_window, timestamp_present=True).run_pandas(events)
+        expected = algorithm(min_support, max_window, timestamp_present=True, prefilter=False).run_pandas(events)
+        assert as_dict(output) == as_dict(expected)
+
+
+def test_filter_required_items() -> None:
+    """ Test that sequences without every required item are dropped, and patterns without them filtered out """
+    df = pd.DataFrame({'ID': [1, 1, 2, 2, 3], 'Time Points': [1, 2, 1, 2, 1], 'Items': ['a', 'b', 'b', 'c', 1]})
+    assert filter_required_items(df, ['a', 'b']).index.to_list() == [0, 1]
+    assert filter_required_items(df, ['b']).index.to_list() == [0, 1, 2, 3]
+    assert filter_required_items(df, [1]).index.to_list() == [4]
+
+    patterns = pd.Series(['a -> b', 'a b', 'b', 'a -> a', ''])
+    assert contains_items(patterns, ['a', 'b']).to_list() == [True, True, False, False, False]
+
+
+def test_required_items() -> None:
+    """ Test TKS and the sequential pattern mining algorithms with required items against filtered PrefixSpan """
+    sequences = create_random_sequences(0, 200, seed=1)
+    items = ['d', 'g']
+
+    expected = PrefixSpan(min_support=0.001, engine='native').run_pandas(sequences)
+    expected = expected[contains_items(expected['Frequent sequential pattern'], items)]
+    expected = expected.assign(Support=expected['Support'].astype(int)).nlargest(3, 'Support')
+    assert as_dict(TKS(k=3, required_items=items).run_pandas(sequences)) == as_dict(expected)
+
+    for algorithm in [PrefixSpan(min_support=0.05), SPAM(min_support=0.05, max_gap=2), VGEN(min_support=0.05)]:
+        output = algorithm.run_pandas(sequences)
+        algorithm.required_items = items
+        expected = output[contains_items(output['Frequent sequential pattern'], items)]
+        assert len(expected) and as_dict(algorithm.run_pandas(sequences)) == as_dict(expected)
@@ -0,0 +1,82 @@
+""" Test Suite for Rolling Time Window Mining """
+
+import random
+
+import pandas as pd
+import pytest
+
+from spmf.episode import EMMA, EMMARules
+from spmf.rolling import RollingWindow
+from spmf.seq_pat import TKS, PrefixSpan
+from tests.utils import as_dict, create_random_sequences
+
+
+def create_random_events(n_time_points: int, seed: int) -> pd.DataFrame:
+    """ Create random Episode Mining dataframe with one item per row """
+    rng = random.Random(seed)
+    events = sorted({(rng.randrange(n_time_points), rng.choice('abcde')) for _ in range(3 * n_time_points)})
+    return pd.DataFrame(events, columns=['Time points', 'Itemset'])
+
+
+def test_rolling_window_episodes() -> None:
+    """ Test each window against EMMA, and that only the windows of a new bucket are mined """
+    events = create_random_events(50, seed=0)
+    events['Bucket'] = events['Time points'] // 10
+
+    rolling = RollingWindow(EMMA(min_support=3, max_window=3), window=3)
+    output = rolling.run_pandas(events, 'Bucket')
+    assert list(output) == [2, 3, 4]
+
+    for end, window_output in output.items():
+        window_df = events[(events['Bucket'] > end - 3) & (events['Bucket'] <= end)].drop(columns='Bucket')
+        emma = EMMA(min_support=3, max_window=3, timestamp_present=True)
+        assert as_dict(window_output) == as_dict(emma.run_pandas(window_df))
+
+    new_events = pd.DataFrame({'Time points': [50, 52, 53], 'Itemset': ['a', 'b', 'a'], 'Bucket': [5, 5, 5]})
+    updated = rolling.run_pandas(pd.concat([events, new_events], ignore_index=True), 'Bucket')
+    assert rolling.mined == [5]
+    assert all(updated[end] is output[end] for end in output)
+
+
+@pytest.mark.parametrize('combine_buckets', [True, False])
+def test_rolling_window_sequences(combine_buckets: bool) -> None:
+    """ Test each window against PrefixSpan, with the supports of the buckets combined or not """
+    sequences = create_random_sequences(0, 100, seed=0)
+    bucket = sequences['ID'] // 20
+
+    rolling = RollingWindow(PrefixSpan(min_support=0.2, engine='native'), window=3, step=2,
+                            combine_buckets=combine_buckets)
+    output = rolling.run_pandas(sequences, bucket)
+    assert list(output) == [2, 4]
+
+    for end, window_output in output.items():
+        window_df = sequences[(bucket > end - 3) & (bucket <= end)]
+        assert as_dict(window_output) == as_dict(PrefixSpan(min_support=0.2).run_pandas(window_df))
+
+
+@pytest.mark.parametrize('create_algorithm', [
+    lambda: PrefixSpan(min_support=0.2, required_items=['a', 'b']),
+    lambda: TKS(k=5, required_items=['a', 'b']),
+])
+def test_rolling_window_required_items(create_algorithm) -> None:
+    """ Test each window with required items against run_pandas """
+    sequences = create_random_sequences(0, 100, seed=0)
+    bucket = sequences['ID'] // 20
+
+    output = RollingWindow(create_algorithm(), window=3, step=2).run_pandas(sequences, bucket)
+    for end, window_output in output.items():
+        window_df = sequences[(bucket > end - 3) & (bucket <= end)]
+        expected = create_algorithm().run_pandas(window_df)
+        assert len(expected) and as_dict(window_output) == as_dict(expected)
+
+
+def test_rolling_window_errors() -> None:
+    """ Test invalid algorithms and sequences split across buckets """
+    with pytest.raises(TypeError):
+        RollingWindow(EMMARules(min_support=2, max_window=2), window=3)
+
+    sequences = create_random_sequences(0, 10, seed=0)
+    with pytest.raises(ValueError):
+        RollingWindow(TKS(k=5), window=3).run_pandas(sequences, sequences['Time Points'])
+    with pytest.raises(ValueError):
+        RollingWindow(PrefixSpan(min_support=0.2, approximate=True, sample_size=5), window=3)
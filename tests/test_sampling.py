@@ -0,0 +1,61 @@
+""" Test Suite for Approximate Sequential Pattern Mining """
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from spmf.patterns import parse_pattern
+from spmf.sampling import epsilon_for, sample_size_for, support_intervals
+from spmf.seq_pat import SPAM, ClaSP, PrefixSpan
+from tests.utils import as_dict, create_random_sequences
+
+
+def as_tuples(output: pd.DataFrame) -> list:
+    """ Convert approximate output dataframe to a list of parsed patterns, supports and bounds """
+    return [(parse_pattern(pattern), *supports) for pattern, *supports in output.itertuples(index=False)]
+
+
+def test_bounds() -> None:
+    """ Test that the sample size and the error bound are inverse, and intervals contain the estimates """
+    for epsilon, min_support in [(0.01, 0.05), (0.002, 0.005)]:
+        sample_size = sample_size_for(epsilon, 0.05, min_support)
+        assert epsilon_for(sample_size, 0.05, min_support) <= epsilon < epsilon_for(sample_size - 1, 0.05, min_support)
+    assert sample_size_for(0.01, 0.01, 0.05) > sample_size_for(0.01, 0.1, 0.05)
+
+    lower, upper = support_intervals(np.array([0, 10, 500, 1000]), 1000, 0.05)
+    assert np.all(lower <= np.array([0, 0.01, 0.5, 1])) and np.all(np.array([0, 0.01, 0.5, 1]) <= upper)
+    assert lower[0] == 0 and upper[-1] == 1
+
+
+@pytest.mark.parametrize('create_algorithm', [
+    lambda **kwargs: PrefixSpan(min_support=0.2, engine='native', **kwargs),
+    lambda **kwargs: SPAM(min_support=0.2, max_gap=1, **kwargs),
+])
+def test_approximate(create_algorithm) -> None:
+    """ Test sampled mining against the exact frequent patterns """
+    database = create_random_sequences(0, 2000, seed=0)
+    exact = as_dict(create_algorithm().run_pandas(database))
+
+    output = create_algorithm(approximate=True, sample_size=500, random_state=0).run_pandas(database)
+    intervals = {pattern: (lower, upper) for pattern, _, lower, upper in as_tuples(output)}
+    assert set(exact) <= set(intervals)
+    assert all(intervals[pattern][0] <= support <= intervals[pattern][1] for pattern, support in exact.items())
+    assert (output['Support lower'] <= output['Support']).all() and (output['Support'] <= output['Support upper']).all()
+
+    verified = create_algorithm(approximate=True, epsilon=0.05, verify=True, random_state=0).run_pandas(database)
+    assert {pattern: support for pattern, support, _, _ in as_tuples(verified)} == exact
+    assert all(lower == support == upper for _, support, lower, upper in as_tuples(verified))
+
+    # A sample as large as the database is the exact run
+    output = create_algorithm(approximate=True, sample_size=2000).run_pandas(database)
+    assert {pattern: support for pattern, support, _, _ in as_tuples(output)} == exact
+
+
+def test_approximate_errors() -> None:
+    """ Test the parameters of approximate mining """
+    with pytest.raises(ValueError):
+        ClaSP(min_support=0.2, approximate=True, sample_size=100)
+    with pytest.raises(ValueError):
+        PrefixSpan(min_support=0.2, approximate=True)
+    with pytest.raises(ValueError):
+        PrefixSpan(min_support=0.01, approximate=True, sample_size=100).run_pandas(create_random_sequences(0, 200, 0))
@@ -0,0 +1,52 @@
+""" Test Suite for the Automatic Selection of a Frequent Sequential Pattern Mining Algorithm """
+
+import pandas as pd
+import pytest
+
+from spmf import selection
+from spmf.estimator import sequence_statistics
+from spmf.seq_pat import SPAM, FrequentSequentialPatterns, PrefixSpan
+from tests.utils import as_dict, create_random_sequences
+
+
+def test_select() -> None:
+    """ Test the choice of the decision table """
+    edges = {'density': [0.01, 0.2], 'itemset_size': [1.5], 'mean_length': [15]}
+    assert selection.cell_of({'density': 0.001, 'itemset_size': 1, 'mean_length': 8}, edges) == '0,0,0'
+    assert selection.cell_of({'density': 0.5, 'itemset_size': 3, 'mean_length': 15}, edges) == '2,1,1'
+
+    statistics = sequence_statistics(create_random_sequences(0, 200, seed=0))
+    choice = selection.select(statistics)
+    assert choice.algorithm in selection.CANDIDATES and f': {choice.algorithm} was the fastest' in choice.reason
+    assert choice.features['itemset_size'] == statistics.n_occurrences / statistics.n_itemsets
+    assert selection.select(statistics, candidates=['SPAM']).algorithm == 'SPAM'
+
+    # Every cell of the table holds the runtimes of every candidate
+    table = selection.load_table()
+    assert len(table['cells']) == 12
+    assert all(set(cell['relative_runtime']) == set(selection.CANDIDATES) for cell in table['cells'].values())
+
+
+def test_frequent_sequential_patterns() -> None:
+    """ Test the front end against the algorithms it chooses """
+    sequences = create_random_sequences(0, 200, seed=1)
+    algorithm = FrequentSequentialPatterns(min_support=0.1)
+    output = algorithm.run_pandas(sequences)
+    assert algorithm.selection.algorithm in selection.CANDIDATES
+    assert as_dict(output) == as_dict(PrefixSpan(min_support=0.1).run_pandas(sequences))
+
+    # Only SPAM supports gap constraints
+    algorithm = FrequentSequentialPatterns(min_support=0.1, max_gap=1)
+    output = algorithm.run_pandas(sequences)
+    assert algorithm.selection.algorithm == 'SPAM' and isinstance(algorithm.miner, SPAM)
+    assert as_dict(output) == as_dict(SPAM(min_support=0.1, max_gap=1).run_pandas(sequences))
+
+    algorithm = FrequentSequentialPatterns(min_support=0.1, algorithm='SPADE', show_seq_ids=True)
+    output = algorithm.run_pandas(sequences)
+    assert algorithm.selection.reason == 'set by the algorithm parameter'
+    assert len(algorithm.sequence_index) == len(output)
+
+    with pytest.raises(ValueError):
+        FrequentSequentialPatterns(min_support=0.1, algorithm='TKS')
+    with pytest.raises(ValueError):
+        FrequentSequentialPatterns(min_support=0.1, max_gap=1, engine='native').select(pd.DataFrame())
@@ -10,6 +10,7 @@ from spmf.seq_pat import (CMSPADE, NOSEP, SPADE, SPAM, TKS, VGEN, VMSP, ClaSP,
 
 test_file_path = os.path.join('tests', 'test_files', 'contextPrefixSpan.txt')
 nosep_test_file_path = os.path.join('tests', 'test_files', 'contextNOSEP.txt')
+strings_test_file_path = os.path.join('tests', 'test_files', 'contextPrefixSpanStrings.txt')
 
 
 def create_mock_raw_dataframe() -> pd.DataFrame:
@@ -55,6 +56,40 @@ def test_prefixspan_pandas() -> None:
     assert all(x in output['Frequent sequential pattern'].to_list() for x in {'b c -> a', 'f -> b', 'f -> b -> c'})
 
 
+def test_prefixspan_native_file() -> None:
+    """ Test native PrefixSpan engine against SPMF on given example in
+        https://www.philippe-fournier-viger.com/spmf/PrefixSpan.php
+    """
+    for min_support in [0.25, 0.5, 0.75, 1]:
+        for max_pattern_length in [None, 1, 3]:
+            prefixspan = PrefixSpan(min_support=min_support, max_pattern_length=max_pattern_length)
+            expected = prefixspan.run_file(test_file_path)
+            prefixspan = PrefixSpan(min_support=min_support, max_pattern_length=max_pattern_length, engine='native')
+            patterns, support = prefixspan.run_file(test_file_path)
+            assert set(zip(patterns, support)) == set(zip(*expected))
+
+    patterns, support = PrefixSpan(min_support=0.5, engine='auto').run_file(test_file_path)
+    assert all(x in set(patterns) for x in {'2 3 -> 1', '6 -> 2', '6 -> 2 -> 3'})
+
+
+def test_prefixspan_native_pandas() -> None:
+    """ Test native PrefixSpan engine against SPMF on given example in
+        https://www.philippe-fournier-viger.com/spmf/PrefixSpan.php
+    """
+    with open(strings_test_file_path, 'r') as fp:
+        mock_df = pd.DataFrame([
+            (sequence_id, time, item)
+            for sequence_id, line in enumerate(fp)
+            for time, itemset in enumerate(line.split('-1')[:-1])
+            for item in itemset.split()
+        ], columns=['ID', 'Time Points', 'Items'])
+
+    for input_df in [create_mock_raw_dataframe(), mock_df]:
+        expected = PrefixSpan(min_support=0.5).run_pandas(input_df)
+        output = PrefixSpan(min_support=0.5, engine='native').run_pandas(input_df)
+        assert set(map(tuple, output.values)) == set(map(tuple, expected.values))
+
+
 def test_spade_file() -> None:
     """ Test SPADE on given example in
         https://www.philippe-fournier-viger.com/spmf/SPADE.php
@@ -0,0 +1,128 @@
+""" Test Suite for the Local Mining Service """
+
+import json
+import socket
+import subprocess
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator
+
+import pytest
+
+from spmf import server as spmf_server
+from spmf.episode import EMMA
+from spmf.seq_pat import PrefixSpan
+from spmf.server import Client, HTTPServer, MiningService
+from tests.test_episode_mining import \
+    create_mock_raw_dataframe as create_mock_episode_dataframe
+from tests.utils import as_dict, create_random_sequences
+
+
+def serve(server) -> threading.Thread:
+    """ Serve requests in a background thread """
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return thread
+
+
+@pytest.fixture
+def service(tmp_path) -> Iterator[MiningService]:
+    """ Start a service with two workers, saving its jobs in a temporary directory """
+    service = MiningService(workers=2, state_dir=str(tmp_path / 'state')).start()
+    yield service
+    service.stop()
+
+
+def test_service_runs_and_coalesces(service) -> None:
+    """ Test results against run_pandas, and identical requests computed once """
+    sequences = create_random_sequences(0, 100, seed=9)
+    events = create_mock_episode_dataframe()
+    with HTTPServer(service) as server:
+        serve(server)
+        client = Client(server.address)
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            outputs = list(executor.map(lambda _: client.run_pandas(PrefixSpan(min_support=0.2), sequences), range(4)))
+        expected = as_dict(PrefixSpan(min_support=0.2).run_pandas(sequences))
+        assert all(as_dict(output) == expected for output in outputs)
+
+        algorithm = EMMA(min_support=2, max_window=2, timestamp_present=True)
+        assert as_dict(client.run_pandas(algorithm, events)) == as_dict(algorithm.run_pandas(events))
+        assert as_dict(client.run_pandas(algorithm, events)) == as_dict(algorithm.run_pandas(events))
+
+        metrics = client.metrics()
+        server.shutdown()
+
+    # 6 requests, of which 2 are computed and the others coalesced or served from the cache
+    assert metrics['spmf_requests_total'] == 6 and metrics['spmf_completed_total'] == 2
+    assert metrics['spmf_cache_hits_total'] + metrics['spmf_coalesced_total'] == 4
+    assert metrics['spmf_cache_hit_rate'] == metrics['spmf_cache_hits_total'] / 6
+    assert metrics['spmf_run_seconds_count'] == 2 and metrics['spmf_run_seconds_bucket{le="+Inf"}'] == 2
+    assert metrics['spmf_queue_depth'] == 0 and metrics['spmf_workers'] == 2
+
+
+@pytest.mark.skipif(not hasattr(socket, 'AF_UNIX'), reason='Unix sockets are not available on Windows')
+def test_service_api(service, tmp_path) -> None:
+    """ Test the JSON API on a Unix socket, with constructor parameters and errors """
+    events = create_mock_episode_dataframe()
+    with spmf_server.UnixHTTPServer(service, str(tmp_path / 'spmf.sock')) as server:
+        serve(server)
+        client = Client(server.address)
+
+        request = {'algorithm': 'EMMA', 'parameters': {'min_support': 2, 'max_window': 2, 'timestamp_present': True},
+                   'input': {'columns': list(events.columns), 'data': events.values.tolist()}}
+        status = client._request('POST', '/jobs?wait=1', request)
+        assert status['status'] == 'done' and status['result']['columns'] == ['Frequent episode', 'Support']
+        expected = EMMA(min_support=2, max_window=2, timestamp_present=True).run_pandas(events)
+        assert {tuple(row) for row in status['result']['data']} == {tuple(row) for row in expected.values.tolist()}
+
+        # The same request from the client is served from the cache
+        job = client.submit(EMMA(min_support=2, max_window=2, timestamp_present=True), events)
+        assert job == status['id'] and client.status(job)['status'] == 'done'
+
+        with pytest.raises(RuntimeError, match='400'):
+            client._request('POST', '/jobs', {**request, 'algorithm': 'Unknown'})
+        with pytest.raises(RuntimeError, match='404'):
+            client.status('unknown')
+
+        # Failed jobs are reported and not cached
+        job = client.submit(PrefixSpan(min_support=0.5), events)
+        with pytest.raises(RuntimeError):
+            client.result(job)
+        assert client._request('GET', '/health') == {'status': 'ok', 'workers': 2}
+        server.shutdown()
+
+
+def test_service_restart(tmp_path) -> None:
+    """ Test resuming queued jobs and serving finished results after a restart """
+    sequences = create_random_sequences(0, 50, seed=10)
+    algorithm = PrefixSpan(min_support=0.2)
+    request = {'algorithm': 'PrefixSpan', 'parameters': {'min_support': 0.2},
+               'input': {'columns': list(sequences.columns), 'data': json.loads(sequences.to_json(orient='values'))}}
+
+    # Jobs submitted before the workers start are saved as queued
+    job = MiningService(workers=1, state_dir=str(tmp_path)).submit(request)
+    service = MiningService(workers=1, state_dir=str(tmp_path)).start()
+    assert service.get(job.id).done.wait(60)
+    service.stop()
+
+    service = MiningService(workers=1, state_dir=str(tmp_path), cache_size=1).start()
+    assert service.submit(request).id == job.id and service.metrics()['cache_hits_total'] == 1
+    with HTTPServer(service) as server:
+        serve(server)
+        assert as_dict(Client(server.address).result(job.id)) == as_dict(algorithm.run_pandas(sequences))
+        server.shutdown()
+    service.stop()
+
+
+def test_service_command_line() -> None:
+    """ Test starting the service from the command line """
+    process = subprocess.Popen([sys.executable, '-m', 'spmf.server', '--port', '0', '--workers', '1'],
+                               stdout=subprocess.PIPE, text=True)
+    try:
+        host, port = process.stdout.readline().strip().split(':')
+        assert Client((host, int(port)), timeout=10)._request('GET', '/health')['workers'] == 1
+    finally:
+        process.terminate()
+        process.wait()
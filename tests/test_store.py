@@ -0,0 +1,62 @@
+""" Test Suite for the Persistent Result Store """
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from spmf.episode import EMMA
+from spmf.pipeline import fingerprint
+from spmf.seq_pat import PrefixSpan
+from tests.test_episode_mining import create_mock_raw_dataframe
+from tests.utils import create_random_sequences
+
+pa = pytest.importorskip('pyarrow')
+from spmf.store import load_results, save_results  # noqa: E402
+
+
+def test_save_and_load_results(tmp_path) -> None:
+    """ Test reloading outputs and run metadata, and reading some rows and columns """
+    sequences = create_random_sequences(0, 200, seed=8)
+    algorithm = PrefixSpan(min_support=0.1)
+    output = algorithm.run_pandas(sequences)
+    save_results(tmp_path / 'prefixspan.arrow', output, algorithm, sequences)
+
+    results = load_results(tmp_path / 'prefixspan.arrow')
+    assert len(results) == len(output) and results.columns == list(output.columns)
+    assert results.to_dataframe().equals(output.astype({'Support': np.int64}))
+    assert results.input_hash == fingerprint(sequences)
+    assert results.metadata['mapping'] == algorithm.mapping
+    assert results.metadata['statistics'] == algorithm.run_statistics
+    assert isinstance(results.algorithm, PrefixSpan) and results.algorithm.min_support == 0.1
+
+    # Items are stored once, in the dictionary of the item codes
+    items = results.table.column(results.column).chunk(0).values.values
+    assert sorted(items.dictionary.to_pylist()) == sorted(algorithm.mapping.values())
+
+    rows = np.flatnonzero(results.values('Support') >= 40)
+    selected = results.to_dataframe(rows, columns=['Frequent sequential pattern'])
+    assert selected['Frequent sequential pattern'].to_list() == output['Frequent sequential pattern'][rows].to_list()
+    assert results.patterns([2, 0]) == output['Frequent sequential pattern'][[2, 0]].to_list()
+
+    events = create_mock_raw_dataframe()
+    output = EMMA(min_support=2, max_window=2, timestamp_present=True).run_pandas(events)
+    save_results(tmp_path / 'emma.arrow', output)
+    results = load_results(tmp_path / 'emma.arrow')
+    assert results.to_dataframe().equals(output.astype({'Support': np.int64}))
+    assert results.algorithm is None and results.input_hash is None
+    save_results(tmp_path / 'emma.zstd.arrow', output, compression='zstd')
+    assert load_results(tmp_path / 'emma.zstd.arrow').to_dataframe().equals(results.to_dataframe())
+
+    save_results(tmp_path / 'empty.arrow', output.iloc[:0])
+    assert load_results(tmp_path / 'empty.arrow').to_dataframe().empty
+
+    # Any string is restored, such as the rules of episode rule mining
+    rules = pd.DataFrame({'Frequent episode': ['a b ==> c', 'a  -> ==>'], 'Support': [2, 1], 'Confidence': [1., .5]})
+    save_results(tmp_path / 'rules.arrow', rules)
+    assert load_results(tmp_path / 'rules.arrow').to_dataframe().equals(rules)
+
+    # Arrow files without the run metadata are not results
+    with pa.OSFile(str(tmp_path / 'other.arrow'), 'wb') as fp, pa.ipc.new_file(fp, pa.schema([])) as writer:
+        writer.write_table(pa.table({}))
+    with pytest.raises(ValueError):
+        load_results(tmp_path / 'other.arrow')
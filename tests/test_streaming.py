@@ -0,0 +1,123 @@
+""" Test Suite for Episode Matching on Event Streams """
+
+import asyncio
+import random
+
+import pandas as pd
+import pytest
+
+from spmf.episode import EMMA, EMMARules
+from spmf.patterns import format_pattern, parse_pattern
+from spmf.streaming import (EpisodeMatcher, Match, StreamingEpisodeMiner,
+                            parse_rule_antecedent)
+from tests.test_episode_mining import create_mock_raw_dataframe
+
+
+def create_mock_events() -> list:
+    """ Create mock event stream as a list of (time, item) """
+    return list(create_mock_raw_dataframe()[['Time points', 'Itemset']].itertuples(index=False, name=None))
+
+
+def test_parse_rule_antecedent() -> None:
+    """ Test parsing of episode rule antecedents """
+    assert parse_rule_antecedent('{a} ==> {a,b}') == (('a',),)
+    assert parse_rule_antecedent('{c,a}{b} ==> {d}') == (('a', 'c'), ('b',))
+
+
+def test_episode_matcher() -> None:
+    """ Test matches of the episodes mined by EMMA on the same events """
+    output = EMMA(min_support=2, max_window=2, timestamp_present=True).run_pandas(create_mock_raw_dataframe())
+    matcher = EpisodeMatcher.from_dataframe(output, max_window=2)
+    matches = matcher.process_batch(create_mock_events())
+
+    assert set(match.pattern for match in matches) == set(output['Frequent episode'])
+    assert all(0 <= match.end - match.start < 2 for match in matches)
+    assert [(m.start, m.end) for m in matches if m.pattern == 'a -> b'] == [(2, 3), (6, 7)]
+    assert [(m.start, m.end) for m in matches if m.pattern == 'a -> a b'] == [(2, 3), (6, 7)]
+    assert [(m.start, m.end) for m in matches if m.pattern == 'a b'] == [(3, 3), (7, 7)]
+    assert [m.end for m in matches if m.pattern == 'a'] == [1, 2, 3, 6, 7]
+
+    # One event at a time gives the same matches, and reset forgets partial occurrences
+    matcher.reset()
+    assert [match for event in create_mock_events() for match in matcher.process(*event)] == matches
+    assert matcher.process(12, 'b') == [Match('b', 12, 12)]
+
+
+def test_episode_matcher_rules() -> None:
+    """ Test matches of the antecedents of episode rules """
+    output = EMMARules(min_support=2, max_window=2, timestamp_present=True, min_confidence=0.2,
+                       max_consequent_count=1).run_pandas(create_mock_raw_dataframe())
+    matches = EpisodeMatcher.from_dataframe(output, max_window=2).process_batch(create_mock_events())
+
+    assert len(matches) == 5 * len(output)
+    assert set(match.end for match in matches) == {1, 2, 3, 6, 7}
+
+
+def test_episode_matcher_integer_items() -> None:
+    """ Test that integer items, such as alarm codes, match the items of the patterns """
+    matcher = EpisodeMatcher(['1 -> 2', '1 3'], max_window=5)
+    assert matcher.process_batch([(0, 1), (1, 2), (1, 2)]) == [Match('1 -> 2', 0, 1)]
+    assert matcher.process_batch([(4, 3), (4, 1)]) == [Match('1 3', 4, 4)]
+
+
+def test_episode_matcher_out_of_order() -> None:
+    """ Test that events received out of time order are rejected """
+    matcher = EpisodeMatcher(['a -> b'], max_window=5)
+    matcher.process(3, 'a')
+    with pytest.raises(ValueError):
+        matcher.process(2, 'b')
+
+
+def as_dict(output: pd.DataFrame) -> dict:
+    """ Convert output dataframe to a dictionary of episodes and supports """
+    return {format_pattern(parse_pattern(episode)): support for episode, support in output.itertuples(index=False)}
+
+
+def test_streaming_episode_miner() -> None:
+    """ Test each mining step against EMMA on the events of the window """
+    rng = random.Random(0)
+    events = sorted({(rng.randrange(60), rng.choice('abcd')) for _ in range(120)})
+    miner = StreamingEpisodeMiner(EMMA(min_support=3, max_window=3), window=20, cadence=15)
+
+    supports = {}
+    diffs = list(miner.run(events))
+    assert len(diffs) == 3 and all(diff.time < events[-1][0] for diff in diffs)
+
+    for diff in diffs:
+        window_df = pd.DataFrame(
+            [(time, item) for time, item in events if diff.time - 20 < time <= diff.time],
+            columns=['Time points', 'Itemset'],
+        )
+        expected = as_dict(EMMA(min_support=3, max_window=3, timestamp_present=True).run_pandas(window_df))
+        assert as_dict(diff.output) == expected
+
+        assert diff.appeared == {episode: support for episode, support in expected.items() if episode not in supports}
+        assert diff.disappeared.keys() == supports.keys() - expected.keys()
+        assert diff.changed == {
+            episode: (supports[episode], support) for episode, support in expected.items()
+            if episode in supports and supports[episode] != support
+        }
+        supports = expected
+
+    # The buffer and the item dictionary only hold the last window
+    assert all(time > events[-1][0] - 20 for time, _, _ in miner.buffer)
+    assert set(miner.codes) == {item for time, item in events if time > events[-1][0] - 20}
+
+
+def test_streaming_episode_miner_async() -> None:
+    """ Test mining an asynchronous event stream """
+    async def stream():
+        for event in create_mock_events():
+            yield event
+
+    async def collect(miner):
+        return [diff async for diff in miner.arun(stream())]
+
+    miner = StreamingEpisodeMiner(EMMA(min_support=2, max_window=2), window=6, cadence=3)
+    diffs = asyncio.run(collect(miner))
+    assert [diff.time for diff in diffs] == [3, 6, 9]
+    assert diffs[0].appeared == {'a': 3, 'a -> a': 2}
+    assert diffs[1].changed == {'a': (3, 4)}
+
+    with pytest.raises(TypeError):
+        StreamingEpisodeMiner(EMMARules(min_support=2, max_window=2), window=6, cadence=3)
@@ -0,0 +1,53 @@
+""" Test Suite for Sharded Top-K Mining """
+
+import os
+
+from spmf.episode import EMMA, TKE
+from spmf.patterns import parse_pattern, pattern_length
+from spmf.seq_pat import TKS, PrefixSpan
+from spmf.topk import ShardedTKE, ShardedTKS
+from tests.test_episode_mining import (create_mock_dataframe,
+                                       create_mock_raw_dataframe)
+from tests.utils import as_dict, create_sequence_dataframe
+
+seqpat_test_file_path = os.path.join('tests', 'test_files', 'contextPrefixSpan.txt')
+episode_test_file_path = os.path.join('tests', 'test_files', 'contextEMMA.txt')
+
+
+def test_sharded_tks() -> None:
+    """ Test sharded TKS against single node TKS and PrefixSpan """
+    mock_df = create_sequence_dataframe(seqpat_test_file_path)
+
+    for k in [3, 6, 12]:
+        expected = as_dict(TKS(k=k).run_pandas(mock_df))
+        output = as_dict(ShardedTKS(k=k, n_shards=2).run_pandas(mock_df))
+        kth_support = min(expected.values())
+
+        assert min(output.values()) == kth_support
+        assert expected.items() <= output.items()
+        assert output == as_dict(PrefixSpan(min_support=kth_support / 4).run_pandas(mock_df))
+
+    output = ShardedTKS(k=5, n_shards=3, min_pattern_length=3).run_pandas(mock_df)
+    assert len(output) >= 5
+    assert all(pattern_length(parse_pattern(pattern)) >= 3 for pattern in output['Frequent sequential pattern'])
+
+
+def test_sharded_tke() -> None:
+    """ Test sharded TKE against single node TKE and EMMA """
+    mock_df = create_mock_dataframe(episode_test_file_path)
+
+    for k in [2, 4, 8]:
+        expected = as_dict(TKE(k=k, max_window=2, timestamp_present=True, transform=False).run_pandas(mock_df))
+        output = as_dict(ShardedTKE(k=k, max_window=2, timestamp_present=True, n_shards=3,
+                                    transform=False).run_pandas(mock_df))
+        kth_support = min(expected.values())
+
+        assert min(output.values()) == kth_support
+        assert expected.items() <= output.items()
+        emma = EMMA(min_support=kth_support, max_window=2, timestamp_present=True, transform=False)
+        assert output == as_dict(emma.run_pandas(mock_df))
+
+    raw_df = create_mock_raw_dataframe().drop(columns='Time points')
+    output = as_dict(ShardedTKE(k=6, max_window=2, n_shards=2).run_pandas(raw_df))
+    expected = as_dict(TKE(k=6, max_window=2).run_pandas(raw_df))
+    assert expected.items() <= output.items()
@@ -0,0 +1,36 @@
+""" Helpers shared by the Test Suites """
+
+import random
+from typing import Text
+
+import pandas as pd
+
+from spmf.patterns import parse_pattern
+
+
+def create_sequence_dataframe(file_path: Text) -> pd.DataFrame:
+    """ Create Sequential Pattern Mining dataframe from a file in SPMF format """
+    rows = []
+    with open(file_path, 'r') as fp:
+        for sequence_id, line in enumerate(fp):
+            for time, itemset in enumerate(line.split('-1')[:-1]):
+                rows += [(sequence_id, time, item) for item in itemset.split()]
+
+    return pd.DataFrame(rows, columns=['ID', 'Time Points', 'Items'])
+
+
+def create_random_sequences(first_id: int, n_sequences: int, seed: int) -> pd.DataFrame:
+    """ Create random Sequential Pattern Mining dataframe """
+    rng = random.Random(seed)
+    rows = [
+        (sequence_id, time, item)
+        for sequence_id in range(first_id, first_id + n_sequences)
+        for time in range(rng.randint(2, 6))
+        for item in rng.sample('abcdefgh', rng.randint(1, 2))
+    ]
+    return pd.DataFrame(rows, columns=['ID', 'Time Points', 'Items'])
+
+
+def as_dict(output: pd.DataFrame) -> dict:
+    """ Convert output dataframe to a dictionary of parsed patterns and supports """
+    return {parse_pattern(pattern): support for pattern, support in output.itertuples(index=False)}